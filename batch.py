@@ -0,0 +1,84 @@
+"""
+Render many WAV files through one or more effect presets, on every core.
+
+Each file is rendered once per preset, into `<output>/<file>.<preset>.wav`.
+
+    python batch.py -o <output_dir> [-p <preset> ...] [-j <workers>] <file_path> ...
+"""
+
+import argparse
+from pathlib import Path
+import sys
+import time
+
+from pydalboard.batch import BatchJob, render_batch
+from pydalboard.modules.filter import FilterType
+from pydalboard.modules import (
+    Delay,
+    DelayParameters,
+    Distortion,
+    DistortionParameters,
+    Filter,
+    FilterParameters,
+    Saturation,
+    SaturationParameters,
+)
+
+# Modules of each preset, created again for every job
+PRESETS = {
+    "clean": lambda: [],
+    "saturated": lambda: [Saturation(SaturationParameters(drive=12.0))],
+    "distorted": lambda: [
+        Distortion(DistortionParameters(drive=12.0)),
+        Filter(
+            FilterParameters(
+                cutoff=3000,
+                resonance=1.14,
+                filter_type=FilterType.LOW_PASS,
+                slope=12,
+            )
+        ),
+    ],
+    "delayed": lambda: [Delay(DelayParameters(delay=300, feedback=0.3))],
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("files", nargs="+", type=Path)
+    parser.add_argument("-o", "--output", type=Path, required=True)
+    parser.add_argument(
+        "-p", "--preset", action="append", choices=PRESETS, dest="presets"
+    )
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    jobs = [
+        BatchJob(file, args.output / f"{file.stem}.{preset}.wav", PRESETS[preset]())
+        for file in args.files
+        for preset in args.presets or ["clean"]
+    ]
+
+    def print_progress(rendered, total):
+        print(f"\rRendering... {rendered}/{total}", end="", flush=True)
+
+    start = time.perf_counter()
+    results = render_batch(jobs, workers=args.workers, progress=print_progress)
+    elapsed = time.perf_counter() - start
+    print()
+
+    for result in results:
+        stats = result.stats
+        print(
+            f"{result.job.output_file}: {stats.frames} samples in "
+            f"{stats.elapsed:.2f}s, {stats.realtime_factor:.1f}x real time"
+        )
+
+    duration = sum(result.stats.frames / result.stats.sample_rate for result in results)
+    print(f"Rendered {duration:.1f}s of audio in {elapsed:.2f}s, {duration / elapsed:.1f}x real time")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
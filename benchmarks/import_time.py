@@ -0,0 +1,110 @@
+"""
+Cold-start import time of pydalboard modules.
+
+Each import is timed in a fresh interpreter, and the benchmark fails if the
+median time exceeds the budget, or if an optional heavy dependency (such as
+matplotlib) was imported on the way.
+
+numpy and scipy.io, which every module needs, are imported first and timed
+apart. Anything else, scipy.signal included, counts in the budget of each
+module, which is its median time on the reference machine with a margin of
+about 10%, so that a module pulling in a new dependency fails.
+
+    python benchmarks/import_time.py [--max-ms MS] [--runs 5] [module ...]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Budget of each module, in ms
+BUDGETS = {
+    "pydalboard.signal": 10.0,
+    "pydalboard.modules": 1100.0,
+    "pydalboard.pipeline": 1150.0,
+}
+
+# Required dependencies, imported before the timed module
+DEPENDENCIES = ["numpy", "scipy.io"]
+
+# Dependencies which must never be imported by the audio path
+FORBIDDEN_MODULES = ["matplotlib"]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+for name in {dependencies!r}:
+    __import__(name)
+middle = time.perf_counter()
+import {module}
+end = time.perf_counter()
+print(middle - start, end - middle)
+print(",".join(name for name in {forbidden!r} if name in sys.modules))
+"""
+
+
+def time_import(module: str) -> tuple[float, float, list[str]]:
+    """
+    Import the module in a fresh interpreter, after its dependencies.
+
+    Return the import time of the dependencies and of the module in seconds,
+    and the forbidden modules it loaded.
+    """
+    probe = PROBE.format(
+        module=module, dependencies=DEPENDENCIES, forbidden=FORBIDDEN_MODULES
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, loaded = result.stdout.splitlines()
+    dependencies, own = (float(value) for value in elapsed.split())
+    return (dependencies, own, [name for name in loaded.split(",") if name])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--max-ms", type=float, help="Budget of every module, instead of BUDGETS"
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        timings = []
+        dependencies = []
+        loaded = set()
+        for _ in range(args.runs):
+            dependencies_elapsed, elapsed, forbidden = time_import(module)
+            timings.append(elapsed * 1000)
+            dependencies.append(dependencies_elapsed * 1000)
+            loaded.update(forbidden)
+
+        median = statistics.median(timings)
+        budget = args.max_ms or BUDGETS.get(module)
+        status = "ok"
+        if budget is not None and median > budget:
+            status = f"too slow (budget {budget:.0f} ms)"
+        if loaded:
+            status = f"imports {', '.join(sorted(loaded))}"
+        failed |= status != "ok"
+
+        print(
+            f"{module:<24} {median:8.1f} ms  (min {min(timings):.1f}, "
+            f"dependencies {statistics.median(dependencies):.0f})  {status}"
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+"""
+Processing speed and memory of every module, source and typical pipelines.
+
+Each case processes blocks of a synthetic signal, and reports the time per
+sample, how many times faster than real time it runs, and the peak memory
+it allocates while processing a block. Results can be saved as JSON, and
+compared to a previous run to flag regressions.
+
+    python benchmarks/processing.py [--block-size 512] [--blocks 200] [--runs 5]
+        [--output results.json] [--compare baseline.json] [--tolerance 0.1] [case ...]
+"""
+
+import argparse
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+import json
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from scipy.io import wavfile
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pydalboard.modules
+from pydalboard.modules import kernels
+from pydalboard.modules.base import Module
+from pydalboard.modules.drive.saturation import TanhApproximation
+from pydalboard.modules.filter import FilterType
+from pydalboard.modules import (
+    Convolution,
+    ConvolutionParameters,
+    Delay,
+    DelayParameters,
+    Distortion,
+    DistortionParameters,
+    Filter,
+    FilterParameters,
+    Gain,
+    GainParameters,
+    Overdrive,
+    OverdriveParameters,
+    Oversampling,
+    PitchShifting,
+    PitchShiftingParameters,
+    Saturation,
+    SaturationParameters,
+)
+from pydalboard.pipeline import Pipeline
+from pydalboard.signal import (
+    Oscillator,
+    SignalInfo,
+    SignalSource,
+    VoiceBank,
+    Wav,
+    Waveform,
+)
+
+SIGNAL_INFO = SignalInfo(sample_rate=44_100, sample_format=16, channels=2)
+
+# Modules benchmarked on their own, with typical parameters
+MODULES: dict[str, Callable[[], Module]] = {
+    "Gain": lambda: Gain(GainParameters(gain=6.0)),
+    "Distortion": lambda: Distortion(DistortionParameters(drive=12.0)),
+    "Overdrive": lambda: Overdrive(
+        OverdriveParameters(drive=12.0, threshold=1.0, asymmetry=0.5)
+    ),
+    "Saturation": lambda: Saturation(SaturationParameters(drive=12.0)),
+    "Saturation-lookup": lambda: Saturation(
+        SaturationParameters(drive=12.0, approximation=TanhApproximation.LOOKUP)
+    ),
+    "Saturation-rational": lambda: Saturation(
+        SaturationParameters(drive=12.0, approximation=TanhApproximation.RATIONAL)
+    ),
+    "Oversampling-2x": lambda: Oversampling(
+        Saturation(SaturationParameters(drive=12.0)), factor=2
+    ),
+    "Oversampling-8x": lambda: Oversampling(
+        Saturation(SaturationParameters(drive=12.0)), factor=8
+    ),
+    "Filter-12": lambda: Filter(
+        FilterParameters(
+            cutoff=3000, resonance=1.14, filter_type=FilterType.LOW_PASS, slope=12
+        )
+    ),
+    "Filter-24": lambda: Filter(
+        FilterParameters(
+            cutoff=3000, resonance=1.14, filter_type=FilterType.LOW_PASS, slope=24
+        )
+    ),
+    "Convolution": lambda: Convolution(
+        ConvolutionParameters(mix=0.3),
+        impulse_response(seconds=2.0),
+        SIGNAL_INFO.sample_rate,
+    ),
+    "Delay": lambda: Delay(DelayParameters(delay=300, feedback=0.3)),
+    "Delay-short": lambda: Delay(DelayParameters(delay=1, feedback=0.3)),
+    "PitchShifting-tape": lambda: PitchShifting(
+        PitchShiftingParameters(pitch_factor=0.8, warp=False)
+    ),
+    "PitchShifting-warp": lambda: PitchShifting(
+        PitchShiftingParameters(pitch_factor=0.8, warp=True)
+    ),
+}
+
+# Chains of modules benchmarked as a whole pipeline, fed by a WAV file
+CHAINS: dict[str, list[str]] = {
+    # The stack of main.py
+    "main": [
+        "PitchShifting-tape",
+        "Saturation",
+        "Overdrive",
+        "Distortion",
+        "Filter-12",
+        "Delay",
+    ],
+    "drive": ["Gain", "Saturation", "Overdrive", "Distortion"],
+    "drive-lookup": ["Gain", "Saturation-lookup", "Overdrive", "Distortion"],
+    "filter-delay": ["Filter-24", "Delay"],
+    # Gains and filters which a compiled pipeline fuses
+    "fusable": ["Gain", "Gain", "Saturation", "Gain", "Filter-12", "Filter-24"],
+}
+
+
+@dataclass
+class Result:
+    name: str
+    "Name of the case"
+
+    ns_per_sample: float
+    "Median processing time of one sample (all channels), in nanoseconds"
+
+    realtime_factor: float
+    "How many times faster than real time the case runs"
+
+    peak_memory: int
+    "Highest memory allocated while processing a block, in bytes"
+
+    peak_memory_blocks: float
+    "Peak memory as a multiple of the size of a block, not a number of allocations"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("cases", nargs="*", help="names of the cases to run, all by default")
+    parser.add_argument("--block-size", type=int, default=512)
+    parser.add_argument("--blocks", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="save the results as JSON")
+    parser.add_argument("--compare", type=Path, help="JSON results of a previous run")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="slowdown flagged as a regression, as a fraction of the previous time",
+    )
+    args = parser.parse_args()
+
+    missing = [
+        name
+        for name in pydalboard.modules.__all__
+        if isinstance(cls := getattr(pydalboard.modules, name), type)
+        and issubclass(cls, Module)
+        and not any(name == case.split("-")[0] for case in MODULES)
+    ]
+    if missing:
+        print(f"Modules without benchmark: {', '.join(missing)}")
+
+    # Recursive modules run compiled kernels when numba is installed
+    backend = "numba" if kernels.JIT_ENABLED else "numpy"
+    print(f"Kernels: {backend}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        wav_file = Path(directory) / "noise.wav"
+        write_noise(wav_file, seconds=10)
+
+        cases = build_cases(wav_file)
+        if args.cases:
+            unknown = set(args.cases) - set(cases)
+            if unknown:
+                parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+            cases = {name: cases[name] for name in args.cases}
+
+        results = []
+        for name, case in cases.items():
+            result = run_case(name, case, args.block_size, args.blocks, args.runs)
+            results.append(result)
+            print(
+                f"{name:<28} {result.ns_per_sample:10.1f} ns/sample "
+                f"{result.realtime_factor:10.1f}x real time "
+                f"{result.peak_memory / 1024:10.1f} KiB peak "
+                f"({result.peak_memory_blocks:.1f} x block size)"
+            )
+
+    if args.output is not None:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "block_size": args.block_size,
+                    "sample_rate": SIGNAL_INFO.sample_rate,
+                    "kernels": backend,
+                    "results": [asdict(result) for result in results],
+                },
+                indent=2,
+            )
+        )
+
+    if args.compare is not None:
+        return compare(results, args.compare, args.tolerance)
+
+    return 0
+
+
+def impulse_response(seconds: float) -> np.ndarray:
+    """
+    Stereo reverb tail: exponentially decaying white noise.
+    """
+    rng = np.random.default_rng(0)
+    frames = int(seconds * SIGNAL_INFO.sample_rate)
+    decay = np.exp(-6.9 * np.arange(frames) / frames)[:, np.newaxis]
+    return (rng.uniform(-1.0, 1.0, (frames, 2)) * decay).astype(np.float32)
+
+
+def write_noise(file: Path, seconds: float) -> None:
+    """
+    Write a WAV file of white noise, in the benchmarked signal format.
+    """
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(
+        -0.5, 0.5, (int(seconds * SIGNAL_INFO.sample_rate), SIGNAL_INFO.channels)
+    )
+    wavfile.write(file, SIGNAL_INFO.sample_rate, SIGNAL_INFO.convert_to_format(samples))
+
+
+def build_cases(wav_file: Path) -> dict[str, Callable[[], Callable[[int], object]]]:
+    """
+    Every benchmark case, by name.
+
+    A case creates a fresh step function, which processes one block of the
+    given number of frames.
+    """
+    cases = {}
+
+    for name, factory in MODULES.items():
+        cases[f"module/{name}"] = module_case(factory)
+
+    sources: dict[str, Callable[[], SignalSource]] = {
+        "Wav": lambda: Wav(wav_file, loop=True),
+        "Wav-mmap": lambda: Wav(wav_file, loop=True, mmap=True),
+        "Oscillator-sine": lambda: Oscillator(Waveform.SINE, 440, 0.0, SIGNAL_INFO),
+        "Oscillator-sawtooth": lambda: Oscillator(
+            Waveform.SAWTOOTH, 440, 0.0, SIGNAL_INFO
+        ),
+    }
+    for voices in (1, 64):
+        sources[f"VoiceBank-{voices}"] = lambda voices=voices: voice_bank(voices)
+    for name, factory in sources.items():
+        cases[f"source/{name}"] = source_case(factory)
+
+    for name, chain in CHAINS.items():
+        cases[f"pipeline/{name}"] = pipeline_case(wav_file, chain)
+        cases[f"pipeline/{name}-compiled"] = pipeline_case(wav_file, chain, compiled=True)
+
+    return cases
+
+
+def voice_bank(voices: int) -> VoiceBank:
+    """
+    Voice bank playing as many sawtooth notes as it has voices.
+    """
+    bank = VoiceBank(Waveform.SAWTOOTH, SIGNAL_INFO, voices=voices)
+    for note in range(voices):
+        bank.note_on(note, 110.0 * 2 ** (note / 12))
+
+    return bank
+
+
+def module_case(factory: Callable[[], Module]) -> Callable[[], Callable[[int], object]]:
+    def create():
+        module = factory()
+        rng = np.random.default_rng(0)
+        signal = None
+
+        def step(frames: int):
+            nonlocal signal
+            if signal is None or len(signal) != frames:
+                signal = rng.uniform(-0.5, 0.5, (frames, SIGNAL_INFO.channels))
+                signal = signal.astype(np.float32)
+                module.prepare(SIGNAL_INFO, frames)
+
+            # Modules may process their input in place
+            return module.process_block(signal.copy(), SIGNAL_INFO)
+
+        return step
+
+    return create
+
+
+def source_case(factory: Callable[[], SignalSource]) -> Callable[[], Callable[[int], object]]:
+    def create():
+        source = factory()
+        return source.get_block
+
+    return create
+
+
+def pipeline_case(
+    wav_file: Path, chain: list[str], compiled: bool = False
+) -> Callable[[], Callable[[int], object]]:
+    def create():
+        pipeline = Pipeline(Wav(wav_file, loop=True))
+        pipeline.modules.extend(MODULES[name]() for name in chain)
+        if compiled:
+            pipeline.compile()
+        return pipeline.run_block
+
+    return create
+
+
+def run_case(
+    name: str,
+    create: Callable[[], Callable[[int], object]],
+    block_size: int,
+    blocks: int,
+    runs: int,
+) -> Result:
+    timings = []
+    for _ in range(runs):
+        step = create()
+        # The first block prepares the modules
+        step(block_size)
+
+        start = time.perf_counter()
+        for _ in range(blocks):
+            step(block_size)
+        timings.append(time.perf_counter() - start)
+
+    elapsed = statistics.median(timings)
+    samples = blocks * block_size
+
+    # Memory is measured separately, tracing slows everything down
+    step = create()
+    step(block_size)
+    tracemalloc.start()
+    try:
+        step(block_size)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    block_bytes = block_size * SIGNAL_INFO.channels * np.dtype(np.float32).itemsize
+    return Result(
+        name=name,
+        ns_per_sample=elapsed / samples * 1e9,
+        realtime_factor=samples / SIGNAL_INFO.sample_rate / elapsed,
+        peak_memory=peak,
+        peak_memory_blocks=peak / block_bytes,
+    )
+
+
+def compare(results: list[Result], baseline_file: Path, tolerance: float) -> int:
+    """
+    Print the cases slower than in the baseline, return 1 if there are any.
+    """
+    baseline = {
+        result["name"]: result
+        for result in json.loads(baseline_file.read_text())["results"]
+    }
+
+    regressions = 0
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+
+        change = result.ns_per_sample / previous["ns_per_sample"] - 1
+        if change > tolerance:
+            regressions += 1
+            print(f"Regression: {result.name} is {change:.0%} slower")
+        elif change < -tolerance:
+            print(f"Improvement: {result.name} is {-change:.0%} faster")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
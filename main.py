@@ -1,12 +1,13 @@
 from pathlib import Path
 import sys
-
-import numpy as np
-import pyaudio
+import time
 
 from pydalboard.modules.filter import FilterType
+from pydalboard.output import OutputEngine, PyAudioBackend
 from pydalboard.pipeline import Pipeline
-from pydalboard.signal import Wav
+from pydalboard.profiling import Profiler
+from pydalboard.render import render
+from pydalboard.signal import open_file
 from pydalboard.modules import (
     Delay,
     DelayParameters,
@@ -27,9 +28,9 @@ from pydalboard.signal.base import SignalInfo
 from pydalboard.signal.oscillators import Oscillator, Waveform
 
 # For testing purposes, the modules are instanciated
-# The sample rate of 44_100 is arbitrary
+# They adapt to the sample rate of the source when the pipeline is prepared
 distortion = Distortion(DistortionParameters(drive=12.0))
-delay = Delay(DelayParameters(delay=300, feedback=0.3), sample_rate=44_100)
+delay = Delay(DelayParameters(delay=300, feedback=0.3))
 filter = Filter(
     FilterParameters(
         cutoff=3000,
@@ -44,11 +45,16 @@ pitch = PitchShifting(
 )
 saturation = Saturation(SaturationParameters(drive=12.0))
 
+# Number of samples requested by the audio device at once
+BLOCK_SIZE = 512
+
 
 def main():
     match sys.argv[1:]:
         case ["-f", file_path]:
             play_file(file_path)
+        case ["-f", file_path, "-o", output_path]:
+            render_file(file_path, output_path)
         case ["-w", waveform_str]:
             try:
                 waveform = Waveform[waveform_str.upper()]
@@ -60,42 +66,22 @@ def main():
                 )
                 exit(1)
         case _:
-            print("Usage: main.py [-f <file_path> | -w <waveform_name>]")
+            print(
+                "Usage: main.py [-f <file_path> [-o <output_path>] | -w <waveform_name>]"
+            )
             sys.exit(1)
 
 
 def play_file(file_path):
     """
-    Play the audio file.
+    Play the audio file (WAV, or FLAC and OGG with soundfile).
     """
     try:
-        # Initialize PyAudio
-        p = pyaudio.PyAudio()
-
-        # Retrieve WAV data and information
-        wav_source = Wav(Path(file_path), loop=False)
-        infos = wav_source.signal_info
-
-        # Define sample format
-        match infos.sample_format:
-            case 16:
-                pa_format = pyaudio.paInt16
-            case 32:
-                pa_format = pyaudio.paInt32
-            case _:
-                raise ValueError("Unsupported sample format")
-
-        # Initialize audio player
-        player = p.open(
-            rate=infos.sample_rate,
-            channels=infos.channels,
-            output=True,
-            frames_per_buffer=1,
-            format=pa_format,
-        )
+        # Stream the file, decoded ahead of the playback
+        source = open_file(Path(file_path))
 
         # Create the pipeline
-        pipeline = Pipeline(wav_source)
+        pipeline = Pipeline(source)
         # pipeline.modules.append(pitch)
         # pipeline.modules.append(saturation)
         # pipeline.modules.append(overdrive)
@@ -104,12 +90,29 @@ def play_file(file_path):
         # pipeline.modules.append(delay)
 
         # Play the audio
-        while True:
-            try:
-                frame = pipeline.run()
-                player.write(frame.tobytes(), 1)
-            except KeyboardInterrupt:
-                break
+        play(pipeline)
+        source.close()
+    except Exception as e:
+        print(e)
+        sys.exit(2)
+
+
+def render_file(file_path, output_path):
+    """
+    Render the audio file through the pipeline into another file.
+    """
+    try:
+        # Rendering waits for the decoder instead of skipping samples
+        source = open_file(Path(file_path), realtime=False)
+        pipeline = Pipeline(source)
+        # pipeline.modules.append(delay)
+
+        def print_progress(rendered, total):
+            print(f"\rRendering... {rendered / total:.0%}", end="", flush=True)
+
+        stats = render(pipeline, Path(output_path), progress=print_progress)
+        source.close()
+        print(f"\nRendered {stats.frames} samples, {stats.realtime_factor:.1f}x real time")
     except Exception as e:
         print(e)
         sys.exit(2)
@@ -120,40 +123,56 @@ def play_waveform(waveform):
     Play the waveform.
     """
     try:
-        # Initialize PyAudio
-        p = pyaudio.PyAudio()
-
-        # Initialize audio player
-        player = p.open(
-            rate=44100,
-            channels=2,
-            output=True,
-            frames_per_buffer=1,
-            format=pyaudio.paInt32,
-        )
-
         # Create the pipeline
         pipeline = Pipeline(
             Oscillator(
                 waveform=waveform,
                 frequency=440,
                 phase=0.0,
-                signal_info=SignalInfo(44100, 32, True),
+                signal_info=SignalInfo(44100, 32, 2),
                 cycles=100,
             )
         )
 
         # Play the audio
-        while True:
-            try:
-                frame = pipeline.run()
-                player.write(frame.tobytes(), 1)
-            except KeyboardInterrupt:
-                break
+        play(pipeline)
     except Exception as e:
         print(e)
         sys.exit(2)
 
 
+def play(pipeline):
+    """
+    Play the pipeline on the default audio device, until interrupted.
+    """
+    pipeline.profiler = Profiler()
+    with OutputEngine(pipeline, PyAudioBackend(), buffer_size=BLOCK_SIZE) as engine:
+        while engine.error is None:
+            try:
+                time.sleep(0.1)
+            except KeyboardInterrupt:
+                break
+
+    if engine.error is not None:
+        raise engine.error
+
+    stats = engine.stats
+    print(
+        f"{stats.callbacks} buffers played, {stats.xruns} underruns, "
+        f"callback {stats.mean_callback_time * 1e6:.0f}us on average"
+    )
+
+    profile = pipeline.profiler.snapshot()
+    print(
+        f"{profile.missed_deadlines} blocks rendered late, "
+        f"worst block at {profile.max_load:.0%} of its duration"
+    )
+    for module in [profile.source, *profile.modules]:
+        print(
+            f"  {module.name:<16} {module.mean_block_time * 1e6:8.0f}us per block, "
+            f"{module.max_block_time * 1e6:8.0f}us max, {module.clipped} clipped"
+        )
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,176 @@
+from collections import Counter
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import contextlib
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+import os
+from pathlib import Path
+
+import numpy as np
+
+from pydalboard.modules.base import Module
+from pydalboard.pipeline import Pipeline
+from pydalboard.render import RenderStats, render
+from pydalboard.signal import Wav
+from pydalboard.signal.decoders import open_decoder
+
+
+@dataclass
+class BatchJob:
+    input_file: Path
+    "WAV file to render"
+
+    output_file: Path
+    "WAV file to write"
+
+    modules: list[Module] = field(default_factory=list)
+    "Modules of the pipeline, each job gets its own copy"
+
+
+@dataclass
+class BatchResult:
+    job: BatchJob
+    "Job which was rendered"
+
+    stats: RenderStats
+    "Timing of the render, in the worker"
+
+
+@dataclass
+class SharedInput:
+    """
+    Samples of an input file, decoded once to float32 into shared memory, so
+    that every worker can read them without them being pickled.
+    """
+
+    name: str
+    "Name of the shared memory block"
+
+    shape: tuple[int, int]
+    "Shape of the (frames, channels) float32 samples"
+
+    sample_rate: int
+    "Sample rate of the file, in Hz"
+
+    sample_format: int
+    "Sample format of the file, in bits, which the output keeps"
+
+    @classmethod
+    def load(cls, file: Path) -> tuple["SharedInput", SharedMemory]:
+        """
+        Decode the samples of the file into a new shared memory block.
+
+        The caller owns the returned block, and must unlink it once done.
+        """
+        decoder = open_decoder(file)
+        try:
+            signal_info = decoder.signal_info
+            if decoder.length is None:
+                raise ValueError(f"The length of {file} is unknown")
+
+            shape = (decoder.length, signal_info.channels)
+            memory = SharedMemory(create=True, size=max(1, shape[0] * shape[1] * 4))
+            try:
+                data = np.ndarray(shape, np.float32, buffer=memory.buf)
+                decoder.read(data)
+                del data
+            except BaseException:
+                _release(memory)
+                raise
+        finally:
+            decoder.close()
+
+        shared = cls(
+            memory.name, shape, signal_info.sample_rate, signal_info.sample_format
+        )
+        return (shared, memory)
+
+
+def render_batch(
+    jobs: Iterable[BatchJob],
+    workers: int | None = None,
+    progress: Callable[[int, int], None] | None = None,
+) -> list[BatchResult]:
+    """
+    Render the jobs on a pool of `workers` processes, one per core by default.
+
+    Each input file is read once into shared memory, as late as possible,
+    and released as soon as its last job is rendered. The results are in the
+    order of the jobs, whichever order they are rendered in. `progress` is
+    called after each job with the number of jobs rendered so far and the
+    total.
+    """
+    jobs = list(jobs)
+    workers = workers or os.cpu_count() or 1
+    results: list[BatchResult | None] = [None] * len(jobs)
+
+    # Jobs left for each input file, to release it after the last one
+    remaining = Counter(job.input_file for job in jobs)
+    inputs: dict[Path, tuple[SharedInput, SharedMemory]] = {}
+
+    with ProcessPoolExecutor(workers) as executor:
+        try:
+            queued = iter(enumerate(jobs))
+            pending = {}
+            done = 0
+            while True:
+                # A few jobs are queued ahead of the workers, so that they
+                # never wait, without loading every input file at once
+                while len(pending) < 2 * workers:
+                    index, job = next(queued, (None, None))
+                    if job is None:
+                        break
+                    if job.input_file not in inputs:
+                        inputs[job.input_file] = SharedInput.load(job.input_file)
+                    shared, _ = inputs[job.input_file]
+                    pending[executor.submit(_render_job, job, shared)] = index
+
+                if not pending:
+                    break
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = pending.pop(future)
+                    job = jobs[index]
+                    results[index] = BatchResult(job, future.result())
+
+                    remaining[job.input_file] -= 1
+                    if remaining[job.input_file] == 0:
+                        _release(inputs.pop(job.input_file)[1])
+
+                    done += 1
+                    if progress is not None:
+                        progress(done, len(jobs))
+        finally:
+            executor.shutdown(cancel_futures=True)
+            for _, memory in inputs.values():
+                _release(memory)
+
+    return results
+
+
+def _render_job(job: BatchJob, shared: SharedInput) -> RenderStats:
+    memory = SharedMemory(name=shared.name)
+    try:
+        return _render_shared(job, shared, memory.buf)
+    finally:
+        # On errors, the traceback still holds views of the block
+        with contextlib.suppress(BufferError):
+            memory.close()
+
+
+def _render_shared(job: BatchJob, shared: SharedInput, buffer: memoryview) -> RenderStats:
+    data = np.ndarray(shared.shape, np.float32, buffer=buffer)
+    source = Wav.from_array(
+        data, shared.sample_rate, loop=False, sample_format=shared.sample_format
+    )
+    pipeline = Pipeline(source)
+    pipeline.modules.extend(job.modules)
+
+    return render(pipeline, job.output_file)
+
+
+def _release(memory: SharedMemory) -> None:
+    memory.close()
+    memory.unlink()
@@ -0,0 +1,200 @@
+import numpy as np
+from scipy.signal import sosfilt
+
+from pydalboard.modules.base import Module
+from pydalboard.modules.drive.base import DriveModule
+from pydalboard.modules.filter import Filter
+from pydalboard.modules.gain import Gain
+from pydalboard.modules.smoothing import is_unity
+from pydalboard.signal import SignalInfo
+
+
+def compile_modules(modules: list[Module]) -> list[Module]:
+    """
+    Plan processing the same as the modules, in fewer passes over the block.
+
+    - Gains at 0 dB are dropped.
+    - Consecutive gains are multiplied together, and applied at once.
+    - Gains right before or after a drive module are folded into its drive
+      or its trim.
+    - Consecutive filters are run as a single cascade of sections.
+
+    Modules with nothing to fuse with are planned as they are, without the
+    cost of a step around them. Modules are never moved around each other,
+    so the output is the same. The steps of the plan use the state of the
+    modules, and must be prepared for their own buffers.
+    """
+    plan = []
+    gains = []
+
+    def flush_gains() -> None:
+        if len(gains) == 1:
+            plan.append(gains[0])
+        elif gains:
+            plan.append(_GainStep(list(gains)))
+        gains.clear()
+
+    for module in modules:
+        last = plan[-1] if plan and not gains else None
+        match module:
+            case _ if _is_dropped(module):
+                pass
+            case Gain() if isinstance(last, DriveModule):
+                plan[-1] = _DriveStep(last, [])
+                plan[-1].output_gains.gains.append(module)
+            case Gain() if isinstance(last, _DriveStep):
+                last.output_gains.gains.append(module)
+            case Gain():
+                gains.append(module)
+            case DriveModule():
+                plan.append(_DriveStep(module, list(gains)) if gains else module)
+                gains.clear()
+            case Filter() if isinstance(last, Filter):
+                plan[-1] = _FilterStep([last, module])
+            case Filter() if isinstance(last, _FilterStep):
+                last.filters.append(module)
+            case _:
+                flush_gains()
+                plan.append(module)
+    flush_gains()
+
+    return plan
+
+
+def dropped_modules(modules: list[Module]) -> list[Module]:
+    """
+    Modules left out of the plan by `compile_modules`, as they do not change
+    the signal.
+    """
+    return [module for module in modules if _is_dropped(module)]
+
+
+def _is_dropped(module: Module) -> bool:
+    return isinstance(module, Gain) and module.is_identity
+
+
+class _Gains:
+    """
+    Product of the linear gains of many `Gain` modules, smoothed as each of
+    them would be.
+    """
+
+    def __init__(self, gains: list[Gain]) -> None:
+        self.gains = gains
+        self._ramp = None
+
+    def prepare(self, max_block_size: int) -> None:
+        self._ramp = np.zeros((max_block_size, 1), dtype=np.float32)
+
+    def next(self, frames: int) -> float | np.ndarray:
+        product = 1.0
+        ramp = None
+        for gain in self.gains:
+            value = gain.next_gain(frames)
+            if np.ndim(value) == 0:
+                product *= value
+            elif ramp is None:
+                ramp = self._ramp[:frames]
+                ramp[:] = value
+            else:
+                ramp *= value
+
+        if ramp is None:
+            return product
+        if product != 1.0:
+            ramp *= product
+        return ramp
+
+
+class _GainStep(Module):
+    """
+    Consecutive gains, applied in a single pass.
+    """
+
+    def __init__(self, gains: list[Gain]) -> None:
+        self.gains = _Gains(gains)
+
+    def prepare(self, signal_info: SignalInfo, max_block_size: int) -> None:
+        self.gains.prepare(max_block_size)
+
+    def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        return self.process_block(input[np.newaxis].astype(np.float32), signal_info)[0]
+
+    def process_block(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        gain = self.gains.next(len(input))
+        if not is_unity(gain):
+            np.multiply(input, gain, out=input)
+
+        return input
+
+
+class _DriveStep(Module):
+    """
+    Drive module, with the gains around it folded into its drive and trim.
+    """
+
+    def __init__(self, module: DriveModule, input_gains: list[Gain]) -> None:
+        self.module = module
+        self.input_gains = _Gains(input_gains)
+        self.output_gains = _Gains([])
+
+    def prepare(self, signal_info: SignalInfo, max_block_size: int) -> None:
+        self.input_gains.prepare(max_block_size)
+        self.output_gains.prepare(max_block_size)
+
+    def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        return self.process_block(input[np.newaxis].astype(np.float32), signal_info)[0]
+
+    def process_block(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        frames = len(input)
+        return self.module.process_with_gains(
+            input, self.input_gains.next(frames), self.output_gains.next(frames)
+        )
+
+
+class _FilterStep(Module):
+    """
+    Consecutive filters, run as a single cascade of second-order sections
+    while none of them is smoothed.
+    """
+
+    def __init__(self, filters: list[Filter]) -> None:
+        self.filters = filters
+
+        # Cascade of the sections of every filter, and the keys it was built from
+        self.sos = None
+        self._keys = None
+
+        # State of the cascade, of which the state of each filter is a view
+        self.zi = None
+
+    def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        return self.process_block(input[np.newaxis].astype(np.float32), signal_info)[0]
+
+    def process_block(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        filters = self.filters
+        if not all(filter.settled for filter in filters):
+            for filter in filters:
+                input = filter.process_block(input, signal_info)
+            return input
+
+        keys = [filter._sections_key for filter in filters]
+        if keys != self._keys:
+            self.sos = np.concatenate([filter.sos for filter in filters])
+            self._keys = keys
+
+        # The state stays in the filters, so that they can run on their own
+        # again, once one of them moves. It is gathered into the state of the
+        # cascade only when a filter has replaced its own.
+        if self.zi is None or any(filter.zi.base is not self.zi for filter in filters):
+            self.zi = np.concatenate([filter.zi for filter in filters])
+            start = 0
+            for filter in filters:
+                end = start + len(filter.sos)
+                filter.zi = self.zi[start:end]
+                start = end
+
+        output, zi = sosfilt(self.sos, input, axis=0, zi=self.zi)
+        self.zi[:] = zi
+        input[:] = output
+        return input
@@ -0,0 +1,76 @@
+"""
+Plots of the internals of sources and modules, for debugging purposes.
+
+matplotlib is an optional dependency, only imported when a plot is drawn.
+"""
+
+from pathlib import Path
+
+import numpy as np
+from scipy.signal import sosfreqz
+
+from pydalboard.modules.filter import Filter
+from pydalboard.signal.oscillators import Oscillator
+
+
+def plot_wavetables(oscillator: Oscillator, output_file: Path | None = None) -> None:
+    """
+    Plot the band-limited tables of the oscillator, one per octave.
+
+    The plot is saved to `output_file` if given, and shown otherwise.
+    """
+    plt = _import_pyplot()
+
+    plt.figure(figsize=(10, 4))
+    for level, table in enumerate(oscillator._tables):
+        plt.plot(table[:-1], label=f"{oscillator.table_size >> (level + 1)} harmonics")
+    plt.title(f"{oscillator.waveform.name} Waveform")
+    plt.xlabel("Sample")
+    plt.ylabel("Amplitude")
+    plt.grid(True)
+    plt.legend(fontsize="small")
+
+    _save_or_show(plt, output_file)
+
+
+def plot_filter_response(
+    filter: Filter, sample_rate: int, output_file: Path | None = None
+) -> None:
+    """
+    Plot the magnitude response of the filter, at the given sample rate.
+
+    The plot is saved to `output_file` if given, and shown otherwise.
+    """
+    plt = _import_pyplot()
+
+    sos = filter.params.second_order_sections(sample_rate)
+    frequencies, response = sosfreqz(sos, worN=2048, fs=sample_rate)
+    with np.errstate(divide="ignore"):
+        magnitude = 20 * np.log10(np.abs(response))
+
+    plt.figure(figsize=(10, 4))
+    plt.semilogx(frequencies[1:], magnitude[1:])
+    plt.title(f"{filter.params.filter_type.name} Filter response")
+    plt.xlabel("Frequency (Hz)")
+    plt.ylabel("Magnitude (dB)")
+    plt.grid(True, which="both")
+
+    _save_or_show(plt, output_file)
+
+
+def _import_pyplot():
+    try:
+        import matplotlib.pyplot as plt
+    except ImportError as e:
+        raise ImportError("matplotlib is required to plot diagnostics") from e
+
+    return plt
+
+
+def _save_or_show(plt, output_file: Path | None) -> None:
+    if output_file is None:
+        plt.show()
+    else:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        plt.savefig(output_file)
+    plt.close()
@@ -0,0 +1,296 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from pydalboard.modules.base import Module
+from pydalboard.signal import SignalInfo, SignalSource
+
+
+class Node:
+    """
+    Output of a step of a graph: the source, a module, or a mix.
+
+    The output of a node can feed any number of nodes, which splits the
+    signal into parallel branches.
+    """
+
+    def __init__(
+        self,
+        module: Module | None = None,
+        inputs: list["Node"] | None = None,
+        gains: list[float] | None = None,
+    ) -> None:
+        self.module = module
+        "Module processing the input, for module nodes"
+
+        self.inputs = inputs or []
+        "Nodes feeding this one"
+
+        self.gains = gains
+        "Gain of each input, for mix nodes"
+
+
+@dataclass
+class _Step:
+    node: Node
+    "Node to process"
+
+    inputs: list[int]
+    "Buffer of each input"
+
+    output: int
+    "Buffer receiving the output, which may be the one of the first input"
+
+    scratch: np.ndarray | None = None
+    "Scratch buffer of mix nodes"
+
+
+class Graph:
+    """
+    Process a source through a graph of modules, with parallel branches,
+    sends and mixes.
+
+    The nodes are scheduled once, in levels of independent nodes, and their
+    outputs are held in a pool of preallocated buffers, reused as soon as
+    every node reading them has run. With `workers`, the independent nodes
+    of a level run on a thread pool, which speeds up the modules releasing
+    the GIL (such as numpy and scipy filters and FFTs).
+
+    A graph can be used in place of a `Pipeline`, to render or play it.
+    """
+
+    def __init__(self, source: SignalSource, workers: int = 1) -> None:
+        self.source = source
+        self.workers = workers
+
+        self.input = Node()
+        "Node of the source"
+
+        self._output: Node | None = None
+        self._nodes = [self.input]
+
+        # Schedule, as levels of steps, computed when the graph changes
+        self._levels: list[list[_Step]] | None = None
+        self._output_buffer = 0
+        self._buffers: list[np.ndarray] = []
+        self._max_block_size = 0
+        self._executor = None
+
+    @property
+    def output(self) -> Node | None:
+        """
+        Node whose output is the output of the graph.
+        """
+        return self._output
+
+    @output.setter
+    def output(self, node: Node) -> None:
+        self._check(node)
+        self._output = node
+        self._levels = None
+
+    def add(self, module: Module, input: Node) -> Node:
+        """
+        Add a node processing the output of `input` with the module.
+        """
+        self._check(input)
+        return self._add(Node(module=module, inputs=[input]))
+
+    def mix(self, *inputs: Node | tuple[Node, float]) -> Node:
+        """
+        Add a node summing the outputs of the inputs, each with its linear
+        gain (1.0 by default).
+
+        A mix of a single input with a gain is a send.
+        """
+        if not inputs:
+            raise ValueError("A mix needs at least one input")
+
+        nodes = []
+        gains = []
+        for input in inputs:
+            node, gain = input if isinstance(input, tuple) else (input, 1.0)
+            self._check(node)
+            nodes.append(node)
+            gains.append(gain)
+
+        return self._add(Node(inputs=nodes, gains=gains))
+
+    def _add(self, node: Node) -> Node:
+        self._nodes.append(node)
+        self._levels = None
+        return node
+
+    def _check(self, node: Node) -> None:
+        if node not in self._nodes:
+            raise ValueError("The node is not part of this graph")
+
+    def prepare(self, max_block_size: int) -> None:
+        """
+        Schedule the graph, allocate its buffers, and prepare every module
+        for the signal of the source, in blocks of at most `max_block_size`
+        samples.
+
+        `run_block` calls it before the first block, and again when the graph
+        changed or when larger blocks are requested.
+        """
+        signal_info = self.source.signal_info
+        if signal_info.sample_rate <= 0 or signal_info.channels <= 0:
+            raise ValueError(f"Invalid signal: {signal_info}")
+        if max_block_size <= 0:
+            raise ValueError("The block size must be positive")
+        if self._output is None:
+            raise ValueError("The output of the graph is not set")
+
+        self._levels, buffer_count = self._schedule()
+        self._buffers = [
+            np.zeros((max_block_size, signal_info.channels), dtype=np.float32)
+            for _ in range(buffer_count)
+        ]
+        for level in self._levels:
+            for step in level:
+                if step.node.module is not None:
+                    step.node.module.prepare(signal_info, max_block_size)
+                elif step.node.gains is not None:
+                    step.scratch = np.zeros_like(self._buffers[0])
+
+        self._max_block_size = max_block_size
+        if self.workers > 1 and self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers)
+
+    def close(self) -> None:
+        """
+        Stop the thread pool, if any.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _schedule(self) -> tuple[list[list[_Step]], int]:
+        """
+        Levels of steps, each only depending on the previous levels, and the
+        number of buffers they need.
+        """
+        # Only the nodes the output depends on are processed
+        needed = set()
+        pending = [self._output]
+        while pending:
+            node = pending.pop()
+            if id(node) not in needed:
+                needed.add(id(node))
+                pending.extend(node.inputs)
+        nodes = [node for node in self._nodes if id(node) in needed]
+
+        # Nodes are added after their inputs, so they are in topological order
+        depth = {}
+        levels = defaultdict(list)
+        for node in nodes:
+            depth[id(node)] = 1 + max(
+                (depth[id(input)] for input in node.inputs), default=-1
+            )
+            levels[depth[id(node)]].append(node)
+
+        uses = defaultdict(int)
+        for node in nodes:
+            for input in node.inputs:
+                uses[id(input)] += 1
+        # The output of the graph is read after the last level
+        uses[id(self._output)] += 1
+
+        buffer_of = {}
+        owner = {}
+        free = []
+        buffer_count = 0
+        schedule = []
+        for depth_level in range(len(levels)):
+            steps = []
+            for node in levels[depth_level]:
+                inputs = [buffer_of[id(input)] for input in node.inputs]
+
+                # A module or a mix which is the last reader of its first
+                # input writes over it, instead of using another buffer
+                first = node.inputs[0] if node.inputs else None
+                if (
+                    first is not None
+                    and uses[id(first)] == 1
+                    and owner[inputs[0]] is first
+                ):
+                    output = inputs[0]
+                elif free:
+                    output = free.pop()
+                else:
+                    output = buffer_count
+                    buffer_count += 1
+
+                buffer_of[id(node)] = output
+                owner[output] = node
+                steps.append(_Step(node, inputs, output))
+            schedule.append(steps)
+
+            # Buffers are released once the whole level has run, as its
+            # nodes may run at the same time
+            for node in levels[depth_level]:
+                for input in node.inputs:
+                    uses[id(input)] -= 1
+                    buffer = buffer_of[id(input)]
+                    if uses[id(input)] == 0 and owner[buffer] is input:
+                        free.append(buffer)
+
+        self._output_buffer = buffer_of[id(self._output)]
+        return (schedule, buffer_count)
+
+    def run_block(self, frames: int) -> np.ndarray:
+        """
+        Process the next `frames` samples of the source through the graph.
+
+        The result is a (frames, channels) float32 array, which belongs to the
+        caller until the next call.
+        """
+        if self._levels is None or frames > self._max_block_size:
+            self.prepare(max(frames, self._max_block_size))
+
+        signal_info = self.source.signal_info
+        for level in self._levels:
+            if self._executor is not None and len(level) > 1:
+                # Consume the results to raise the exceptions
+                list(
+                    self._executor.map(
+                        lambda step: self._run_step(step, frames, signal_info), level
+                    )
+                )
+            else:
+                for step in level:
+                    self._run_step(step, frames, signal_info)
+
+        return self._buffers[self._output_buffer][:frames]
+
+    def _run_step(self, step: _Step, frames: int, signal_info: SignalInfo) -> None:
+        node = step.node
+        output = self._buffers[step.output][:frames]
+
+        if node is self.input:
+            block, _ = self.source.get_block(frames)
+            output[:] = block
+            return
+
+        input = self._buffers[step.inputs[0]][:frames]
+        if node.module is not None:
+            if step.inputs[0] != step.output:
+                output[:] = input
+
+            result = node.module.process_block(output, signal_info)
+            if result is not output:
+                output[:] = result
+            return
+
+        # Mix of the inputs
+        np.multiply(input, node.gains[0], out=output)
+        scratch = step.scratch[:frames]
+        for buffer, gain in zip(step.inputs[1:], node.gains[1:]):
+            if gain == 1.0:
+                output += self._buffers[buffer][:frames]
+            else:
+                np.multiply(self._buffers[buffer][:frames], gain, out=scratch)
+                output += scratch
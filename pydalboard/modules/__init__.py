@@ -1,15 +1,19 @@
+from .convolution import Convolution, ConvolutionParameters
 from .delay import Delay, DelayParameters
 from .drive import *
 from .filter import Filter, FilterParameters
 from .gain import Gain, GainParameters
+from .oversampling import Oversampling
 from .pitch_shifting import PitchShifting, PitchShiftingParameters
 
 __all__ = [
+    "Convolution", "ConvolutionParameters",
     "Delay", "DelayParameters",
     "Distortion", "DistortionParameters",
     "Filter", "FilterParameters",
     "Gain", "GainParameters",
     "Overdrive", "OverdriveParameters",
+    "Oversampling",
     "PitchShifting", "PitchShiftingParameters",
     "Saturation", "SaturationParameters",
 ]
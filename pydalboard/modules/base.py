@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from dataclasses import replace
 
 import numpy as np
 
@@ -11,5 +12,41 @@ class Module(ABC):
     to process Signal objects into many interesting effects.
     """
 
+    def prepare(self, signal_info: SignalInfo, max_block_size: int) -> None:
+        """
+        Get ready to process blocks of at most `max_block_size` samples of the
+        given signal.
+
+        Called by the pipeline before the first block, and again when the
+        signal or the block size changes. Modules compute their coefficients
+        and allocate their buffers here rather than while processing, and
+        raise a ValueError if they cannot process the signal.
+        """
+
+    def update(self, **values) -> None:
+        """
+        Change parameters of the module, from any thread.
+
+        The parameters are replaced at once by a copy with the new values,
+        validated like the original ones. A block is processed with either
+        the previous or the new parameters, never a mix of both, and modules
+        smooth the change over the following blocks.
+        """
+        self.params = replace(self.params, **values)
+
     @abstractmethod
     def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray: ...
+
+    def process_block(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        """
+        Process a (frames, channels) float32 block of samples.
+
+        Modules may process the block in place and return it. This default
+        implementation calls `process` once per sample, so that modules can be
+        moved to block processing one at a time.
+        """
+        output = np.empty_like(input)
+        for i, frame in enumerate(input):
+            output[i] = self.process(frame, signal_info)
+
+        return output
@@ -0,0 +1,212 @@
+from dataclasses import dataclass
+from math import gcd
+from pathlib import Path
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from pydalboard.signal import SignalInfo, Wav
+from pydalboard.modules.base import Module
+from pydalboard.modules.smoothing import Smoother, is_unity
+
+
+@dataclass
+class ConvolutionParameters:
+    mix: float = 1.0
+    "Proportion of the convolved signal, from 0.0 (dry) to 1.0 (wet)"
+
+    gain: float = 0.0
+    "Gain of the convolved signal, in dB"
+
+    def __post_init__(self):
+        self.mix = max(0.0, min(self.mix, 1.0))
+
+
+class Convolution(Module):
+    """
+    Convolve the signal with an impulse response, such as a reverb or a
+    speaker cabinet.
+
+    The convolution is uniformly partitioned, with overlap-save: the impulse
+    response is cut into partitions of `partition_size` samples, whose
+    spectra are computed once, and each partition of input is transformed
+    once and kept in a delay line of spectra. Each partition then costs two
+    FFTs of twice its size, and a product of spectra per partition of the
+    impulse response, whatever its length. Blocks of any size are gathered
+    into partitions, and the output is delayed by one partition (see
+    `latency`), the dry signal included.
+
+    The impulse response has one channel, applied to every channel of the
+    signal, or one per channel. All the channels are transformed together.
+    """
+
+    def __init__(
+        self,
+        params: ConvolutionParameters,
+        impulse_response: np.ndarray,
+        sample_rate: int,
+        partition_size: int = 512,
+    ):
+        if partition_size <= 0:
+            raise ValueError("The partition size must be positive")
+
+        self.params = params
+        self.partition_size = partition_size
+
+        # Mono impulse responses are a single column
+        if impulse_response.ndim == 1:
+            impulse_response = impulse_response[:, np.newaxis]
+        self.impulse_response = impulse_response.astype(np.float32)
+        self.ir_sample_rate = sample_rate
+
+        # Changes of the mix are smoothed
+        self._mix = Smoother(params.mix)
+
+        # Partitions and buffers, computed once the signal is known
+        self._signal_info = None
+
+    @classmethod
+    def from_file(
+        cls,
+        file: Path,
+        params: ConvolutionParameters | None = None,
+        partition_size: int = 512,
+    ) -> "Convolution":
+        """
+        Convolution with the impulse response of a WAV file.
+        """
+        wav = Wav(file, loop=False)
+        impulse_response, signal_info = wav.get_block(wav.length)
+        return cls(
+            params or ConvolutionParameters(),
+            impulse_response,
+            signal_info.sample_rate,
+            partition_size,
+        )
+
+    @property
+    def latency(self) -> int:
+        """
+        Delay introduced by the module, in samples.
+        """
+        return self.partition_size
+
+    def prepare(self, signal_info: SignalInfo, max_block_size: int) -> None:
+        channels = signal_info.channels
+        if self.impulse_response.shape[1] not in (1, channels):
+            raise ValueError(
+                f"Impulse response with {self.impulse_response.shape[1]} channels "
+                f"for a signal with {channels} channels"
+            )
+
+        # The mix is smoothed over partitions rather than blocks
+        self._mix.prepare(signal_info.sample_rate, self.partition_size)
+        if self._signal_info == signal_info:
+            return
+
+        self._signal_info = signal_info
+        size = self.partition_size
+
+        impulse_response = self.impulse_response
+        if self.ir_sample_rate != signal_info.sample_rate:
+            divisor = gcd(self.ir_sample_rate, signal_info.sample_rate)
+            impulse_response = resample_poly(
+                impulse_response,
+                signal_info.sample_rate // divisor,
+                self.ir_sample_rate // divisor,
+                axis=0,
+            ).astype(np.float32)
+
+        # Spectra of the partitions, each padded to twice the block size, in
+        # reverse order (see `_convolve`)
+        partitions = max(1, -(-len(impulse_response) // size))
+        padded = np.zeros((partitions * size, impulse_response.shape[1]), np.float32)
+        padded[: len(impulse_response)] = impulse_response
+        padded = padded.reshape(partitions, size, -1)
+        self._spectra = np.fft.rfft(padded, n=2 * size, axis=1)[::-1].copy()
+
+        # Delay line of the spectra of the last input blocks, as a ring buffer
+        self._delay_line = np.zeros(
+            (partitions, size + 1, channels), dtype=np.complex64
+        )
+        self._head = 0
+        self._products = np.zeros_like(self._delay_line)
+        self._sum = np.zeros((size + 1, channels), dtype=np.complex64)
+
+        # Previous and current input blocks, the convolution of the current
+        # block, and the output of the previous one
+        self._input = np.zeros((2 * size, channels), dtype=np.float32)
+        self._convolved = np.zeros((2 * size, channels), dtype=np.float32)
+        self._output = np.zeros((size, channels), dtype=np.float32)
+        self._position = 0
+
+    def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        # The frame is copied, as blocks are processed in place
+        frame = input[np.newaxis].astype(np.float32)
+        return self.process_block(frame, signal_info)[0]
+
+    def process_block(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        if self._signal_info is None:
+            self.prepare(signal_info, len(input))
+
+        # Blocks shorter than a partition are gathered until one is full, and
+        # the output of the previous partition is returned meanwhile
+        size = self.partition_size
+        start = 0
+        while start < len(input):
+            count = min(len(input) - start, size - self._position)
+            end = start + count
+            position = self._position
+
+            self._input[size + position : size + position + count] = input[start:end]
+            input[start:end] = self._output[position : position + count]
+
+            self._position += count
+            if self._position == size:
+                self._convolve()
+                self._position = 0
+            start = end
+
+        return input
+
+    def _convolve(self) -> None:
+        """
+        Convolve the full input block, and mix it into the output of the next
+        partition.
+        """
+        size = self.partition_size
+        partitions = len(self._delay_line)
+
+        # Overlap-save: the transform covers the previous and the current
+        # block, only the second half of its convolution is kept
+        head = self._head
+        np.fft.rfft(self._input, axis=0, out=self._delay_line[head])
+
+        # Partition p is multiplied by the spectrum of the input p blocks
+        # ago. The spectra of the partitions are reversed, so that both halves
+        # of the ring buffer meet them as contiguous slices.
+        offset = partitions - 1 - head
+        np.multiply(
+            self._delay_line[: head + 1],
+            self._spectra[offset:],
+            out=self._products[: head + 1],
+        )
+        np.multiply(
+            self._delay_line[head + 1 :],
+            self._spectra[:offset],
+            out=self._products[head + 1 :],
+        )
+        np.sum(self._products, axis=0, out=self._sum)
+        np.fft.irfft(self._sum, n=2 * size, axis=0, out=self._convolved)
+        self._head = (head + 1) % partitions
+
+        # The dry signal is delayed as much as the convolved one
+        params = self.params
+        mix = self._mix.next(params.mix, size)
+        wet = 10 ** (params.gain / 20.0)
+        output = self._output
+        np.multiply(self._convolved[size:], wet * mix, out=output)
+        if not is_unity(mix):
+            output += self._input[size:] * (1.0 - mix)
+
+        self._input[:size] = self._input[size:]
@@ -1,16 +1,17 @@
 from dataclasses import dataclass
-from collections import deque
 
 import numpy as np
 
 from pydalboard.signal import SignalInfo
+from pydalboard.modules import kernels
 from pydalboard.modules.base import Module
+from pydalboard.modules.smoothing import Smoother
 
 
 @dataclass
 class DelayParameters:
-    delay: int
-    "Delay time in ms"
+    delay: float
+    "Delay time in ms, can be changed while the module is running"
 
     feedback: float
     "Amount of the delayed signal injected again in the process"
@@ -25,27 +26,158 @@ class DelayParameters:
 
 
 class Delay(Module):
-    def __init__(self, params: DelayParameters, sample_rate: int):
+    def __init__(self, params: DelayParameters, max_delay: float = 2000.0):
         self.params = params
-        self.sample_rate = sample_rate
-        self.memory = deque(maxlen=self.ms_to_samples(params.delay))
-        self.params.delay
+        self.max_delay = max(max_delay, params.delay)
 
-    def ms_to_samples(self, delay: int) -> int:
+        # Changes of the feedback are smoothed
+        self._feedback = Smoother(params.feedback)
+
+        # Circular buffer of the past output samples
+        # Allocated once the sample rate and the number of channels are known
+        self.sample_rate = None
+        self.memory = None
+        self.write_index = 0
+
+        # Delay and feedback of each sample of a block, for the compiled kernel
+        self._delays = np.zeros(0)
+        self._feedbacks = np.zeros(0, dtype=np.float32)
+
+    def prepare(self, signal_info: SignalInfo, max_block_size: int) -> None:
+        self._feedback.prepare(signal_info.sample_rate, max_block_size)
+        if len(self._delays) < max_block_size:
+            self._delays = np.zeros(max_block_size)
+            self._feedbacks = np.zeros(max_block_size, dtype=np.float32)
+        kernels.warm_up()
+
+        if self.sample_rate == signal_info.sample_rate and (
+            self.memory is not None and self.memory.shape[1] == signal_info.channels
+        ):
+            return
+
+        self.sample_rate = signal_info.sample_rate
+
+        # The buffer must hold one more sample than the longest delay,
+        # to interpolate between the two samples around a fractional delay
+        self.max_delay_samples = self.ms_to_samples(self.max_delay)
+        self.buffer_size = int(np.ceil(self.max_delay_samples)) + 1
+        self.memory = np.zeros((self.buffer_size, signal_info.channels), dtype=np.float32)
+        self.write_index = 0
+
+        # Delay (in samples) reached at the end of the previous block
+        # Changes of the delay time are ramped over one block from there
+        self.current_delay = self.delay_samples()
+
+    def ms_to_samples(self, delay: float) -> float:
+        """
+        Convert the given delay in ms to a (fractional) number of samples.
+        """
+        return max(1.0, self.sample_rate * (delay / 1000))
+
+    def delay_samples(self) -> float:
         """
-        Convert the given delay in ms to a number of samples.
+        Current delay time from the parameters, in samples.
         """
-        return max(1, int(self.sample_rate * (delay / 1000)))
+        return min(self.ms_to_samples(self.params.delay), self.max_delay_samples)
 
     def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
-        output = input
+        return self.process_block(input[np.newaxis], signal_info)[0]
+
+    def process_block(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        frames = len(input)
+        if self.memory is None:
+            self.prepare(signal_info, frames)
+
+        # Changes of the delay time are ramped over the block
+        feedback = self._feedback.next(self.params.feedback, frames)
+        target_delay = self.delay_samples()
+        if target_delay == self.current_delay:
+            delays = None
+        else:
+            delays = self.current_delay + (target_delay - self.current_delay) * (
+                np.arange(1, frames + 1) / frames
+            )
+
+        # The output feeds back into the buffer, so a block can only be
+        # processed at once when its samples do not depend on each other.
+        # Delays shorter than the block are processed in smaller chunks.
+        shortest_delay = min(self.current_delay, target_delay)
+        chunk_size = max(1, int(shortest_delay) - 1)
 
-        if len(self.memory) > 0:
-            delayed_sample = self.memory[0]  # Oldest sample in the deque
-            output += delayed_sample * self.params.feedback
+        output = np.empty_like(input)
+        if kernels.JIT_ENABLED and chunk_size < frames:
+            self._process_samples(input, output, delays, feedback)
+            self.current_delay = target_delay
+            return output
 
-        # Add the sample to the end of the deque (right)
-        # Once the memory is full, the oldest sample (left) will be removed
-        self.memory.append(output)
+        start = 0
+        while start < frames:
+            end = min(frames, start + chunk_size)
+            chunk = output[start:end]
+
+            if delays is None:
+                self._read(self.current_delay, chunk)
+            else:
+                self._read(delays[start:end], chunk)
+
+            chunk *= feedback if np.ndim(feedback) == 0 else feedback[start:end]
+            chunk += input[start:end]
+            self._write(chunk)
+            start = end
+
+        self.current_delay = target_delay
 
         return output
+
+    def _process_samples(
+        self,
+        input: np.ndarray,
+        output: np.ndarray,
+        delays: np.ndarray | None,
+        feedback: float | np.ndarray,
+    ) -> None:
+        """
+        Process the block one sample at a time with the compiled kernel,
+        rather than in chunks shorter than the delay.
+        """
+        frames = len(input)
+        if len(self._delays) < frames:
+            self._delays = np.zeros(frames)
+            self._feedbacks = np.zeros(frames, dtype=np.float32)
+        sample_delays = self._delays[:frames]
+        feedbacks = self._feedbacks[:frames]
+        sample_delays[:] = self.current_delay if delays is None else delays
+        feedbacks[:] = feedback if np.ndim(feedback) == 0 else feedback[:, 0]
+
+        self.write_index = kernels.feedback_delay(
+            input, output, self.memory, self.write_index, sample_delays, feedbacks
+        )
+
+    def _read(self, delay: float | np.ndarray, out: np.ndarray) -> None:
+        """
+        Read the samples `delay` samples behind the upcoming writes into `out`.
+        """
+        count = len(out)
+        if np.ndim(delay) == 0 and float(delay).is_integer():
+            # Constant, whole number of samples: plain slices of the buffer
+            start = (self.write_index - int(delay)) % self.buffer_size
+            first = min(count, self.buffer_size - start)
+            out[:first] = self.memory[start : start + first]
+            out[first:] = self.memory[: count - first]
+            return
+
+        # Fractional or varying delay: linear interpolation between two samples
+        position = self.write_index + np.arange(count) - delay
+        index = np.floor(position)
+        fraction = (position - index).astype(np.float32)[:, np.newaxis]
+        index = index.astype(np.intp) % self.buffer_size
+
+        np.multiply(self.memory[index], 1.0 - fraction, out=out)
+        out += self.memory[(index + 1) % self.buffer_size] * fraction
+
+    def _write(self, samples: np.ndarray) -> None:
+        count = len(samples)
+        first = min(count, self.buffer_size - self.write_index)
+        self.memory[self.write_index : self.write_index + first] = samples[:first]
+        self.memory[: count - first] = samples[first:]
+        self.write_index = (self.write_index + count) % self.buffer_size
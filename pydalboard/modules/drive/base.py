@@ -0,0 +1,99 @@
+from abc import abstractmethod
+
+import numpy as np
+
+from pydalboard.signal import SignalInfo
+from pydalboard.modules.base import Module
+from pydalboard.modules.gain import Gain, GainParameters
+from pydalboard.modules.smoothing import is_unity
+
+
+class DriveModule(Module):
+    """
+    Drive stage: an input gain (the drive), a waveshaper, and an output trim.
+
+    The parameters must have a `drive` and a `trim`, both in dB. The stages
+    are fused by each module into as few passes as possible over the block,
+    which is processed in place, without temporary arrays.
+    """
+
+    def __init__(self, params):
+        self.params = params
+        self.gain = Gain(GainParameters(gain=self.params.drive, min=-36.0, max=36.0))
+        self.trim = Gain(GainParameters(gain=self.params.trim))
+
+    def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        # The frame is copied, as blocks are processed in place
+        frame = input[np.newaxis].astype(np.float32)
+        return self.process_block(frame, signal_info)[0]
+
+    def prepare(self, signal_info: SignalInfo, max_block_size: int) -> None:
+        self.gain.prepare(signal_info, max_block_size)
+        self.trim.prepare(signal_info, max_block_size)
+
+    def process_block(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        return self.process_with_gains(input, 1.0, 1.0)
+
+    def process_with_gains(
+        self,
+        input: np.ndarray,
+        input_gain: float | np.ndarray,
+        output_gain: float | np.ndarray,
+    ) -> np.ndarray:
+        """
+        Process the block in place, with linear gains applied before and after
+        the module, in the same passes as the drive and the trim.
+
+        `Pipeline.compile` folds the gains around the module into them.
+        """
+        # The parameters may be replaced by another thread at any time
+        params = self.params
+
+        # The linear gains are only computed again when the parameters change,
+        # and are smoothed over the following blocks
+        frames = len(input)
+        self.gain.params.gain = params.drive
+        self.trim.params.gain = params.trim
+        gain = self.gain.next_gain(frames)
+        trim = self.trim.next_gain(frames)
+        if not is_unity(input_gain):
+            gain = gain * input_gain
+        if not is_unity(output_gain):
+            trim = trim * output_gain
+        self.shape(input, params, gain, trim)
+
+        return input
+
+    @abstractmethod
+    def shape(
+        self,
+        block: np.ndarray,
+        params,
+        gain: float | np.ndarray,
+        trim: float | np.ndarray,
+    ) -> None:
+        """
+        Apply the linear `gain`, the waveshaper and the linear `trim` to the
+        block, in place.
+
+        The gains are floats, or (frames, 1) arrays while they are smoothed.
+        """
+        ...
+
+
+def clip(
+    block: np.ndarray,
+    low: float,
+    high: float,
+    gain: float | np.ndarray,
+    trim: float | np.ndarray,
+) -> None:
+    """
+    Apply the gain, clip between `low` and `high`, and apply the trim, in place.
+
+    The gain is moved after the clipping, by scaling the thresholds, so that
+    both gains are applied at once.
+    """
+    np.clip(block, low / gain, high / gain, out=block)
+    if not is_unity(gain * trim):
+        np.multiply(block, gain * trim, out=block)
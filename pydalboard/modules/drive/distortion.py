@@ -2,9 +2,7 @@ from dataclasses import dataclass
 
 import numpy as np
 
-from pydalboard.signal import SignalInfo
-from pydalboard.modules.base import Module
-from pydalboard.modules.gain import Gain, GainParameters
+from pydalboard.modules.drive.base import DriveModule, clip
 
 @dataclass
 class DistortionParameters():
@@ -12,20 +10,21 @@ class DistortionParameters():
     "Amount of drive to add to the signal (can be negative to reduce incoming signal)"
 
 
+    trim: float = 0.0
+    "Gain applied after the distortion, in dB"
+
+
     def __post_init__(self):
         self.drive = min(max(-36.0, self.drive), 36.0)
 
 
-class Distortion(Module):
-    def __init__(self, params: DistortionParameters):
-        self.params = params
-        self.gain = Gain(GainParameters(gain=self.params.drive, min=-36.0, max=36.0))
-
-    def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
-        # Apply gain before saturation
-        output = self.gain.process(input, signal_info)
-        
+class Distortion(DriveModule):
+    def shape(
+        self,
+        block: np.ndarray,
+        params: DistortionParameters,
+        gain: float | np.ndarray,
+        trim: float | np.ndarray,
+    ) -> None:
         # Apply distortion (severe clipping)
-        output = np.clip(output, -1.0, 1.0)
-
-        return output
+        clip(block, -1.0, 1.0, gain, trim)
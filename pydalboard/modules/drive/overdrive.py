@@ -2,9 +2,7 @@ from dataclasses import dataclass
 
 import numpy as np
 
-from pydalboard.signal import SignalInfo
-from pydalboard.modules.base import Module
-from pydalboard.modules.gain import Gain, GainParameters
+from pydalboard.modules.drive.base import DriveModule, clip
 
 @dataclass
 class OverdriveParameters():
@@ -18,28 +16,28 @@ class OverdriveParameters():
 
     asymmetry: float = 0.5
     "0.0 for symmetrical, 1.0 for extreme asymmetry"
+
+
+    trim: float = 0.0
+    "Gain applied after the overdrive, in dB"
     
 
     def __post_init__(self):
         self.drive = min(max(-36.0, self.drive), 36.0)
         self.threshold = min(1.0, self.threshold)
-        self.asymmetry = np.clip(self.asymmetry, 0.0, 1.0)
-
+        self.asymmetry = float(min(max(0.0, self.asymmetry), 1.0))
 
-class Overdrive(Module):
-    def __init__(self, params: OverdriveParameters):
-        self.params = params
-        self.gain = Gain(GainParameters(gain=self.params.drive, min=-36.0, max=36.0))
 
-    def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
-        # Apply gain before saturation
-        output = self.gain.process(input, signal_info)
-        
+class Overdrive(DriveModule):
+    def shape(
+        self,
+        block: np.ndarray,
+        params: OverdriveParameters,
+        gain: float | np.ndarray,
+        trim: float | np.ndarray,
+    ) -> None:
         # Apply asymmetrical clipping
-        positive_clip = self.params.threshold
-        negative_clip = -self.params.threshold * (1 - self.params.asymmetry)
-        
-        output = np.where(output > positive_clip, positive_clip, output)
-        output = np.where(output < negative_clip, negative_clip, output)
+        positive_clip = params.threshold
+        negative_clip = -params.threshold * (1 - params.asymmetry)
 
-        return output
+        clip(block, negative_clip, positive_clip, gain, trim)
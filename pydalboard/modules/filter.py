@@ -1,12 +1,19 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
 import numpy as np
+from scipy.signal import sosfilt
 
 from pydalboard.signal import SignalInfo
+from pydalboard.modules import kernels
 from pydalboard.modules.base import Module
+from pydalboard.modules.smoothing import Smoother
 
 from enum import Enum
 
+# Number of samples processed with the same coefficients while the cutoff or
+# the resonance is smoothed
+SUB_BLOCK_SIZE = 32
+
 
 class FilterType(Enum):
     LOW_PASS = 1
@@ -28,93 +35,186 @@ class FilterParameters:
     slope: int
     "Slope in dB/octave: 12 or 24Slope in dB/octave: 12 or 24"
 
-    def __post_init__(self):
-        self.b0, self.b1, self.b2, self.a1, self.a2 = (
-            self.calculate_biquad_coefficients()
+    def calculate_biquad_coefficients(self, sample_rate: int) -> tuple:
+        """
+        Digital Biquad filter (2nd order filter), at the given sample rate
+        """
+        # Computed by the same function as the compiled filter kernel
+        return kernels.biquad_coefficients(
+            self.filter_type.value,
+            float(self.cutoff),
+            float(self.resonance),
+            float(sample_rate),
         )
 
-    def calculate_biquad_coefficients(self) -> tuple:
+    def second_order_sections(self, sample_rate: int) -> np.ndarray:
         """
-        Digital Biquad filter (2nd order filter)
+        Second-order sections of the filter, as expected by `scipy.signal.sosfilt`.
+
+        A 24dB/octave slope cascades two identical biquads.
         """
-        Q = max(1.0, self.resonance)
-        omega = 2 * np.pi * self.cutoff / 44100  # TODO: get sample rate for audio
-        alpha = np.sin(omega) / (2 * Q)
-        cos_omega = np.cos(omega)
-
-        match self.filter_type:
-            case FilterType.LOW_PASS:
-                b0 = (1 - cos_omega) / 2
-                b1 = 1 - cos_omega
-                b2 = (1 - cos_omega) / 2
-                a0 = 1 + alpha
-                a1 = -2 * cos_omega
-                a2 = 1 - alpha
-            case FilterType.HIGH_PASS:
-                b0 = (1 + cos_omega) / 2
-                b1 = -(1 + cos_omega)
-                b2 = (1 + cos_omega) / 2
-                a0 = 1 + alpha
-                a1 = -2 * cos_omega
-                a2 = 1 - alpha
-            case FilterType.BAND_PASS:
-                b0 = alpha
-                b1 = 0
-                b2 = -alpha
-                a0 = 1 + alpha
-                a1 = -2 * cos_omega
-                a2 = 1 - alpha
-
-        # Normalize coefficients
-        b0 /= a0
-        b1 /= a0
-        b2 /= a0
-        a1 /= a0
-        a2 /= a0
-
-        return b0, b1, b2, a1, a2
+        b0, b1, b2, a1, a2 = self.calculate_biquad_coefficients(sample_rate)
+        section = [b0, b1, b2, 1.0, a1, a2]
+        return np.array([section] * (2 if self.slope == 24 else 1), dtype=np.float64)
 
 
 class Filter(Module):
     def __init__(self, params: FilterParameters):
         self.params = params
 
-        self.prev_inputs = [
-            np.zeros(2, "float32"),
-            np.zeros(2, "float32"),
-        ]  # [x1[n-1], x1[n-2]], [x2[n-1], x2[n-2]]
-        self.prev_outputs = [
-            np.zeros(2, "float32"),
-            np.zeros(2, "float32"),
-        ]  # [y1[n-1], y1[n-2]], [y2[n-1], y2[n-2]]
+        # Each biquad of the cascade is a second-order section
+        # Computed once the sample rate is known
+        self.sos = None
+        self.sample_rate = None
+        self._sections_key = None
+
+        # Changes of the cutoff and the resonance are smoothed
+        self._cutoff = Smoother(params.cutoff)
+        self._resonance = Smoother(params.resonance)
+
+        # Per-section, per-channel filter state carried between blocks
+        self.zi = None
+
+        # Smoothed parameters of a block, for the compiled kernel
+        self._cutoffs = np.zeros(0)
+        self._resonances = np.zeros(0)
+
+    def prepare(self, signal_info: SignalInfo, max_block_size: int) -> None:
+        params = self.params
+        if params.cutoff >= signal_info.sample_rate / 2:
+            raise ValueError(
+                f"Cutoff of {params.cutoff} Hz is above the Nyquist frequency "
+                f"at {signal_info.sample_rate} Hz"
+            )
+
+        self._cutoff.prepare(signal_info.sample_rate, max_block_size)
+        self._resonance.prepare(signal_info.sample_rate, max_block_size)
+        if self.sample_rate != signal_info.sample_rate:
+            self.sample_rate = signal_info.sample_rate
+            self._cutoff.reset(params.cutoff)
+            self._resonance.reset(params.resonance)
+            self._update_sections(params, params.cutoff, params.resonance)
+        if self.zi is None or self.zi.shape != (len(self.sos), 2, signal_info.channels):
+            self.zi = np.zeros((len(self.sos), 2, signal_info.channels))
+        if len(self._cutoffs) < max_block_size:
+            self._cutoffs = np.zeros(max_block_size)
+            self._resonances = np.zeros(max_block_size)
+        kernels.warm_up()
+
+    @property
+    def settled(self) -> bool:
+        """
+        Whether the sections match the parameters, which are not smoothed.
 
-    def apply_biquad_filter(self, sample: np.ndarray) -> np.ndarray:
+        A settled filter is a fixed cascade of `sos`, with the state `zi`.
         """
-        Apply Biquad filter to the given sample.
+        params = self.params
+        return (
+            self.zi is not None
+            and self._cutoff.current == params.cutoff
+            and self._resonance.current == params.resonance
+            and self._sections_key
+            == (params.filter_type, params.slope, params.cutoff, params.resonance)
+        )
+
+    def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        return self.process_block(input[np.newaxis], signal_info)[0]
+
+    def process_block(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        if self.zi is None:
+            self.prepare(signal_info, len(input))
+
+        # The parameters may be replaced by another thread at any time
+        params = self.params
+        frames = len(input)
+        cutoff = self._cutoff.next(params.cutoff, frames)
+        resonance = self._resonance.next(params.resonance, frames)
+
+        if np.ndim(cutoff) == 0 and np.ndim(resonance) == 0:
+            # The sections are only computed again when the parameters change
+            if self._sections_key != (params.filter_type, params.slope, cutoff, resonance):
+                self._update_sections(params, cutoff, resonance)
+
+            output, self.zi = sosfilt(self.sos, input, axis=0, zi=self.zi)
+            return output.astype(np.float32, copy=False)
+
+        # While the parameters move, the sections are computed again for each
+        # sub-block, from the values reached at its end
+        output = np.empty_like(input)
+        if kernels.JIT_ENABLED:
+            self._process_modulated(input, output, params, cutoff, resonance)
+            return output
+
+        for start in range(0, frames, SUB_BLOCK_SIZE):
+            end = min(frames, start + SUB_BLOCK_SIZE)
+            self._update_sections(
+                params, _value_at(cutoff, end - 1), _value_at(resonance, end - 1)
+            )
+            output[start:end], self.zi = sosfilt(
+                self.sos, input[start:end], axis=0, zi=self.zi
+            )
+
+        return output
+
+    def _process_modulated(
+        self,
+        input: np.ndarray,
+        output: np.ndarray,
+        params: FilterParameters,
+        cutoff: float | np.ndarray,
+        resonance: float | np.ndarray,
+    ) -> None:
+        """
+        Filter the block with the compiled kernel, which computes the sections
+        of each sub-block itself.
         """
-        filtered_sample = (
-            self.params.b0 * sample
-            + self.params.b1 * self.prev_inputs[-1]
-            + self.params.b2 * self.prev_inputs[-2]
-            - self.params.a1 * self.prev_outputs[-1]
-            - self.params.a2 * self.prev_outputs[-2]
+        frames = len(input)
+        if len(self._cutoffs) < frames:
+            self._cutoffs = np.zeros(frames)
+            self._resonances = np.zeros(frames)
+        cutoffs = self._cutoffs[:frames]
+        resonances = self._resonances[:frames]
+        cutoffs[:] = cutoff if np.ndim(cutoff) == 0 else cutoff[:, 0]
+        resonances[:] = resonance if np.ndim(resonance) == 0 else resonance[:, 0]
+
+        sections = 2 if params.slope == 24 else 1
+        if len(self.zi) != sections:
+            self.zi = np.zeros((sections, 2, self.zi.shape[2]))
+
+        kernels.modulated_biquads(
+            input,
+            output,
+            cutoffs,
+            resonances,
+            params.filter_type.value,
+            sections,
+            float(self.sample_rate),
+            self.zi,
+            SUB_BLOCK_SIZE,
         )
-        return filtered_sample
 
-    def update_memory(self, input: np.ndarray, output: np.ndarray) -> None:
-        self.prev_inputs.pop(0)
-        self.prev_inputs.append(input)
-        self.prev_outputs.pop(0)
-        self.prev_outputs.append(output)
+        # The sections of the last sub-block are kept for the next blocks
+        self._update_sections(params, cutoffs[-1], resonances[-1])
+
+    def _update_sections(
+        self, params: FilterParameters, cutoff: float, resonance: float
+    ) -> None:
+        # The cutoff may be automated above the Nyquist frequency
+        sections = replace(
+            params,
+            cutoff=min(cutoff, 0.49 * self.sample_rate),
+            resonance=resonance,
+        )
+        self.sos = sections.second_order_sections(self.sample_rate)
+        self._sections_key = (params.filter_type, params.slope, cutoff, resonance)
 
-    def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
-        # Apply filters based on the slope
-        filtered = self.apply_biquad_filter(input)
-        self.update_memory(input, filtered)
+        # A change of slope changes the number of sections
+        if self.zi is not None and len(self.zi) != len(self.sos):
+            self.zi = np.zeros((len(self.sos), 2, self.zi.shape[2]))
 
-        if self.params.slope == 24:
-            # Apply filters twice if the slope is 24db/octave
-            filtered = self.apply_biquad_filter(filtered)
-            self.update_memory(input, filtered)
 
-        return filtered
+def _value_at(value: float | np.ndarray, index: int) -> float:
+    """
+    Value of a smoothed parameter at the given sample of the block.
+    """
+    return value if np.ndim(value) == 0 else float(value[index, 0])
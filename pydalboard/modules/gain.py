@@ -4,6 +4,7 @@ import numpy as np
 
 from pydalboard.signal import SignalInfo
 from pydalboard.modules.base import Module
+from pydalboard.modules.smoothing import Smoother, is_unity
 
 
 @dataclass
@@ -28,9 +29,46 @@ class Gain(Module):
     def __init__(self, params: GainParameters):
         self.params = params
 
+        # Linear gain of the last gain parameter, computed when it changes
+        self._gain = None
+        self._linear_gain = 1.0
+        self._smoother = Smoother(self.linear_gain)
+
+    @property
+    def linear_gain(self) -> float:
+        """
+        Gain as a factor applied to the samples.
+        """
+        if self._gain != self.params.gain:
+            # Convert dB gain to linear scale
+            self._linear_gain = 10 ** (self.params.gain / 20.0)
+            self._gain = self.params.gain
+
+        return self._linear_gain
+
+    @property
+    def is_identity(self) -> bool:
+        """
+        Whether the gain leaves the signal unchanged, and is not smoothed
+        towards another value.
+        """
+        return self.linear_gain == 1.0 and self._smoother.current == 1.0
+
+    def next_gain(self, frames: int) -> float | np.ndarray:
+        """
+        Linear gain over the next `frames` samples, smoothed when it changes.
+        """
+        return self._smoother.next(self.linear_gain, frames)
+
+    def prepare(self, signal_info: SignalInfo, max_block_size: int) -> None:
+        self._smoother.prepare(signal_info.sample_rate, max_block_size)
+
     def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
-        # Convert dB gain to linear scale
-        linear_gain = 10 ** (self.params.gain / 20.0)
-        output = input * linear_gain
+        return input * self.linear_gain
+
+    def process_block(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        gain = self.next_gain(len(input))
+        if not is_unity(gain):
+            np.multiply(input, gain, out=input)
 
-        return output
+        return input
@@ -0,0 +1,204 @@
+from functools import wraps
+from importlib.util import find_spec
+import math
+import os
+
+import numpy as np
+
+# Kernels of the modules whose output depends on their previous output, and
+# which cannot be vectorized over time. When numba is installed, they are
+# compiled (and cached on the disk), and the modules use them instead of
+# their numpy and scipy code, with the same results. numba is only imported
+# when a kernel is first called, as it takes longer than the whole package.
+JIT_ENABLED = (
+    find_spec("numba") is not None and os.environ.get("PYDALBOARD_JIT", "1") != "0"
+)
+"Whether the kernels are compiled, which can be disabled with PYDALBOARD_JIT=0"
+
+# Filter types, as the values of `FilterType`
+LOW_PASS = 1
+HIGH_PASS = 2
+BAND_PASS = 3
+
+_warmed_up = False
+
+# Python functions of the kernels, compiled together on the first call
+_kernels = {}
+_compiled = False
+
+
+def _jit(function):
+    if not JIT_ENABLED:
+        return function
+
+    _kernels[function.__name__] = function
+
+    @wraps(function)
+    def kernel(*args):
+        _compile()
+        return globals()[function.__name__](*args)
+
+    return kernel
+
+
+def _compile() -> None:
+    """
+    Replace every kernel of the module by its compiled version.
+
+    Kernels calling each other find the compiled versions in the globals of
+    the module when they are compiled themselves.
+    """
+    global _compiled
+    if _compiled:
+        return
+
+    import numba
+
+    jit = numba.njit(cache=True, nogil=True)
+    for name, function in _kernels.items():
+        globals()[name] = jit(function)
+    _compiled = True
+
+
+@_jit
+def biquad_coefficients(
+    filter_type: int, cutoff: float, resonance: float, sample_rate: float
+) -> tuple[float, float, float, float, float]:
+    """
+    Normalized coefficients (b0, b1, b2, a1, a2) of a biquad filter.
+    """
+    q = max(1.0, resonance)
+    omega = 2 * math.pi * cutoff / sample_rate
+    alpha = math.sin(omega) / (2 * q)
+    cos_omega = math.cos(omega)
+
+    if filter_type == LOW_PASS:
+        b0 = (1 - cos_omega) / 2
+        b1 = 1 - cos_omega
+        b2 = (1 - cos_omega) / 2
+    elif filter_type == HIGH_PASS:
+        b0 = (1 + cos_omega) / 2
+        b1 = -(1 + cos_omega)
+        b2 = (1 + cos_omega) / 2
+    else:
+        b0 = alpha
+        b1 = 0.0
+        b2 = -alpha
+    a0 = 1 + alpha
+    a1 = -2 * cos_omega
+    a2 = 1 - alpha
+
+    return (b0 / a0, b1 / a0, b2 / a0, a1 / a0, a2 / a0)
+
+
+@_jit
+def modulated_biquads(
+    input: np.ndarray,
+    output: np.ndarray,
+    cutoffs: np.ndarray,
+    resonances: np.ndarray,
+    filter_type: int,
+    sections: int,
+    sample_rate: float,
+    zi: np.ndarray,
+    sub_block_size: int,
+) -> None:
+    """
+    Filter the block through a cascade of identical biquads, whose
+    coefficients are computed for each sub-block from the cutoff and the
+    resonance at its end.
+
+    The biquads are in transposed direct form II, with the (sections, 2,
+    channels) state of `scipy.signal.sosfilt`.
+    """
+    frames, channels = input.shape
+    for start in range(0, frames, sub_block_size):
+        end = min(frames, start + sub_block_size)
+        # The cutoff may be automated above the Nyquist frequency
+        cutoff = min(cutoffs[end - 1], 0.49 * sample_rate)
+        b0, b1, b2, a1, a2 = biquad_coefficients(
+            filter_type, cutoff, resonances[end - 1], sample_rate
+        )
+
+        for n in range(start, end):
+            for channel in range(channels):
+                x = np.float64(input[n, channel])
+                for section in range(sections):
+                    y = b0 * x + zi[section, 0, channel]
+                    zi[section, 0, channel] = b1 * x - a1 * y + zi[section, 1, channel]
+                    zi[section, 1, channel] = b2 * x - a2 * y
+                    x = y
+                output[n, channel] = x
+
+
+@_jit
+def feedback_delay(
+    input: np.ndarray,
+    output: np.ndarray,
+    memory: np.ndarray,
+    write_index: int,
+    delays: np.ndarray,
+    feedbacks: np.ndarray,
+) -> int:
+    """
+    Delay the block one sample at a time, reading the circular buffer
+    `delays` (fractional) samples behind the writes, and writing the output
+    back into it.
+
+    Return the write index after the block.
+    """
+    frames, channels = input.shape
+    size = len(memory)
+    for n in range(frames):
+        position = write_index - delays[n]
+        index = math.floor(position)
+        fraction = np.float32(position - index)
+        first = int(index) % size
+        second = (first + 1) % size
+
+        for channel in range(channels):
+            sample = memory[first, channel] * (np.float32(1.0) - fraction)
+            sample += memory[second, channel] * fraction
+            sample = sample * feedbacks[n] + input[n, channel]
+            memory[write_index, channel] = sample
+            output[n, channel] = sample
+
+        write_index = (write_index + 1) % size
+
+    return write_index
+
+
+def warm_up() -> None:
+    """
+    Compile the kernels for the types the modules use, so that the first
+    blocks do not wait for the compilation.
+
+    The modules call it when they are prepared. Compiled kernels are cached
+    on the disk, so later runs only load them.
+    """
+    global _warmed_up
+    if not JIT_ENABLED or _warmed_up:
+        return
+
+    block = np.zeros((1, 1), dtype=np.float32)
+    output = np.zeros_like(block)
+    modulated_biquads(
+        block,
+        output,
+        np.ones(1),
+        np.ones(1),
+        LOW_PASS,
+        1,
+        44100.0,
+        np.zeros((1, 2, 1)),
+        32,
+    )
+    feedback_delay(
+        block,
+        output,
+        np.zeros((2, 1), dtype=np.float32),
+        0,
+        np.ones(1),
+        np.zeros(1, dtype=np.float32),
+    )
+    _warmed_up = True
@@ -0,0 +1,171 @@
+from dataclasses import replace
+
+import numpy as np
+from scipy.signal import firwin, lfilter
+
+from pydalboard.signal import SignalInfo
+from pydalboard.modules.base import Module
+
+
+class HalfBandStage:
+    """
+    Doubling and halving of the sample rate, with a half-band FIR filter.
+
+    Every other tap of a half-band filter is zero, except the center one, so
+    each rate change is a single FIR filter on half of the samples, the other
+    half being only delayed (polyphase decomposition).
+    """
+
+    def __init__(self, taps: int) -> None:
+        # Half of the filter length, minus the center tap
+        self.half_length = (taps - 3) // 4
+
+        # Low-pass at a quarter of the upsampled rate, the non-zero taps
+        # around the center are the even ones
+        kernel = firwin(taps, 0.5, window=("kaiser", 8.0)).astype(np.float32)
+        self.even_taps = kernel[0::2]
+        self.center_tap = kernel[taps // 2]
+        self._denominator = np.ones(1, dtype=np.float32)
+
+        # Filter state, per channel, allocated once the number of channels is known
+        self.channels = None
+
+    @property
+    def latency(self) -> int:
+        """
+        Delay added by upsampling then downsampling, in upsampled samples.
+        """
+        return 2 * (2 * self.half_length + 1)
+
+    def prepare(self, channels: int) -> None:
+        if self.channels == channels:
+            return
+
+        self.channels = channels
+        taps = len(self.even_taps)
+        self.up_state = np.zeros((taps - 1, channels), dtype=np.float32)
+        self.down_state = np.zeros((taps - 1, channels), dtype=np.float32)
+
+        # Last samples of the delayed phases
+        self.up_history = np.zeros((self.half_length, channels), dtype=np.float32)
+        self.down_history = np.zeros((self.half_length + 1, channels), dtype=np.float32)
+
+    def upsample(self, input: np.ndarray, out: np.ndarray) -> None:
+        """
+        Write the input at twice its sample rate into `out`.
+        """
+        # Zero-stuffing halves the gain, which the filter compensates
+        out[0::2], self.up_state = lfilter(
+            2 * self.even_taps, self._denominator, input, axis=0, zi=self.up_state
+        )
+        self.up_history = _delay(input, self.up_history, out[1::2])
+        out[1::2] *= 2 * self.center_tap
+
+    def downsample(self, input: np.ndarray, out: np.ndarray) -> None:
+        """
+        Write the input at half its sample rate into `out`.
+        """
+        self.down_history = _delay(input[1::2], self.down_history, out)
+        out *= self.center_tap
+
+        filtered, self.down_state = lfilter(
+            self.even_taps, self._denominator, input[0::2], axis=0, zi=self.down_state
+        )
+        out += filtered
+
+
+def _delay(input: np.ndarray, history: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """
+    Write the input delayed by `len(history)` samples into `out`.
+
+    `history` holds the last samples of the previous input, the new history
+    is returned.
+    """
+    delay = len(history)
+    count = len(input)
+    if count >= delay:
+        out[:delay] = history
+        out[delay:] = input[: count - delay]
+        return input[count - delay :].copy()
+
+    out[:] = history[:count]
+    return np.concatenate((history[count:], input))
+
+
+class Oversampling(Module):
+    """
+    Run a module at 2, 4 or 8 times the sample rate of the pipeline.
+
+    Nonlinear modules, such as the drive modules, produce harmonics above the
+    Nyquist frequency which fold back as aliasing. Running them at a higher
+    sample rate keeps those harmonics out of the audible band, and only the
+    wrapped module pays for it. The signal goes up and down through cascaded
+    half-band filters of `taps` taps (4k + 3), which delay it by `latency`.
+    """
+
+    def __init__(self, module: Module, factor: int = 2, taps: int = 31):
+        if factor not in (2, 4, 8):
+            raise ValueError("factor must be 2, 4 or 8")
+        if taps < 7 or (taps - 3) % 4:
+            raise ValueError("taps must be of the form 4k + 3, and at least 7")
+
+        self.module = module
+        self.factor = factor
+        self.stages = [HalfBandStage(taps) for _ in range(factor.bit_length() - 1)]
+
+        # Signal at each rate, from twice the pipeline rate to the highest,
+        # allocated for the largest block
+        self._buffers = []
+        self._signal_info = None
+
+    @property
+    def latency(self) -> float:
+        """
+        Delay introduced by the module, in samples of the pipeline.
+        """
+        latency = sum(
+            stage.latency / 2 ** (i + 1) for i, stage in enumerate(self.stages)
+        )
+        return latency + getattr(self.module, "latency", 0) / self.factor
+
+    def prepare(self, signal_info: SignalInfo, max_block_size: int) -> None:
+        channels = signal_info.channels
+        if not self._buffers or self._buffers[0].shape != (2 * max_block_size, channels):
+            self._buffers = [
+                np.zeros((max_block_size << (i + 1), channels), dtype=np.float32)
+                for i in range(len(self.stages))
+            ]
+        for stage in self.stages:
+            stage.prepare(channels)
+
+        self._signal_info = replace(
+            signal_info, sample_rate=signal_info.sample_rate * self.factor
+        )
+        self.module.prepare(self._signal_info, max_block_size * self.factor)
+
+    def update(self, **values) -> None:
+        self.module.update(**values)
+
+    def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        return self.process_block(input[np.newaxis], signal_info)[0]
+
+    def process_block(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        frames = len(input)
+        if not self._buffers or len(self._buffers[0]) < 2 * frames:
+            self.prepare(signal_info, frames)
+        buffers = [buffer[: frames << (i + 1)] for i, buffer in enumerate(self._buffers)]
+
+        block = input
+        for stage, buffer in zip(self.stages, buffers):
+            stage.upsample(block, buffer)
+            block = buffer
+
+        block = self.module.process_block(block, self._signal_info)
+
+        output = np.empty_like(input)
+        for i in reversed(range(len(self.stages))):
+            target = output if i == 0 else buffers[i - 1]
+            self.stages[i].downsample(block, target)
+            block = target
+
+        return output
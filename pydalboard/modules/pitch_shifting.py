@@ -1,30 +1,39 @@
 from dataclasses import dataclass
-from collections import deque
 
 import numpy as np
-from scipy.signal import resample
+from scipy.ndimage import maximum_filter1d
+from scipy.signal import get_window
 
 from pydalboard.signal import SignalInfo
 from pydalboard.modules.base import Module
 
+# Size of the FFT of the phase vocoder, as a multiple of its frames
+SPECTRUM_OVERSAMPLING = 4
+
 
 @dataclass
 class PitchShiftingParameters:
     pitch_factor: float
-    """Factor by which to shift the pitchFactor by which to shift the pitch
+    """Factor by which to shift the pitch
 
     0.5 lowers by an octave, and 2.0 pitches it an octave higher.
 
     Note that the algorithm will introduce artifacts."""
 
     warp: bool
-    "Whether to preserve the sample length or notWhether to preserve the sample length or not"
+    """Whether to shift the pitch in the frequency domain or not
+
+    When set, a phase vocoder moves the spectrum of overlapping frames, which
+    preserves the timing of the signal, with a latency of one frame.
+    Otherwise, short grains of the signal are replayed faster or slower and
+    crossfaded (rotating tape head), which has less latency and more artifacts.
+
+    In both cases, the output has the same length as the input."""
 
     def __post_init__(self):
         self.pitch_factor = max(0.5, min(self.pitch_factor, 2.0))
 
 
-# Basic resampling (not using Phase Vocoder)
 class PitchShifting(Module):
     def __init__(
         self,
@@ -32,57 +41,219 @@ class PitchShifting(Module):
         frame_size: int = 2048,
         hop_size: int = 512,
     ):
+        if frame_size & (frame_size - 1) or frame_size % hop_size:
+            raise ValueError(
+                "frame_size must be a power of two and a multiple of hop_size"
+            )
+
         self.params = params
-        self.frame_size = frame_size  # Define the required number of samples before resampling (chunk of data)
-        self.hop_size = hop_size  # Define the required number of processed samples before outputting (rate of output)
+        self.frame_size = frame_size  # Number of samples analysed at once (FFT size)
+        self.hop_size = hop_size  # Number of samples between two analysed frames
+
+        # Analysis and synthesis window, and the gain compensating their overlap
+        self.window = get_window("hann", frame_size).astype(np.float32)[:, np.newaxis]
+        self.overlap_gain = hop_size / np.sum(self.window**2)
 
-        self.input_buffers = [deque(maxlen=self.frame_size) for _ in range(2)]
-        self.output_buffers = [deque() for _ in range(2)]
+        # Frames are zero-padded, so that the spectrum has finer bins, and the
+        # peaks are moved closer to their shifted frequency
+        self.fft_size = frame_size * SPECTRUM_OVERSAMPLING
+
+        # Phase advance of each frequency bin between two frames
+        self.bins = np.arange(self.fft_size // 2 + 1)[:, np.newaxis]
+        self.expected_phase_advance = 2 * np.pi * hop_size / self.fft_size * self.bins
+
+        # Buffers are allocated once the number of channels is known
+        self.channels = None
+
+    @property
+    def latency(self) -> int:
+        """
+        Delay introduced by the module, in samples.
+
+        The tape head shifter reads between 1 and `frame_size` samples in the
+        past, this is its average.
+        """
+        return self.frame_size if self.params.warp else self.frame_size // 2
 
     def process(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
-        output = np.zeros_like(input)
-
-        for channel in range(2):
-            # Fill the input buffer, because pitch shifting operates on
-            # frames (chunks) of audio data, not individual samples
-            self.input_buffers[channel].append(input[channel])
-
-            if len(self.input_buffers[channel]) == self.frame_size:
-                # The input buffer has accumulated enough samples
-                # Apply the pitch shifting algorithm to the frame (chunk)
-                frame = np.array(self.input_buffers[channel])
-                pitched_frame = self.pitch_shift(frame, self.params.pitch_factor)
-
-                # Add the resampled frame to the output buffer, which
-                # accumulates the processed samples
-                self.output_buffers[channel].extend(pitched_frame)
-                # Clear the input buffer for a new frame (chunk)
-                self.input_buffers[channel].clear()
-
-            if len(self.output_buffers[channel]) >= self.hop_size:
-                # The output buffer has enough processed samples to
-                # output one sample
-                output[channel] = self.output_buffers[channel].popleft()
-            else:
-                output[channel] = 0.0
+        return self.process_block(input[np.newaxis], signal_info)[0]
+
+    def process_block(self, input: np.ndarray, signal_info: SignalInfo) -> np.ndarray:
+        if self.channels is None:
+            self.prepare(signal_info, len(input))
+
+        output = np.empty_like(input)
+        if self.params.warp:
+            self._process_phase_vocoder(input, output)
+        else:
+            # The ring buffer holds at most one frame of upcoming samples
+            for start in range(0, len(input), self.frame_size):
+                end = start + self.frame_size
+                self._process_tape_head(input[start:end], output[start:end])
 
         return output
 
-    def pitch_shift(self, frame: np.ndarray, pitch_factor: float) -> np.ndarray:
-        # Resample the frame (chunk of data) to change the pitch
-        # Higher pitch implies lower sample rate
-        # Lower pitch implies higher sample rate
-        resampled_frame = resample(frame, int(len(frame) / pitch_factor))
+    def prepare(self, signal_info: SignalInfo, max_block_size: int) -> None:
+        channels = signal_info.channels
+        if self.channels == channels:
+            return
+
+        self.channels = channels
+        bins = len(self.bins)
+
+        # Phase vocoder: last frame of input, overlap-added output, and the
+        # hop of output samples being played
+        self.input_frame = np.zeros((self.frame_size, channels), dtype=np.float32)
+        self.output_frame = np.zeros((self.frame_size, channels), dtype=np.float32)
+        self.output_hop = np.zeros((self.hop_size, channels), dtype=np.float32)
+        self.hop_index = 0
+        self.last_phase = np.zeros((bins, channels))
+        # Phase rotation of the peaks that were shifted to each bin
+        self.rotation = np.zeros((bins, channels))
+
+        # Tape head: circular history of the input, and position of the
+        # read head, from 0 (newest sample) to 1 (one frame in the past)
+        self.history = np.zeros((2 * self.frame_size + 2, channels), dtype=np.float32)
+        self.write_index = 0
+        self.head = 0.0
+
+    def _process_phase_vocoder(self, input: np.ndarray, output: np.ndarray) -> None:
+        start = 0
+        while start < len(input):
+            # Exchange samples until the end of the current hop
+            count = min(len(input) - start, self.hop_size - self.hop_index)
+            end = start + count
+            tail = self.frame_size - self.hop_size + self.hop_index
+
+            self.input_frame[tail : tail + count] = input[start:end]
+            output[start:end] = self.output_hop[self.hop_index : self.hop_index + count]
+            self.hop_index += count
+            start = end
+
+            if self.hop_index == self.hop_size:
+                self._process_frame()
+                self.hop_index = 0
+
+    def _process_frame(self) -> None:
+        hop = self.hop_size
+
+        # Analysis, both channels at once
+        spectrum = np.fft.rfft(self.input_frame * self.window, n=self.fft_size, axis=0)
+        magnitude = np.abs(spectrum)
+        phase = np.angle(spectrum)
+
+        # Deviation of each bin from its expected phase advance gives its
+        # true frequency, in (fractional) bins
+        deviation = phase - self.last_phase - self.expected_phase_advance
+        deviation -= 2 * np.pi * np.round(deviation / (2 * np.pi))
+        frequency = self.bins + deviation * self.fft_size / (2 * np.pi * hop)
+        self.last_phase = phase
+
+        shifted = np.zeros_like(spectrum)
+        for channel in range(self.channels):
+            shifted[:, channel] = self._shift_peaks(
+                magnitude[:, channel], phase[:, channel], frequency[:, channel], channel
+            )
+
+        frame = np.fft.irfft(shifted, n=self.fft_size, axis=0)[: self.frame_size]
+        frame *= self.window * self.overlap_gain
+
+        # Overlap-add, the first hop is now complete
+        self.output_frame += frame
+        self.output_hop[:] = self.output_frame[:hop]
+        self.output_frame[:-hop] = self.output_frame[hop:]
+        self.output_frame[-hop:] = 0.0
+        self.input_frame[:-hop] = self.input_frame[hop:]
+
+    def _shift_peaks(
+        self,
+        magnitude: np.ndarray,
+        phase: np.ndarray,
+        frequency: np.ndarray,
+        channel: int,
+    ) -> np.ndarray:
+        """
+        Spectrum of a channel, with each spectral peak moved to its shifted
+        frequency, along with the bins around it (its region).
+
+        The bins of a region are moved and rotated as a whole, by the shift
+        of their peak (identity phase locking), so that the shape of the peak,
+        and therefore its level, is kept, and the overlapping frames add up
+        coherently.
+        """
+        bins = self.bins[:, 0]
+
+        # Peaks are the largest bins within the main lobe of the window around
+        # them, so that its side lobes are not taken for other peaks
+        lobe = 4 * SPECTRUM_OVERSAMPLING + 1
+        peaks = np.flatnonzero(
+            (magnitude == maximum_filter1d(magnitude, lobe)) & (magnitude > 0.0)
+        )
+        if len(peaks) == 0:
+            return np.zeros(len(bins), dtype=complex)
+
+        # Each bin belongs to the nearest peak, up to the middle of two peaks
+        regions = np.searchsorted((peaks[:-1] + peaks[1:]) / 2, bins)
+
+        # The shift is rounded from the true frequency of the peak, which lies
+        # between the bins
+        shifts = np.round(frequency[peaks] * (self.params.pitch_factor - 1.0))
+        shifts = shifts.astype(np.intp)
+        targets = peaks + shifts
+
+        # Moving a region by `shift` bins is a modulation by the frequency of
+        # `shift` bins, whose phase rotation accumulates from frame to frame,
+        # following the peak to the bin where it lands
+        previous = self.rotation[np.clip(targets, 0, len(bins) - 1), channel]
+        rotation = previous + 2 * np.pi * self.hop_size / self.fft_size * shifts
+        rotation -= 2 * np.pi * np.round(rotation / (2 * np.pi))
+
+        # Phase locking: the bins of a region are rotated as their peak
+        values = magnitude * np.exp(1j * (phase + rotation[regions]))
+
+        # Regions pitched down may overlap, their bins are summed
+        target = bins + shifts[regions]
+        valid = (target >= 0) & (target < len(bins))
+        shifted = np.bincount(
+            target[valid], values.real[valid], minlength=len(bins)
+        ) + 1j * np.bincount(target[valid], values.imag[valid], minlength=len(bins))
+
+        kept = (targets >= 0) & (targets < len(bins))
+        self.rotation[targets[kept], channel] = rotation[kept]
+
+        return shifted
+
+    def _process_tape_head(self, input: np.ndarray, output: np.ndarray) -> None:
+        count = len(input)
+        size = len(self.history)
+
+        # Write the input first, so that the heads can read any of its samples
+        first = min(count, size - self.write_index)
+        self.history[self.write_index : self.write_index + first] = input[:first]
+        self.history[: count - first] = input[first:]
+
+        # The read heads drift away from the write head when pitching down,
+        # and towards it when pitching up. Two heads, half a frame apart, are
+        # crossfaded so that their jumps are silent.
+        step = (1.0 - self.params.pitch_factor) / self.frame_size
+        heads = (self.head + step * np.arange(1, count + 1)) % 1.0
+        self.head = heads[-1]
+
+        positions = self.write_index + np.arange(count)
+        output[:] = 0.0
+        for head in (heads, (heads + 0.5) % 1.0):
+            gain = (np.sin(np.pi * head) ** 2).astype(np.float32)[:, np.newaxis]
+            output += gain * _interpolate(self.history, positions - 1 - head * self.frame_size)
+
+        self.write_index = (self.write_index + count) % size
 
-        if not self.params.warp:
-            # Sample original length is not preserved
-            return resampled_frame
 
-        # If the resampled frame is too short, pad with zeros
-        if len(resampled_frame) < len(frame):
-            padded_frame = np.zeros(len(frame))
-            padded_frame[: len(resampled_frame)] = resampled_frame
-            return padded_frame
+def _interpolate(buffer: np.ndarray, position: np.ndarray) -> np.ndarray:
+    """
+    Linearly interpolate the circular buffer at the given fractional positions.
+    """
+    index = np.floor(position)
+    fraction = (position - index).astype(np.float32)[:, np.newaxis]
+    index = index.astype(np.intp) % len(buffer)
 
-        # If the resampled frame is too long, truncate it
-        return resampled_frame[: len(frame)]
+    return buffer[index] * (1.0 - fraction) + buffer[(index + 1) % len(buffer)] * fraction
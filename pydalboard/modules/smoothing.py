@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+
+
+class Smoother:
+    """
+    One-pole smoothing of a parameter towards its latest value, to avoid the
+    zipper noise of sudden changes.
+
+    While the parameter is settled, `next` returns it as a float, so static
+    parameters only cost a comparison per block. While it moves, `next`
+    returns its value at each sample of the block, as a (frames, 1) array
+    which broadcasts over the channels.
+    """
+
+    def __init__(self, value: float, time: float = 20.0) -> None:
+        self.time = time
+        "Time constant of the smoothing, in ms"
+
+        self.current = float(value)
+        "Value reached at the end of the last block"
+
+        # Decay of the distance to the target after each sample of a block,
+        # and the values of the block, allocated for the largest block
+        self._decay = None
+        self._ramp = None
+
+    def prepare(self, sample_rate: int, max_block_size: int) -> None:
+        coefficient = math.exp(-1000.0 / (self.time * sample_rate))
+        self._decay = coefficient ** np.arange(1, max_block_size + 1)[:, np.newaxis]
+        self._ramp = np.empty((max_block_size, 1), dtype=np.float32)
+
+    def reset(self, value: float) -> None:
+        """
+        Jump to the value, without smoothing.
+        """
+        self.current = float(value)
+
+    def next(self, target: float, frames: int) -> float | np.ndarray:
+        """
+        Values of the parameter over the next `frames` samples, moving towards
+        `target`.
+
+        The array returned is reused by the next call.
+        """
+        if target == self.current:
+            return self.current
+
+        if self._decay is None or len(self._decay) < frames:
+            # Not prepared for blocks this large, jump to the target
+            self.current = float(target)
+            return self.current
+
+        ramp = self._ramp[:frames]
+        np.multiply(self._decay[:frames], self.current - target, out=ramp)
+        ramp += target
+
+        self.current = float(ramp[-1, 0])
+        if abs(self.current - target) <= 1e-6 * max(1.0, abs(target)):
+            self.current = float(target)
+
+        return ramp
+
+
+def is_unity(value: float | np.ndarray) -> bool:
+    """
+    Whether a (possibly smoothed) gain leaves the signal unchanged.
+    """
+    return np.ndim(value) == 0 and value == 1.0
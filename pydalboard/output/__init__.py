@@ -0,0 +1,9 @@
+from .backends import Backend, NullBackend, PyAudioBackend
+from .engine import OutputEngine, OutputStats
+from .ring_buffer import RingBuffer
+
+__all__ = [
+    "Backend", "NullBackend", "PyAudioBackend",
+    "OutputEngine", "OutputStats",
+    "RingBuffer",
+]
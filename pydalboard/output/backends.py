@@ -0,0 +1,137 @@
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+import threading
+import time
+
+import numpy as np
+
+from pydalboard.signal import SignalInfo, conversion
+
+AudioCallback = Callable[[int], np.ndarray]
+"""
+Called by a backend whenever the device needs audio, with the number of frames
+needed, and returning a (frames, channels) array in the output sample format.
+"""
+
+
+class Backend(ABC):
+    """
+    Audio device, pulling samples from a callback on its own thread.
+    """
+
+    @abstractmethod
+    def start(
+        self,
+        callback: AudioCallback,
+        signal_info: SignalInfo,
+        dtype: np.dtype,
+        buffer_size: int,
+    ) -> None: ...
+
+    @abstractmethod
+    def stop(self) -> None: ...
+
+
+class PyAudioBackend(Backend):
+    """
+    Play audio on the default output device, with a PyAudio callback stream.
+    """
+
+    def __init__(self) -> None:
+        self._pyaudio = None
+        self._stream = None
+
+    def start(
+        self,
+        callback: AudioCallback,
+        signal_info: SignalInfo,
+        dtype: np.dtype,
+        buffer_size: int,
+    ) -> None:
+        import pyaudio
+
+        match np.dtype(dtype):
+            case np.int16:
+                pa_format = pyaudio.paInt16
+            case conversion.INT24:
+                pa_format = pyaudio.paInt24
+            case np.int32:
+                pa_format = pyaudio.paInt32
+            case np.float32:
+                pa_format = pyaudio.paFloat32
+            case _:
+                raise ValueError("Unsupported sample format")
+
+        def stream_callback(in_data, frame_count, time_info, status):
+            # PyAudio only accepts bytes, not views of the buffer
+            return (callback(frame_count).tobytes(), pyaudio.paContinue)
+
+        self._pyaudio = pyaudio.PyAudio()
+        self._stream = self._pyaudio.open(
+            rate=signal_info.sample_rate,
+            channels=signal_info.channels,
+            output=True,
+            frames_per_buffer=buffer_size,
+            format=pa_format,
+            stream_callback=stream_callback,
+        )
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._pyaudio.terminate()
+            self._stream = None
+            self._pyaudio = None
+
+
+class NullBackend(Backend):
+    """
+    Headless device, which pulls audio and discards it.
+
+    It pulls audio at the pace of the sample rate when `realtime` is set, and
+    as fast as possible otherwise. With `capture`, the pulled blocks are kept
+    in `captured`.
+    """
+
+    def __init__(self, realtime: bool = True, capture: bool = False) -> None:
+        self.realtime = realtime
+        self.capture = capture
+        self.captured: list[np.ndarray] = []
+        self.frames_played = 0
+
+        self._running = False
+        self._thread = None
+
+    def start(
+        self,
+        callback: AudioCallback,
+        signal_info: SignalInfo,
+        dtype: np.dtype,
+        buffer_size: int,
+    ) -> None:
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(callback, buffer_size / signal_info.sample_rate, buffer_size),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, callback: AudioCallback, period: float, buffer_size: int) -> None:
+        deadline = time.perf_counter()
+        while self._running:
+            block = callback(buffer_size)
+            if self.capture:
+                self.captured.append(block.copy())
+            self.frames_played += len(block)
+
+            if self.realtime:
+                deadline += period
+                time.sleep(max(0.0, deadline - time.perf_counter()))
@@ -0,0 +1,141 @@
+from dataclasses import dataclass, replace
+import threading
+import time
+
+import numpy as np
+
+from pydalboard.output.backends import Backend, PyAudioBackend
+from pydalboard.output.ring_buffer import RingBuffer
+from pydalboard.pipeline import Pipeline
+from pydalboard.signal import FormatConverter
+
+
+@dataclass
+class OutputStats:
+    callbacks: int = 0
+    "Number of buffers requested by the device"
+
+    xruns: int = 0
+    "Number of buffers which could not be filled in time (underruns)"
+
+    callback_time: float = 0.0
+    "Total time spent in the device callback, in seconds"
+
+    max_callback_time: float = 0.0
+    "Longest device callback, in seconds"
+
+    @property
+    def mean_callback_time(self) -> float:
+        return self.callback_time / self.callbacks if self.callbacks else 0.0
+
+
+class OutputEngine:
+    """
+    Play a pipeline on an audio device.
+
+    The pipeline is rendered on its own thread, ahead of the device, into a
+    ring buffer of `buffered_blocks` blocks of `buffer_size` frames. The device
+    callback only copies frames out of this buffer. Integer outputs may be
+    dithered.
+    """
+
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        backend: Backend | None = None,
+        buffer_size: int = 512,
+        buffered_blocks: int = 4,
+        dither: bool = False,
+    ) -> None:
+        self.pipeline = pipeline
+        self.backend = backend if backend is not None else PyAudioBackend()
+        self.buffer_size = buffer_size
+
+        self.signal_info = pipeline.source.signal_info
+        self.converter = FormatConverter.for_signal(self.signal_info, dither=dither)
+        self.dtype = self.converter.dtype
+
+        self.ring = RingBuffer(
+            buffer_size * buffered_blocks, self.signal_info.channels, self.dtype
+        )
+        self._output = np.zeros((buffer_size, self.signal_info.channels), self.dtype)
+        self._stats = OutputStats()
+
+        self._running = False
+        self._render_thread = None
+        self.error: Exception | None = None
+        "Exception which stopped the render thread, if any"
+
+    @property
+    def stats(self) -> OutputStats:
+        """
+        Snapshot of the playback statistics.
+        """
+        return replace(self._stats)
+
+    def start(self) -> None:
+        self.pipeline.prepare(self.buffer_size)
+
+        # Fill the buffer before the device starts pulling from it
+        self._render_available()
+
+        self._running = True
+        self._render_thread = threading.Thread(target=self._render_loop, daemon=True)
+        self._render_thread.start()
+        self.backend.start(
+            self._callback, self.signal_info, self.dtype, self.buffer_size
+        )
+
+    def stop(self) -> None:
+        self.backend.stop()
+        self._running = False
+        if self._render_thread is not None:
+            self._render_thread.join()
+            self._render_thread = None
+
+    def __enter__(self) -> "OutputEngine":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _render_available(self) -> None:
+        """
+        Render blocks until the ring buffer is full.
+        """
+        while self.ring.writable >= self.buffer_size:
+            block = self.pipeline.run_block(self.buffer_size)
+            self.ring.write(self.converter.convert(block))
+
+    def _render_loop(self) -> None:
+        # Check the buffer a few times per block, to refill it well before
+        # the device runs out of frames
+        period = self.buffer_size / self.signal_info.sample_rate / 4
+        try:
+            while self._running:
+                self._render_available()
+                time.sleep(period)
+        except Exception as e:
+            self.error = e
+            self._running = False
+
+    def _callback(self, frames: int) -> np.ndarray:
+        start = time.perf_counter()
+
+        if frames > len(self._output):
+            self._output = np.zeros((frames, self.signal_info.channels), self.dtype)
+        output = self._output[:frames]
+
+        read = self.ring.read(output)
+        if read < frames:
+            # The render thread is late, play silence rather than blocking
+            output[read:] = 0
+            self._stats.xruns += 1
+
+        elapsed = time.perf_counter() - start
+        self._stats.callbacks += 1
+        self._stats.callback_time += elapsed
+        self._stats.max_callback_time = max(self._stats.max_callback_time, elapsed)
+
+        return output
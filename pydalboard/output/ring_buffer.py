@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Single-producer, single-consumer circular buffer of audio frames.
+
+    One thread may write while another one reads, without any lock: each
+    counter is only ever updated by one of the two threads, and the update of
+    a Python integer is atomic.
+    """
+
+    def __init__(self, capacity: int, channels: int, dtype: np.dtype) -> None:
+        self.capacity = capacity
+        self.data = np.zeros((capacity, channels), dtype=dtype)
+
+        # Total number of frames written and read since the creation
+        self._written = 0
+        self._read = 0
+
+    @property
+    def readable(self) -> int:
+        """
+        Number of frames which can be read.
+        """
+        return self._written - self._read
+
+    @property
+    def writable(self) -> int:
+        """
+        Number of frames which can be written without overwriting unread frames.
+        """
+        return self.capacity - self.readable
+
+    def write(self, frames: np.ndarray) -> int:
+        """
+        Write as many of the given frames as possible, return how many were written.
+        """
+        count = min(len(frames), self.writable)
+        start = self._written % self.capacity
+        first = min(count, self.capacity - start)
+        self.data[start : start + first] = frames[:first]
+        self.data[: count - first] = frames[first:count]
+
+        # Publish the frames once they are copied
+        self._written += count
+        return count
+
+    def read(self, out: np.ndarray) -> int:
+        """
+        Read as many frames as possible into `out`, return how many were read.
+        """
+        count = min(len(out), self.readable)
+        start = self._read % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self.data[start : start + first]
+        out[first:count] = self.data[: count - first]
+
+        # Release the frames once they are copied
+        self._read += count
+        return count
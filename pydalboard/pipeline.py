@@ -1,7 +1,9 @@
 import numpy as np
 
+from pydalboard.compilation import compile_modules, dropped_modules
 from pydalboard.modules.base import Module
-from pydalboard.signal import SignalSource
+from pydalboard.profiling import Profiler
+from pydalboard.signal import FormatConverter, SignalSource
 
 
 class Pipeline:
@@ -9,17 +11,134 @@ class Pipeline:
         self.source = source
         self._modules = []
 
+        self.profiler: Profiler | None = None
+        "Profiler measuring each block, if any"
+
+        # Modules and block size the pipeline was prepared for
+        self._prepared_modules = []
+        self._max_block_size = 0
+
+        # Converter of the frames of `run`, and the format it converts from
+        self._converter: FormatConverter | None = None
+        self._converter_format = None
+
+        # Optimized plan of the modules, the parameters it was built for, and
+        # the modules it left out
+        self._compiled = False
+        self._plan: list[Module] | None = None
+        self._plan_params = []
+        self._dropped: list[Module] = []
+
     @property
     def modules(self) -> list[Module]:
         return self._modules
 
+    @property
+    def latency(self) -> int:
+        """
+        Delay of the output behind the source, in samples: the sum of the
+        latencies of the modules.
+        """
+        return round(sum(getattr(module, "latency", 0) for module in self._modules))
+
+    def prepare(self, max_block_size: int) -> None:
+        """
+        Prepare every module for the signal of the source, in blocks of at
+        most `max_block_size` samples.
+
+        `run_block` calls it before the first block, and again when modules
+        were added or when larger blocks are requested. Raise a ValueError if
+        a module cannot process the signal of the source.
+        """
+        signal_info = self.source.signal_info
+        if signal_info.sample_rate <= 0 or signal_info.channels <= 0:
+            raise ValueError(f"Invalid signal: {signal_info}")
+        if max_block_size <= 0:
+            raise ValueError("The block size must be positive")
+
+        for module in self.modules:
+            module.prepare(signal_info, max_block_size)
+
+        self._prepared_modules = list(self.modules)
+        self._max_block_size = max_block_size
+        self._plan = None
+
+    def compile(self) -> None:
+        """
+        Run the modules through an optimized plan from now on, which makes
+        fewer passes over the blocks for the same output (see
+        `compile_modules`).
+
+        The plan is built again when modules are added or removed, when their
+        parameters are replaced (as `Module.update` does), or when a module
+        left out of the plan, such as a 0 dB gain, changes the signal again
+        after its parameters were modified in place. A profiler still
+        measures the modules one by one.
+        """
+        self._compiled = True
+        self._plan = None
+
+    def _current_plan(self) -> list[Module]:
+        """
+        Plan of the modules, built again if they changed since the last one.
+        """
+        # The steps of the plan read the parameters on every block, so the
+        # list of parameters is enough to notice them being replaced (it is
+        # compared by identity before values). Only the modules left out must
+        # be checked for changes in place.
+        params = [getattr(module, "params", None) for module in self._modules]
+        if (
+            self._plan is None
+            or params != self._plan_params
+            or dropped_modules(self._dropped) != self._dropped
+        ):
+            self._plan = compile_modules(self._modules)
+            self._plan_params = params
+            self._dropped = dropped_modules(self._modules)
+            for step in self._plan:
+                if step not in self._modules:
+                    step.prepare(self.source.signal_info, self._max_block_size)
+
+        return self._plan
+
     def run(self) -> np.ndarray:
+        """
+        Process the next frame of the source through every module, and
+        convert it to the sample format of the source.
+
+        The frame belongs to the caller until the next call.
+        """
         frame, signal_info = self.source.get_signal()
         for module in self.modules:
             frame = module.process(frame, signal_info)
 
         # Signal was converted to float for processing.
         # We need to convert it back to its original format for ouptut
-        frame = signal_info.convert_to_format(frame)
-        
-        return frame
+        sample_format = (signal_info.sample_format, signal_info.channels)
+        if self._converter_format != sample_format:
+            self._converter = FormatConverter.for_signal(signal_info)
+            self._converter_format = sample_format
+        frame = np.asarray(frame, dtype=np.float32)[np.newaxis]
+
+        return self._converter.convert(frame)[0]
+
+    def run_block(self, frames: int) -> np.ndarray:
+        """
+        Process the next `frames` samples of the source through every module.
+
+        The result is a (frames, channels) float32 array, which can be
+        converted for output with a `FormatConverter`.
+        """
+        if frames > self._max_block_size or self._prepared_modules != self._modules:
+            self.prepare(max(frames, self._max_block_size))
+
+        if self.profiler is not None:
+            return self.profiler.run_block(self, frames)
+
+        modules = self._current_plan() if self._compiled else self.modules
+        block, signal_info = self.source.get_block(frames)
+        for module in modules:
+            block = module.process_block(block, signal_info)
+
+        # Modules may promote the block to float64 (e.g. with float64 coefficients)
+        return block.astype(np.float32, copy=False)
@@ -0,0 +1,218 @@
+from dataclasses import dataclass, field, replace
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from pydalboard.pipeline import Pipeline
+
+
+@dataclass
+class ModuleStats:
+    name: str
+    "Name of the module, as its class name"
+
+    calls: int = 0
+    "Number of blocks processed"
+
+    samples: int = 0
+    "Number of samples processed"
+
+    total_time: float = 0.0
+    "Total time spent processing blocks, in seconds"
+
+    last_block_time: float = 0.0
+    "Time spent processing the last block, in seconds"
+
+    max_block_time: float = 0.0
+    "Longest block, in seconds"
+
+    nans: int = 0
+    "Number of NaN values output"
+
+    infs: int = 0
+    "Number of infinite values output"
+
+    clipped: int = 0
+    "Number of values output outside of [-1.0, 1.0]"
+
+    @property
+    def mean_block_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+
+@dataclass
+class PipelineStats:
+    blocks: int = 0
+    "Number of blocks rendered"
+
+    samples: int = 0
+    "Number of samples rendered"
+
+    total_time: float = 0.0
+    "Total time spent rendering blocks, source included, in seconds"
+
+    max_block_time: float = 0.0
+    "Longest block, in seconds"
+
+    max_load: float = 0.0
+    "Longest block, as a fraction of its duration (above 1.0, it was late)"
+
+    missed_deadlines: int = 0
+    "Number of blocks which took longer to render than to play"
+
+    source: ModuleStats = field(default_factory=lambda: ModuleStats("source"))
+    "Time spent reading the source"
+
+    modules: list[ModuleStats] = field(default_factory=list)
+    "Statistics of each module, in the order of the pipeline"
+
+
+class Profiler:
+    """
+    Measure the time spent in each module of a pipeline, and check its output.
+
+    Once set as `Pipeline.profiler`, every block rendered by the pipeline is
+    timed module by module, and checked for NaN, infinite and clipped values.
+    Pipelines without profiler are not slowed down.
+    """
+
+    def __init__(self) -> None:
+        self._stats = PipelineStats()
+
+        # Statistics by module, kept when modules are moved in the pipeline
+        self._module_stats: dict[int, ModuleStats] = {}
+
+    def reset(self) -> None:
+        self._stats = PipelineStats()
+        self._module_stats = {}
+
+    def snapshot(self) -> PipelineStats:
+        """
+        Copy of the statistics, which can be read while the pipeline runs.
+        """
+        return replace(
+            self._stats,
+            source=replace(self._stats.source),
+            modules=[replace(stats) for stats in self._stats.modules],
+        )
+
+    def run_block(self, pipeline: "Pipeline", frames: int) -> np.ndarray:
+        """
+        Instrumented version of `Pipeline.run_block`.
+        """
+        if len(self._stats.modules) != len(pipeline.modules) or any(
+            stats is not self._module_stats.get(id(module))
+            for stats, module in zip(self._stats.modules, pipeline.modules)
+        ):
+            self._update_modules(pipeline)
+
+        start = time.perf_counter()
+        block, signal_info = pipeline.source.get_block(frames)
+        now = time.perf_counter()
+        self._record(self._stats.source, block, now - start)
+
+        for module, stats in zip(pipeline.modules, self._stats.modules):
+            before = now
+            block = module.process_block(block, signal_info)
+            now = time.perf_counter()
+            self._record(stats, block, now - before)
+
+        elapsed = now - start
+        load = elapsed * signal_info.sample_rate / frames
+        stats = self._stats
+        stats.blocks += 1
+        stats.samples += frames
+        stats.total_time += elapsed
+        stats.max_block_time = max(stats.max_block_time, elapsed)
+        stats.max_load = max(stats.max_load, load)
+        if load > 1.0:
+            stats.missed_deadlines += 1
+
+        return block.astype(np.float32, copy=False)
+
+    def _update_modules(self, pipeline: "Pipeline") -> None:
+        self._module_stats = {
+            id(module): self._module_stats.get(id(module))
+            or ModuleStats(type(module).__name__)
+            for module in pipeline.modules
+        }
+        self._stats.modules = [
+            self._module_stats[id(module)] for module in pipeline.modules
+        ]
+
+    @staticmethod
+    def _record(stats: ModuleStats, block: np.ndarray, elapsed: float) -> None:
+        stats.calls += 1
+        stats.samples += len(block)
+        stats.total_time += elapsed
+        stats.last_block_time = elapsed
+        stats.max_block_time = max(stats.max_block_time, elapsed)
+
+        finite = np.isfinite(block)
+        if not finite.all():
+            nans = np.count_nonzero(np.isnan(block))
+            stats.nans += nans
+            stats.infs += block.size - np.count_nonzero(finite) - nans
+        stats.clipped += np.count_nonzero(np.abs(block[finite]) > 1.0)
+
+    def to_prometheus(self, prefix: str = "pydalboard") -> str:
+        """
+        Statistics in the Prometheus text exposition format.
+        """
+        stats = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help, samples):
+            lines.append(f"# HELP {prefix}_{name} {help}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        metric("blocks_total", "counter", "Blocks rendered", [("", stats.blocks)])
+        metric("samples_total", "counter", "Samples rendered", [("", stats.samples)])
+        metric(
+            "render_seconds_total",
+            "counter",
+            "Time spent rendering blocks",
+            [("", stats.total_time)],
+        )
+        metric(
+            "max_block_load",
+            "gauge",
+            "Longest block, as a fraction of its duration",
+            [("", stats.max_load)],
+        )
+        metric(
+            "missed_deadlines_total",
+            "counter",
+            "Blocks which took longer to render than to play",
+            [("", stats.missed_deadlines)],
+        )
+
+        modules = [stats.source, *stats.modules]
+        labels = [
+            f'{{module="{module.name}",position="{position}"}}'
+            for position, module in enumerate(modules, start=-1)
+        ]
+        for name, kind, help, attribute in [
+            ("module_calls_total", "counter", "Blocks processed", "calls"),
+            ("module_samples_total", "counter", "Samples processed", "samples"),
+            ("module_seconds_total", "counter", "Time spent processing", "total_time"),
+            ("module_max_block_seconds", "gauge", "Longest block", "max_block_time"),
+            ("module_nan_total", "counter", "NaN values output", "nans"),
+            ("module_inf_total", "counter", "Infinite values output", "infs"),
+            ("module_clipped_total", "counter", "Values output above 1.0", "clipped"),
+        ]:
+            metric(
+                name,
+                kind,
+                help,
+                [
+                    (label, getattr(module, attribute))
+                    for label, module in zip(labels, modules)
+                ],
+            )
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,95 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+import time
+import wave
+
+from pydalboard.pipeline import Pipeline
+from pydalboard.signal import FormatConverter
+
+
+@dataclass
+class RenderStats:
+    frames: int
+    "Number of frames rendered"
+
+    sample_rate: int
+    "Sample rate of the rendered audio, in Hz"
+
+    elapsed: float
+    "Time spent rendering, in seconds"
+
+    @property
+    def realtime_factor(self) -> float:
+        """
+        How many times faster than real time the audio was rendered.
+        """
+        return self.frames / self.sample_rate / self.elapsed if self.elapsed else float("inf")
+
+
+def render(
+    pipeline: Pipeline,
+    output_file: Path,
+    frames: int | None = None,
+    block_size: int = 65536,
+    sample_format: int | None = None,
+    dither: bool = False,
+    progress: Callable[[int, int], None] | None = None,
+) -> RenderStats:
+    """
+    Render the pipeline into a WAV file, as fast as possible.
+
+    `frames` defaults to the length of the source, and may be longer to keep
+    the tail of effects such as delays. The latency of the modules is
+    compensated: the output is rendered that much longer, and its lead-in is
+    dropped, so that the file is aligned with the source. The file is written
+    one block at a time, in the sample format of the source by default (16,
+    24 or 32 bits), with optional dithering.
+    `progress` is called after each block with the number of frames rendered
+    so far and the total.
+    """
+    signal_info = pipeline.source.signal_info
+    if frames is None:
+        frames = pipeline.source.length
+        if frames is None:
+            raise ValueError("The source has no end, the number of frames must be given")
+
+    if sample_format is None:
+        sample_format = signal_info.sample_format
+        if sample_format not in (16, 24):
+            sample_format = 32
+    if sample_format not in (16, 24, 32):
+        raise ValueError("Unsupported sample format")
+    converter = FormatConverter(
+        sample_format, signal_info.channels, dither=dither, max_block_size=block_size
+    )
+
+    pipeline.prepare(block_size)
+
+    start = time.perf_counter()
+    with wave.open(str(output_file), "wb") as output:
+        output.setnchannels(signal_info.channels)
+        output.setsampwidth(converter.sample_width)
+        output.setframerate(signal_info.sample_rate)
+
+        # Samples of the lead-in still to drop
+        lead_in = pipeline.latency
+        rendered = 0
+        while rendered < frames:
+            count = min(block_size, frames - rendered + lead_in)
+            block = pipeline.run_block(count)
+            skipped = min(lead_in, count)
+            lead_in -= skipped
+            if skipped == count:
+                continue
+            output.writeframes(converter.as_bytes(block[skipped:]))
+
+            rendered += count - skipped
+            if progress is not None:
+                progress(rendered, frames)
+
+    return RenderStats(
+        frames=frames,
+        sample_rate=signal_info.sample_rate,
+        elapsed=time.perf_counter() - start,
+    )
@@ -0,0 +1,188 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import math
+import os
+import time
+
+import numpy as np
+
+from pydalboard.pipeline import Pipeline
+from pydalboard.signal import SignalInfo, SignalSource
+
+
+@dataclass(eq=False)
+class Track:
+    pipeline: Pipeline
+    "Pipeline rendering the track"
+
+    gain: float = 0.0
+    "Gain of the track in the mix, in dB"
+
+    pan: float = 0.0
+    "Position in the stereo field, from -1.0 (left) to 1.0 (right)"
+
+    missed_deadlines: int = 0
+    "Number of blocks the track was not rendered in time for"
+
+    max_render_time: float = 0.0
+    "Longest time from the start of a block to the end of the track, in seconds"
+
+    def channel_gains(self, track_channels: int, channels: int) -> np.ndarray:
+        """
+        Linear gain of each output channel, with the gain and the pan.
+
+        Mono tracks are panned with constant power, stereo tracks with a
+        balance, which keeps the center at unity gain.
+        """
+        gain = 10 ** (self.gain / 20.0)
+        if channels != 2:
+            return np.full(channels, gain, dtype=np.float32)
+
+        pan = min(max(-1.0, self.pan), 1.0)
+        if track_channels == 1:
+            angle = (pan + 1) * math.pi / 4
+            gains = [math.cos(angle), math.sin(angle)]
+        else:
+            gains = [min(1.0, 1.0 - pan), min(1.0, 1.0 + pan)]
+
+        return np.array(gains, dtype=np.float32) * np.float32(gain)
+
+
+class Session(SignalSource):
+    """
+    Mix of many tracks, each with its own source and pipeline.
+
+    The tracks of a block are rendered at the same time on a pool of
+    `workers` threads, and each of them must be done within `budget` (as a
+    fraction of the duration of the block), or it is counted as late. Tracks
+    are still always mixed, so a late block is only late, not silent.
+
+    A session is a source, so that it can feed a pipeline of master effects.
+    """
+
+    def __init__(
+        self,
+        signal_info: SignalInfo,
+        workers: int | None = None,
+        budget: float = 0.8,
+    ) -> None:
+        self.info = signal_info
+        self.workers = workers or os.cpu_count() or 1
+        self.budget = budget
+
+        self.tracks: list[Track] = []
+
+        self.missed: list[Track] = []
+        "Tracks which were late for the last block"
+
+        self._output = None
+        self._max_block_size = 0
+        self._executor = None
+
+    @property
+    def signal_info(self) -> SignalInfo:
+        return self.info
+
+    @property
+    def length(self) -> int | None:
+        lengths = [track.pipeline.source.length for track in self.tracks]
+        if not lengths or None in lengths:
+            return None
+
+        return max(lengths)
+
+    def add(self, pipeline: Pipeline, gain: float = 0.0, pan: float = 0.0) -> Track:
+        """
+        Add a track rendering the pipeline.
+        """
+        track = Track(pipeline, gain, pan)
+        self.tracks.append(track)
+        self._max_block_size = 0
+        return track
+
+    def remove(self, track: Track) -> None:
+        self.tracks.remove(track)
+
+    def prepare(self, max_block_size: int) -> None:
+        """
+        Prepare every track for blocks of at most `max_block_size` samples.
+
+        Raise a ValueError if a track cannot be mixed into the session.
+        """
+        for track in self.tracks:
+            track_info = track.pipeline.source.signal_info
+            if track_info.sample_rate != self.info.sample_rate:
+                raise ValueError(
+                    f"Track at {track_info.sample_rate} Hz in a session at "
+                    f"{self.info.sample_rate} Hz"
+                )
+            if track_info.channels not in (1, self.info.channels):
+                raise ValueError(
+                    f"Track with {track_info.channels} channels in a session with "
+                    f"{self.info.channels} channels"
+                )
+            track.pipeline.prepare(max_block_size)
+
+        self._output = np.zeros((max_block_size, self.info.channels), dtype=np.float32)
+        self._max_block_size = max_block_size
+        if self.workers > 1 and self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers)
+
+    def close(self) -> None:
+        """
+        Stop the thread pool, if any.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def get_signal(self) -> tuple[np.ndarray, SignalInfo]:
+        block, signal_info = self.get_block(1)
+        return (block[0], signal_info)
+
+    def get_block(self, frames: int) -> tuple[np.ndarray, SignalInfo]:
+        if frames > self._max_block_size:
+            self.prepare(frames)
+
+        start = time.perf_counter()
+        tracks = list(self.tracks)
+        if self._executor is not None and len(tracks) > 1:
+            futures = [
+                self._executor.submit(self._render, track, frames, start)
+                for track in tracks
+            ]
+            results = (future.result() for future in futures)
+        else:
+            results = (self._render(track, frames, start) for track in tracks)
+
+        # Tracks are summed in order, so that the mix does not depend on
+        # which thread finished first
+        output = self._output[:frames]
+        output[:] = 0.0
+        deadline = self.budget * frames / self.info.sample_rate
+        missed = []
+        for track, (block, elapsed) in zip(tracks, results):
+            output += block
+
+            track.max_render_time = max(track.max_render_time, elapsed)
+            if elapsed > deadline:
+                track.missed_deadlines += 1
+                missed.append(track)
+        self.missed = missed
+
+        return (output, self.info)
+
+    def _render(self, track: Track, frames: int, start: float) -> tuple[np.ndarray, float]:
+        """
+        Render the next block of the track with its gains, and the time since
+        the start of the block once it is done.
+        """
+        block = track.pipeline.run_block(frames)
+        gains = track.channel_gains(block.shape[1], self.info.channels)
+        if block.shape[1] == self.info.channels:
+            # The block belongs to the session until the next one
+            np.multiply(block, gains, out=block)
+        else:
+            block = block * gains
+
+        return (block, time.perf_counter() - start)
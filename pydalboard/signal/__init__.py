@@ -1,5 +1,24 @@
 from .base import SignalInfo, SignalSource
+from .cache import CacheStats, SampleCache, sample_cache
+from .conversion import FormatConverter
+from .decoders import Decoder, WavDecoder, SoundFileDecoder
 from .wav import Wav
 from .oscillators import Waveform, Oscillator
+from .streaming import StreamingSource, open_file
+from .voices import VoiceBank
 
-__all__ = ["Wav", "Waveform", "Oscillator"]
+__all__ = [
+    "CacheStats",
+    "SampleCache",
+    "sample_cache",
+    "FormatConverter",
+    "Decoder",
+    "WavDecoder",
+    "SoundFileDecoder",
+    "Wav",
+    "Waveform",
+    "Oscillator",
+    "VoiceBank",
+    "StreamingSource",
+    "open_file",
+]
@@ -3,6 +3,8 @@ from dataclasses import dataclass
 
 import numpy as np
 
+from pydalboard.signal.conversion import FormatConverter
+
 
 @dataclass
 class SignalInfo:
@@ -19,13 +21,16 @@ class SignalInfo:
     "Audio channels, aka 1 for mono and 2 for stereo"
 
     def convert_to_format(self, frame: np.ndarray) -> np.ndarray:
-        match self.sample_format:
-            case 16:
-                return (frame * 32767).astype(np.int16)
-            case 32:
-                return (frame * 2147483647).astype(np.int32)
-            case _:
-                return np.zeros(2 if self.stereo else 1, np.float32)
+        """
+        Convert float samples to the sample format of the signal, in a new array.
+
+        Blocks sent to an output should rather go through a `FormatConverter`,
+        which reuses its buffers.
+        """
+        frame = np.asarray(frame, dtype=np.float32)
+        block = frame.reshape(-1, self.channels)
+        converter = FormatConverter.for_signal(self)
+        return converter.convert(block).reshape(frame.shape)
 
 
 class SignalSource(ABC):
@@ -33,5 +38,29 @@ class SignalSource(ABC):
     @abstractmethod
     def signal_info(self) -> SignalInfo: ...
 
+    @property
+    def length(self) -> int | None:
+        """
+        Number of samples of the source, or None if it is unknown or endless.
+        """
+        return None
+
     @abstractmethod
     def get_signal(self) -> tuple[np.ndarray, SignalInfo]: ...
+
+    def get_block(self, frames: int) -> tuple[np.ndarray, SignalInfo]:
+        """
+        Return the next `frames` samples as a (frames, channels) float32 array.
+
+        The returned buffer belongs to the caller until the next call, which
+        may process it in place.
+
+        This default implementation calls `get_signal` once per sample, sources
+        should override it with a vectorized version.
+        """
+        signal_info = self.signal_info
+        block = np.empty((frames, signal_info.channels), dtype=np.float32)
+        for i in range(frames):
+            block[i], signal_info = self.get_signal()
+
+        return (block, signal_info)
@@ -0,0 +1,161 @@
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from math import gcd
+from pathlib import Path
+import threading
+
+import numpy as np
+
+from pydalboard.signal.base import SignalInfo
+from pydalboard.signal.decoders import open_decoder
+
+# Samples decoded at once when loading a file of unknown length
+_CHUNK_SIZE = 65536
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    "Number of files found in the cache"
+
+    misses: int = 0
+    "Number of files decoded"
+
+    evictions: int = 0
+    "Number of files evicted to stay within the budget"
+
+    entries: int = 0
+    "Number of files in the cache"
+
+    size: int = 0
+    "Memory used by the cached samples, in bytes"
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+@dataclass
+class _Entry:
+    data: np.ndarray
+    signal_info: SignalInfo
+
+
+class SampleCache:
+    """
+    Decoded files, normalized to float32 and optionally resampled, shared by
+    every source playing them.
+
+    Files are identified by their path, their modification time and the
+    sample rate they are resampled to, so a modified file is decoded again.
+    The least recently used files are evicted once the cache holds more than
+    `budget` bytes, files larger than the budget are not kept at all.
+
+    The samples are read-only. An evicted file stays valid for the sources
+    still playing it.
+    """
+
+    def __init__(self, budget: int = 256 * 2**20) -> None:
+        self.budget = budget
+        "Memory available for the samples, in bytes"
+
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        Copy of the statistics of the cache.
+        """
+        with self._lock:
+            return replace(self._stats)
+
+    def clear(self) -> None:
+        """
+        Remove every file from the cache, and reset the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._stats = CacheStats()
+
+    def get(
+        self, file: Path, sample_rate: int | None = None
+    ) -> tuple[np.ndarray, SignalInfo]:
+        """
+        Samples of the file as a read-only (frames, channels) float32 array,
+        resampled to `sample_rate` if given, and their signal information.
+        """
+        file = file.resolve()
+        key = (file, file.stat().st_mtime_ns, sample_rate)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return (entry.data, entry.signal_info)
+            self._stats.misses += 1
+
+        # Files are decoded without the lock, so that other files can be read
+        # meanwhile, at the cost of decoding a file twice if it is requested
+        # twice at the same time
+        entry = _decode(file, sample_rate)
+
+        with self._lock:
+            if entry.data.nbytes <= self.budget and key not in self._entries:
+                self._entries[key] = entry
+                self._stats.entries += 1
+                self._stats.size += entry.data.nbytes
+                self._evict()
+
+        return (entry.data, entry.signal_info)
+
+    def _evict(self) -> None:
+        while self._stats.size > self.budget:
+            _, entry = self._entries.popitem(last=False)
+            self._stats.evictions += 1
+            self._stats.entries -= 1
+            self._stats.size -= entry.data.nbytes
+
+
+def _decode(file: Path, sample_rate: int | None) -> _Entry:
+    decoder = open_decoder(file)
+    try:
+        signal_info = decoder.signal_info
+        channels = signal_info.channels
+        if decoder.length is not None:
+            data = np.zeros((decoder.length, channels), dtype=np.float32)
+            data = data[: decoder.read(data)]
+        else:
+            chunks = []
+            while True:
+                chunk = np.zeros((_CHUNK_SIZE, channels), dtype=np.float32)
+                frames = decoder.read(chunk)
+                if frames == 0:
+                    break
+                chunks.append(chunk[:frames])
+            data = np.concatenate(chunks or [np.zeros((0, channels), np.float32)])
+    finally:
+        decoder.close()
+
+    if sample_rate is not None and sample_rate != signal_info.sample_rate:
+        # scipy.signal takes longer to import than the whole package
+        from scipy.signal import resample_poly
+
+        divisor = gcd(sample_rate, signal_info.sample_rate)
+        data = resample_poly(
+            data,
+            sample_rate // divisor,
+            signal_info.sample_rate // divisor,
+            axis=0,
+        ).astype(np.float32)
+        signal_info = replace(signal_info, sample_rate=sample_rate)
+
+    data.flags.writeable = False
+    return _Entry(data, signal_info)
+
+
+sample_cache = SampleCache()
+"Cache shared by the whole process"
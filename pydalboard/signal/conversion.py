@@ -0,0 +1,132 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from pydalboard.signal.base import SignalInfo
+
+# Largest float32 below 2 ** 31, higher values would overflow int32
+_INT32_LIMIT = float(np.nextafter(np.float32(2**31), np.float32(0)))
+
+INT24 = np.dtype("V3")
+"Packed 24-bit little-endian samples"
+
+
+class FormatConverter:
+    """
+    Convert float blocks to an output sample format, into a reusable buffer.
+
+    Integer formats (16, 24 and 32 bits) are scaled, optionally dithered
+    with TPDF noise of one least significant bit, rounded and clipped, so that
+    samples beyond [-1.0, 1.0] saturate instead of wrapping around. 24-bit
+    samples are packed on 3 bytes. Float samples are passed through.
+
+    The converted block belongs to the caller until the next conversion.
+    """
+
+    def __init__(
+        self,
+        sample_format: int,
+        channels: int,
+        floating: bool = False,
+        dither: bool = False,
+        max_block_size: int = 512,
+    ) -> None:
+        if floating and sample_format != 32:
+            raise ValueError("Only 32-bit float output is supported")
+        if not floating and sample_format not in (16, 24, 32):
+            raise ValueError("Unsupported sample format")
+
+        self.sample_format = sample_format
+        self.channels = channels
+        self.floating = floating
+        self.dither = dither
+
+        match (sample_format, floating):
+            case (32, True):
+                self.dtype = np.dtype(np.float32)
+                self._scale, self._limit = 1.0, None
+            case (16, False):
+                self.dtype = np.dtype(np.int16)
+                self._scale, self._limit = 32767.0, 32767.0
+            case (24, False):
+                self.dtype = INT24
+                self._scale, self._limit = 8388607.0, 8388607.0
+            case (32, False):
+                self.dtype = np.dtype(np.int32)
+                self._scale, self._limit = 2147483647.0, _INT32_LIMIT
+
+        self._rng = np.random.default_rng() if dither else None
+        self._allocate(max_block_size)
+
+    @classmethod
+    def for_signal(
+        cls, signal_info: "SignalInfo", dither: bool = False
+    ) -> "FormatConverter":
+        """
+        Converter to the sample format of the signal, 64-bit float signals
+        being output as 32-bit float, and 8-bit signals as 16-bit.
+        """
+        if signal_info.sample_format == 64:
+            return cls(32, signal_info.channels, floating=True)
+        if signal_info.sample_format == 8:
+            return cls(16, signal_info.channels, dither=dither)
+
+        return cls(signal_info.sample_format, signal_info.channels, dither=dither)
+
+    @property
+    def sample_width(self) -> int:
+        """
+        Size of a sample, in bytes.
+        """
+        return self.dtype.itemsize
+
+    def _allocate(self, frames: int) -> None:
+        shape = (frames, self.channels)
+        self._output = np.zeros(shape, dtype=self.dtype)
+        self._scaled = np.zeros(shape, dtype=np.float32)
+        self._noise = np.zeros(shape, dtype=np.float32) if self.dither else None
+        if self.dtype == INT24:
+            self._wide = np.zeros(shape, dtype="<i4")
+
+    def convert(self, block: np.ndarray) -> np.ndarray:
+        """
+        Convert the (frames, channels) float block.
+        """
+        frames = len(block)
+        if frames > len(self._output):
+            self._allocate(frames)
+
+        output = self._output[:frames]
+        if self.floating:
+            output[:] = block
+            return output
+
+        scaled = self._scaled[:frames]
+        np.multiply(block, self._scale, out=scaled)
+        if self.dither:
+            # Difference of two uniform noises has a triangular distribution
+            noise = self._noise[:frames]
+            self._rng.random(dtype=np.float32, out=noise)
+            scaled += noise
+            self._rng.random(dtype=np.float32, out=noise)
+            scaled -= noise
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, -self._limit, self._limit, out=scaled)
+
+        if self.dtype == INT24:
+            # Keep the 3 least significant bytes of each 32-bit sample
+            wide = self._wide[:frames]
+            np.copyto(wide, scaled, casting="unsafe")
+            packed = output.view(np.uint8).reshape(frames, self.channels, 3)
+            packed[:] = wide.view(np.uint8).reshape(frames, self.channels, 4)[..., :3]
+        else:
+            np.copyto(output, scaled, casting="unsafe")
+
+        return output
+
+    def as_bytes(self, block: np.ndarray) -> memoryview:
+        """
+        Convert the block, and expose the result as bytes without copying it.
+        """
+        return memoryview(self.convert(block).reshape(-1).view(np.uint8))
@@ -0,0 +1,247 @@
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from pathlib import Path
+import struct
+
+import numpy as np
+
+from pydalboard.signal.base import SignalInfo
+
+# Format codes of the WAV format chunk
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Sample widths, in bytes, supported for each format
+SUPPORTED_FORMATS = {
+    (WAVE_FORMAT_PCM, 1),
+    (WAVE_FORMAT_PCM, 2),
+    (WAVE_FORMAT_PCM, 3),
+    (WAVE_FORMAT_PCM, 4),
+    (WAVE_FORMAT_IEEE_FLOAT, 4),
+    (WAVE_FORMAT_IEEE_FLOAT, 8),
+}
+
+
+class Decoder(ABC):
+    """
+    Reader of an audio file, decoding it block by block into float32 samples.
+    """
+
+    @property
+    @abstractmethod
+    def signal_info(self) -> SignalInfo: ...
+
+    @property
+    @abstractmethod
+    def length(self) -> int | None:
+        """
+        Number of samples of the file, or None if it is unknown.
+        """
+
+    @abstractmethod
+    def read(self, out: np.ndarray) -> int:
+        """
+        Decode the next samples into the (frames, channels) float32 buffer,
+        and return how many were decoded, 0 at the end of the file.
+        """
+
+    @abstractmethod
+    def seek(self, index: int) -> None:
+        """
+        Move the read position to the given sample.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class WavDecoder(Decoder):
+    """
+    Decode WAV files of any PCM width (8, 16, 24 and 32 bits) and float
+    samples (32 and 64 bits).
+
+    The file is memory-mapped, and only the samples read are decoded.
+    """
+
+    def __init__(self, file: Path) -> None:
+        with open(file, "rb") as f:
+            riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+            if riff != b"RIFF" or wave != b"WAVE":
+                raise ValueError(f"{file} is not a WAV file")
+
+            format_chunk = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"{file} has no audio data")
+
+                chunk_id, size = struct.unpack("<4sI", header)
+                if chunk_id == b"data":
+                    offset = f.tell()
+                    break
+                if chunk_id == b"fmt ":
+                    format_chunk = f.read(size)
+                else:
+                    f.seek(size, 1)
+                # Chunks are aligned on 2 bytes
+                f.seek(size % 2, 1)
+
+        if format_chunk is None:
+            raise ValueError(f"{file} has no format chunk")
+
+        audio_format, channels, sample_rate, _, block_align, _ = struct.unpack(
+            "<HHIIHH", format_chunk[:16]
+        )
+        if audio_format == WAVE_FORMAT_EXTENSIBLE and len(format_chunk) >= 26:
+            # The actual format starts the sub-format GUID
+            (audio_format,) = struct.unpack("<H", format_chunk[24:26])
+
+        # Samples are stored in containers of whole bytes
+        self.width = block_align // channels
+        self.floating = audio_format == WAVE_FORMAT_IEEE_FLOAT
+        if (audio_format, self.width) not in SUPPORTED_FORMATS:
+            raise ValueError(
+                f"Unsupported WAV format {audio_format} on {self.width * 8} bits"
+            )
+
+        # Streaming writers may leave the size of the data unset
+        size = min(size, file.stat().st_size - offset)
+        self.frames = size // block_align
+        self.data = (
+            np.memmap(file, dtype=np.uint8, mode="r", offset=offset, shape=(size,))
+            if size
+            else np.zeros(0, dtype=np.uint8)
+        )
+
+        self.info = SignalInfo(sample_rate, self.width * 8, channels)
+        self.position = 0
+
+        # Scratch buffer of the 24-bit samples, widened to 32 bits
+        self._wide = np.zeros(0, dtype="<i4")
+
+    @property
+    def signal_info(self) -> SignalInfo:
+        return self.info
+
+    @property
+    def length(self) -> int:
+        return self.frames
+
+    def seek(self, index: int) -> None:
+        if not 0 <= index <= self.frames:
+            raise ValueError(f"Sample {index} is outside of the file")
+
+        self.position = index
+
+    def read(self, out: np.ndarray) -> int:
+        count = min(len(out), self.frames - self.position)
+        if count <= 0:
+            return 0
+
+        channels = self.info.channels
+        start = self.position * channels * self.width
+        raw = self.data[start : start + count * channels * self.width]
+        out = out[:count]
+        self.position += count
+
+        match (self.floating, self.width):
+            case (True, 4):
+                np.copyto(out, raw.view("<f4").reshape(count, channels))
+            case (True, 8):
+                samples = raw.view("<f8").reshape(count, channels)
+                np.copyto(out, samples, casting="same_kind")
+            case (False, 1):
+                # 8-bit samples are unsigned
+                np.multiply(raw.reshape(count, channels), 1 / 128, out=out)
+                out -= 1.0
+            case (False, 2):
+                samples = raw.view("<i2").reshape(count, channels)
+                np.multiply(samples, 1 / 32767, out=out)
+            case (False, 3):
+                # Write the 3 bytes in the upper bytes of a 32-bit integer,
+                # and shift them back down to extend the sign
+                if len(self._wide) < count * channels:
+                    self._wide = np.zeros(count * channels, dtype="<i4")
+                wide = self._wide[: count * channels]
+                wide.view(np.uint8).reshape(-1, 4)[:, 1:] = raw.reshape(-1, 3)
+                np.right_shift(wide, 8, out=wide)
+                np.multiply(wide.reshape(count, channels), 1 / 8388607, out=out)
+            case (False, 4):
+                samples = raw.view("<i4").reshape(count, channels)
+                np.multiply(samples, 1 / 2147483647, out=out)
+
+        return count
+
+
+class SoundFileDecoder(Decoder):
+    """
+    Decode FLAC, OGG and MP3 files (among others) with libsndfile.
+
+    The soundfile package is an optional dependency, only imported when such
+    a file is opened.
+    """
+
+    # Sample format of the lossless subtypes, lossy files are read as 16 bits
+    SAMPLE_FORMATS = {
+        "PCM_S8": 8,
+        "PCM_U8": 8,
+        "PCM_16": 16,
+        "PCM_24": 24,
+        "PCM_32": 32,
+        "FLOAT": 32,
+        "DOUBLE": 64,
+    }
+
+    def __init__(self, file: Path) -> None:
+        try:
+            import soundfile
+        except ImportError as e:
+            raise ImportError(
+                f"soundfile is required to decode {file.suffix} files"
+            ) from e
+
+        self.file = soundfile.SoundFile(str(file))
+        self.info = SignalInfo(
+            sample_rate=self.file.samplerate,
+            sample_format=self.SAMPLE_FORMATS.get(self.file.subtype, 16),
+            channels=self.file.channels,
+        )
+
+    @property
+    def signal_info(self) -> SignalInfo:
+        return self.info
+
+    @property
+    def length(self) -> int | None:
+        return self.file.frames if self.file.frames >= 0 else None
+
+    def seek(self, index: int) -> None:
+        self.file.seek(index)
+
+    def read(self, out: np.ndarray) -> int:
+        return len(self.file.read(out=out))
+
+    def close(self) -> None:
+        self.file.close()
+
+
+DECODERS: dict[str, Callable[[Path], Decoder]] = {
+    ".wav": WavDecoder,
+    ".flac": SoundFileDecoder,
+    ".ogg": SoundFileDecoder,
+    ".mp3": SoundFileDecoder,
+}
+"Decoder of each file extension, more can be registered"
+
+
+def open_decoder(file: Path) -> Decoder:
+    """
+    Open the file with the decoder matching its extension.
+    """
+    try:
+        decoder = DECODERS[file.suffix.lower()]
+    except KeyError:
+        raise ValueError(f"No decoder for {file.suffix} files") from None
+
+    return decoder(file)
@@ -1,9 +1,8 @@
 from pydalboard.signal.base import SignalInfo, SignalSource
 
+from functools import cache
 import math
-import matplotlib.pyplot as plt
 import numpy as np
-from pathlib import Path
 
 from enum import Enum
 
@@ -15,9 +14,63 @@ class Waveform(Enum):
     SAWTOOTH = 4
 
 
-class Oscillator(SignalSource):
-    __PLOT_WAVEFORM__ = True
+@cache
+def get_wavetables(waveform: Waveform, table_size: int) -> np.ndarray:
+    """
+    Band-limited tables of one cycle of the waveform, one per octave.
+
+    Table `i` holds at most `table_size / 2 ** (i + 1)` harmonics, so that it
+    can be played up to `sample_rate / table_size * 2 ** i` Hz without
+    aliasing. Each table has an extra sample, equal to the first one, to
+    interpolate past the end of the cycle.
+
+    The tables are shared by all the oscillators using the same waveform and
+    table size, and are read-only.
+    """
+    levels = int(math.log2(table_size // 2)) + 1
+    tables = np.empty((levels, table_size + 1), dtype=np.float32)
+
+    harmonics = np.arange(table_size // 2 + 1)
+    with np.errstate(divide="ignore"):
+        match waveform:
+            case Waveform.SINE:
+                amplitudes = (harmonics == 1).astype(np.float64)
+            case Waveform.TRIANGLE:
+                signs = np.where(harmonics % 4 == 1, 1.0, -1.0)
+                amplitudes = np.where(harmonics % 2 == 1, signs / harmonics**2, 0.0)
+            case Waveform.SQUARE:
+                amplitudes = np.where(harmonics % 2 == 1, 1.0 / harmonics, 0.0)
+            case Waveform.SAWTOOTH:
+                signs = np.where(harmonics % 2 == 1, 1.0, -1.0)
+                amplitudes = np.where(harmonics > 0, signs / harmonics, 0.0)
+
+    for level in range(levels):
+        # Sum of sines, up to the highest harmonic allowed in this octave
+        spectrum = -0.5j * table_size * amplitudes
+        spectrum[harmonics > (table_size // 2) >> level] = 0.0
+        table = np.fft.irfft(spectrum, n=table_size)
+
+        # Normalize the table
+        tables[level, :-1] = table / np.abs(table).max()
+        tables[level, -1] = tables[level, 0]
+
+    tables.flags.writeable = False
+    return tables
+
 
+def table_level(
+    frequency: float, sample_rate: int, table_size: int, levels: int
+) -> int:
+    """
+    Wavetable with as many harmonics as possible below the Nyquist frequency,
+    for the frequency.
+    """
+    max_harmonics = sample_rate / 2 / abs(frequency)
+    level = math.ceil(math.log2(table_size / 2 / max(1.0, max_harmonics)))
+    return min(max(0, level), levels - 1)
+
+
+class Oscillator(SignalSource):
     def __init__(
         self,
         waveform: Waveform,
@@ -27,6 +80,9 @@ class Oscillator(SignalSource):
         table_size: int = 1024,
         cycles: int | None = None,
     ):
+        if table_size & (table_size - 1):
+            raise ValueError("table_size must be a power of two")
+
         self.waveform = waveform
         self.frequency = frequency
         self.phase = phase
@@ -35,77 +91,65 @@ class Oscillator(SignalSource):
         self.table_size = table_size  # Audio resolution (number of samples)
         self.cycles = cycles
 
-        # Current position in the waveform
-        self.t = phase % 1.0
+        # Number of cycles played, and position in the current cycle from the
+        # initial phase, as a fraction of a cycle
         self.cycles_played = 0
-        self.total_samples = 0
+        self.position = 0.0
 
-        # Precompute waveform table
-        self._table = self._compute_waveform_table()
-        self._table_size = len(self._table)
-
-        # Plot the waveform and save it to a file if __PLOT_WAVEFORM__ is True
-        if self.__PLOT_WAVEFORM__:
-            self._plot_waveform(self._table, self.waveform)
+        # Precomputed band-limited waveform tables
+        self._tables = get_wavetables(self.waveform, self.table_size)
+        self._table_frequency = None
 
     @property
     def signal_info(self) -> SignalInfo:
         return self.info
 
     def get_signal(self) -> tuple[np.ndarray, SignalInfo]:
-        # Stop the sound if the number of cycles is reached
-        if self.cycles is not None and self.cycles_played >= self.cycles:
-            return (np.zeros(2, dtype="float32"), self.signal_info)
-
-        index = int(self.t * self.frequency * self._table_size) % self.table_size
-        value = self._table[index]
-
-        frame = np.array([value, value], dtype="float32")
-        self.t += 1 / self.signal_info.sample_rate
-        self.total_samples += 1
-
-        # Check if a cycle has completed
-        if self.total_samples >= self.signal_info.sample_rate / self.frequency:
-            self.cycles_played += 1
-            self.total_samples = 0
+        block, signal_info = self.get_block(1)
+        return (block[0], signal_info)
 
-        return (frame, self.signal_info)
+    def get_block(self, frames: int) -> tuple[np.ndarray, SignalInfo]:
+        block = np.zeros((frames, self.signal_info.channels), dtype=np.float32)
 
-    def _compute_waveform_table(self) -> np.ndarray:
-        table = np.zeros(self.table_size, dtype="float32")
-        theta_step = 2 * math.pi / self.table_size
+        # Phase increment of a sample, as a fraction of a cycle
+        increment = self.frequency / self.signal_info.sample_rate
+        positions = self.position + increment * np.arange(frames)
 
-        for i in range(self.table_size):
-            theta = i * theta_step + self.phase * 2 * math.pi
-
-            match self.waveform:
-                case Waveform.SINE:
-                    table[i] = math.sin(theta)
-                case Waveform.TRIANGLE:
-                    table[i] = 2 / math.pi * math.asin(math.sin(theta))
-                case Waveform.SQUARE:
-                    table[i] = 1 if (i / self.table_size) % 1 < 0.5 else -1
-                case Waveform.SAWTOOTH:
-                    table[i] = 2 / math.pi * math.atan(math.tan(theta / 2))
-
-        # Normalize the table
-        table /= max(abs(table.min()), abs(table.max()))
-
-        return table
-
-    def _plot_waveform(self, data: np.ndarray, waveform: Waveform):
-        # Plot the waveform
-        plt.figure(figsize=(10, 4))
-        plt.plot(data)
-        plt.title(f"{waveform.name} Waveform")
-        plt.xlabel("Sample")
-        plt.ylabel("Amplitude")
-        plt.grid(True)
-
-        # Save the plot to a file
-        output_directory = Path("_waveforms")
-        output_directory.mkdir(exist_ok=True)
-
-        output_file = output_directory / f"{waveform.name.lower()}_waveform.png"
-        plt.savefig(output_file)
-        plt.close()
+        # Stop the sound if the number of cycles is reached
+        playing = frames
+        if self.cycles is not None:
+            remaining = self.cycles - self.cycles_played
+            if remaining <= 0:
+                return (block, self.signal_info)
+            playing = min(frames, math.ceil((remaining - self.position) / increment))
+
+        # Linear interpolation in the table matching the frequency
+        index = ((positions[:playing] + self.phase) % 1.0) * self.table_size
+        fraction = index % 1.0
+        index = index.astype(np.intp)
+
+        table = self._get_table()
+        values = table[index] * (1.0 - fraction) + table[index + 1] * fraction
+        block[:playing] = values[:, np.newaxis]
+
+        # Only the fraction of a cycle is kept, to preserve the precision
+        end = self.position + increment * frames
+        self.cycles_played += int(end)
+        self.position = end % 1.0
+
+        return (block, self.signal_info)
+
+    def _get_table(self) -> np.ndarray:
+        """
+        Table with as many harmonics as possible below the Nyquist frequency.
+        """
+        if self._table_frequency != self.frequency:
+            self._table_level = table_level(
+                self.frequency,
+                self.signal_info.sample_rate,
+                self.table_size,
+                len(self._tables),
+            )
+            self._table_frequency = self.frequency
+
+        return self._tables[self._table_level]
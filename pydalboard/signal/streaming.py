@@ -0,0 +1,182 @@
+from pathlib import Path
+import queue
+import threading
+
+import numpy as np
+
+from pydalboard.signal.base import SignalInfo, SignalSource
+from pydalboard.signal.decoders import Decoder, open_decoder
+
+
+class StreamingSource(SignalSource):
+    """
+    Source streaming a file, decoded ahead of time on a thread.
+
+    The decoder fills chunks of `chunk_size` samples, and queues up to
+    `prefetch` of them in advance. Chunks are recycled once they are read, so
+    nothing is allocated while streaming. The first chunks are decoded before
+    the source is returned.
+
+    In `realtime` mode, a block requested before its chunk is decoded is
+    completed with silence and counted as an underrun, so that the render
+    thread never waits for the disk. Otherwise (to render to a file), the
+    source waits for the decoder.
+    """
+
+    def __init__(
+        self,
+        decoder: Decoder,
+        loop: bool = False,
+        chunk_size: int = 16384,
+        prefetch: int = 8,
+        realtime: bool = True,
+    ) -> None:
+        self.decoder = decoder
+        self.loop = loop
+        self.realtime = realtime
+
+        self.underruns = 0
+        "Number of blocks which were not decoded in time"
+
+        channels = decoder.signal_info.channels
+        self._chunks = [
+            np.zeros((chunk_size, channels), dtype=np.float32)
+            for _ in range(prefetch + 1)
+        ]
+        self._prefetch = prefetch
+        self._block = np.zeros((0, channels), dtype=np.float32)
+
+        self._start()
+
+    @property
+    def signal_info(self) -> SignalInfo:
+        return self.decoder.signal_info
+
+    @property
+    def length(self) -> int | None:
+        return None if self.loop else self.decoder.length
+
+    def _start(self) -> None:
+        # Chunks to decode, and decoded chunks with their number of samples
+        self._free = queue.Queue()
+        for chunk in self._chunks:
+            self._free.put(chunk)
+        self._ready = queue.Queue(maxsize=self._prefetch)
+
+        self._chunk = None
+        self._chunk_frames = 0
+        self._chunk_position = 0
+        self._ended = False
+
+        self._running = True
+        self._error = None
+        self._primed = threading.Event()
+        self._thread = threading.Thread(target=self._decode, daemon=True)
+        self._thread.start()
+        self._primed.wait()
+
+    def _stop(self) -> None:
+        self._running = False
+        # Unblock the decoder, whether it waits for a chunk or for room
+        self._free.put(None)
+        while self._thread.is_alive():
+            try:
+                self._ready.get(timeout=0.01)
+            except queue.Empty:
+                pass
+        self._thread.join()
+
+    def _decode(self) -> None:
+        try:
+            while self._running:
+                chunk = self._free.get()
+                if chunk is None:
+                    break
+
+                # A looping file starts over once it ends, which may be right
+                # at the end of the previous chunk
+                frames = self.decoder.read(chunk)
+                while self.loop and frames < len(chunk):
+                    self.decoder.seek(0)
+                    read = self.decoder.read(chunk[frames:])
+                    if read == 0:
+                        break
+                    frames += read
+
+                self._ready.put((chunk, frames))
+                if self._ready.full():
+                    self._primed.set()
+                if frames == 0:
+                    break
+        except Exception as e:
+            # Raised again by the reader, which gets no more chunks
+            self._error = e
+            self._ready.put((None, 0))
+        finally:
+            self._primed.set()
+
+    def close(self) -> None:
+        """
+        Stop the decoder thread, and close the file.
+        """
+        self._stop()
+        self.decoder.close()
+
+    def seek(self, index: int) -> None:
+        """
+        Move the source to the given sample, and decode ahead from there.
+        """
+        self._stop()
+        self.decoder.seek(index)
+        self._start()
+
+    def get_signal(self) -> tuple[np.ndarray, SignalInfo]:
+        block, signal_info = self.get_block(1)
+        return (block[0], signal_info)
+
+    def get_block(self, frames: int) -> tuple[np.ndarray, SignalInfo]:
+        if frames > len(self._block):
+            self._block = np.zeros((frames, self.signal_info.channels), dtype=np.float32)
+        block = self._block[:frames]
+
+        written = 0
+        while written < frames:
+            if self._chunk is None:
+                if self._ended:
+                    break
+                try:
+                    chunk, chunk_frames = self._ready.get(block=not self.realtime)
+                except queue.Empty:
+                    self.underruns += 1
+                    break
+                if chunk is None:
+                    raise self._error
+                if chunk_frames == 0:
+                    self._ended = True
+                    self._free.put(chunk)
+                    break
+                self._chunk = chunk
+                self._chunk_frames = chunk_frames
+                self._chunk_position = 0
+
+            count = min(frames - written, self._chunk_frames - self._chunk_position)
+            start = self._chunk_position
+            block[written : written + count] = self._chunk[start : start + count]
+            written += count
+            self._chunk_position += count
+
+            if self._chunk_position == self._chunk_frames:
+                self._free.put(self._chunk)
+                self._chunk = None
+
+        block[written:] = 0.0
+        return (block, self.signal_info)
+
+
+def open_file(file: Path, loop: bool = False, **options) -> StreamingSource:
+    """
+    Stream the file, with the decoder matching its extension.
+
+    The options are passed to the `StreamingSource`.
+    """
+    return StreamingSource(open_decoder(file), loop=loop, **options)
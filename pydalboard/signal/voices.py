@@ -0,0 +1,263 @@
+from functools import cache
+import threading
+
+import numpy as np
+
+from pydalboard.signal.base import SignalInfo, SignalSource
+from pydalboard.signal.oscillators import Waveform, get_wavetables, table_level
+
+
+@cache
+def get_sample_pairs(waveform: Waveform, table_size: int) -> np.ndarray:
+    """
+    Samples of the wavetables of the waveform, each with the next one, as a
+    (levels * table_size, 2) array.
+
+    A single gather reads both samples to interpolate between, for every
+    voice and every sample of a block.
+    """
+    tables = get_wavetables(waveform, table_size)
+    pairs = np.stack([tables[:, :-1], tables[:, 1:]], axis=-1).reshape(-1, 2)
+    pairs.flags.writeable = False
+    return pairs
+
+
+class VoiceBank(SignalSource):
+    """
+    Polyphonic oscillator, playing up to `voices` notes of the same waveform.
+
+    The state of the voices is held in arrays, and a block is rendered for
+    every voice at once: one gather from the shared wavetables, and a sum.
+    Notes start and stop with linear ramps of `attack` and `release` ms. A
+    note played while every voice is busy steals the quietest voice being
+    released, or else the oldest voice, whose phase continues so that it
+    does not click.
+
+    Notes can be played from another thread than the one rendering the
+    blocks.
+    """
+
+    def __init__(
+        self,
+        waveform: Waveform,
+        signal_info: SignalInfo,
+        voices: int = 16,
+        table_size: int = 1024,
+        attack: float = 5.0,
+        release: float = 50.0,
+    ) -> None:
+        if table_size & (table_size - 1):
+            raise ValueError("table_size must be a power of two")
+
+        self.waveform = waveform
+        self.info = signal_info
+        self.table_size = table_size
+        self.attack = attack
+        self.release = release
+
+        self._levels = len(get_wavetables(waveform, table_size))
+        self._pairs = get_sample_pairs(waveform, table_size)
+
+        # State of each voice
+        self.notes = np.full(voices, -1, dtype=np.int64)
+        "Note played by each voice, -1 for free voices"
+
+        self.frequencies = np.zeros(voices)
+        "Frequency of each voice, in Hz"
+
+        self.positions = np.zeros(voices)
+        "Position of each voice in its cycle, as a fraction of a cycle"
+
+        self.gains = np.zeros(voices, dtype=np.float32)
+        "Current amplitude of each voice"
+
+        self.targets = np.zeros(voices, dtype=np.float32)
+        "Amplitude each voice ramps to, 0.0 while it is released"
+
+        self.steps = np.zeros(voices, dtype=np.float32)
+        "Change of the amplitude of each voice per sample, during its ramp"
+
+        self.offsets = np.zeros(voices, dtype=np.intp)
+        "Start of the wavetable of each voice, in the sample pairs"
+
+        self.started = np.zeros(voices, dtype=np.int64)
+        "Order in which the voices started, to steal the oldest one"
+
+        self._notes_played = 0
+        self._lock = threading.Lock()
+
+        # Buffers of a block, for every voice, allocated for the largest block
+        self._max_block_size = 0
+        self._block = np.zeros((0, signal_info.channels), dtype=np.float32)
+
+    @property
+    def signal_info(self) -> SignalInfo:
+        return self.info
+
+    @property
+    def active_voices(self) -> int:
+        """
+        Number of voices playing, or being released.
+        """
+        return int(np.count_nonzero(self.notes >= 0))
+
+    def note_on(self, note: int, frequency: float, amplitude: float = 1.0) -> int:
+        """
+        Play the note at the given frequency, and return the voice playing it.
+
+        A note which is already playing is played again by the same voice.
+        """
+        with self._lock:
+            voice = self._allocate(note)
+            if self.notes[voice] < 0:
+                self.positions[voice] = 0.0
+                self.gains[voice] = 0.0
+
+            self.notes[voice] = note
+            self.frequencies[voice] = frequency
+            level = table_level(
+                frequency, self.info.sample_rate, self.table_size, self._levels
+            )
+            self.offsets[voice] = level * self.table_size
+            self.targets[voice] = amplitude
+            ramp = abs(amplitude - self.gains[voice])
+            self.steps[voice] = ramp / self._ms_to_samples(self.attack)
+
+            self._notes_played += 1
+            self.started[voice] = self._notes_played
+
+        return voice
+
+    def note_off(self, note: int) -> None:
+        """
+        Release the note, which stops once its amplitude ramped down to 0.0.
+        """
+        with self._lock:
+            voices = np.flatnonzero(self.notes == note)
+            self.targets[voices] = 0.0
+            self.steps[voices] = self.gains[voices] / self._ms_to_samples(self.release)
+            # Voices which were still silent are freed at once
+            self.notes[voices[self.gains[voices] == 0.0]] = -1
+
+    def all_notes_off(self) -> None:
+        for note in np.unique(self.notes[self.notes >= 0]):
+            self.note_off(int(note))
+
+    def _ms_to_samples(self, time: float) -> float:
+        return max(1.0, self.info.sample_rate * time / 1000)
+
+    def _allocate(self, note: int) -> int:
+        """
+        Voice to play the note: the one already playing it, a free one, or a
+        stolen one.
+        """
+        for candidates in (self.notes == note, self.notes < 0):
+            voices = np.flatnonzero(candidates)
+            if len(voices):
+                return int(voices[0])
+
+        released = np.flatnonzero(self.targets == 0.0)
+        if len(released):
+            return int(released[np.argmin(self.gains[released])])
+
+        return int(np.argmin(self.started))
+
+    def _prepare(self, frames: int) -> None:
+        """
+        Allocate the buffers of the voices for blocks of `frames` samples.
+
+        The buffers are flat, so that the views of smaller blocks, with fewer
+        voices, are contiguous.
+        """
+        voices = len(self.notes)
+        self._max_block_size = frames
+        self._block = np.zeros((frames, self.info.channels), dtype=np.float32)
+        self._sample_indices = np.arange(frames, dtype=np.float64)
+        self._ramp = np.arange(1, frames + 1, dtype=np.float32)
+        self._phases = np.zeros(voices * frames)
+        self._indices = np.zeros(voices * frames, dtype=np.intp)
+        self._fractions = np.zeros(voices * frames, dtype=np.float32)
+        self._samples = np.zeros(voices * frames * 2, dtype=np.float32)
+        self._values = np.zeros(voices * frames, dtype=np.float32)
+        self._envelopes = np.zeros(voices * frames, dtype=np.float32)
+        self._mix = np.zeros(frames, dtype=np.float32)
+
+    def get_signal(self) -> tuple[np.ndarray, SignalInfo]:
+        block, signal_info = self.get_block(1)
+        return (block[0], signal_info)
+
+    def get_block(self, frames: int) -> tuple[np.ndarray, SignalInfo]:
+        if frames > self._max_block_size:
+            self._prepare(frames)
+        block = self._block[:frames]
+
+        with self._lock:
+            voices = np.flatnonzero(self.notes >= 0)
+            if len(voices) == 0:
+                block[:] = 0.0
+                return (block, self.signal_info)
+
+            mix = self._render(voices, frames)
+
+        block[:] = mix[:, np.newaxis]
+        return (block, self.signal_info)
+
+    def _render(self, voices: np.ndarray, frames: int) -> np.ndarray:
+        """
+        Render and sum the voices, and move them to the end of the block.
+        """
+        count = len(voices)
+        shape = (count, frames)
+        size = count * frames
+
+        # Position of every sample of every voice in its wavetable
+        increments = self.frequencies[voices] / self.info.sample_rate
+        phases = self._phases[:size].reshape(shape)
+        np.multiply(
+            increments[:, np.newaxis], self._sample_indices[:frames], out=phases
+        )
+        phases += self.positions[voices, np.newaxis]
+        np.mod(phases, 1.0, out=phases)
+        phases *= self.table_size
+
+        indices = self._indices[:size].reshape(shape)
+        np.copyto(indices, phases, casting="unsafe")
+        # The phase may be rounded up to the end of the cycle
+        np.minimum(indices, self.table_size - 1, out=indices)
+        fractions = self._fractions[:size].reshape(shape)
+        np.subtract(phases, indices, out=fractions, casting="same_kind")
+        indices += self.offsets[voices, np.newaxis]
+
+        # Linear interpolation between the samples read by a single gather
+        samples = self._samples[: size * 2].reshape(count, frames, 2)
+        np.take(self._pairs, indices, axis=0, out=samples, mode="clip")
+        values = self._values[:size].reshape(shape)
+        np.subtract(samples[..., 1], samples[..., 0], out=values)
+        values *= fractions
+        values += samples[..., 0]
+
+        # Amplitude of each voice, ramping linearly to its target
+        gains = self.gains[voices]
+        targets = self.targets[voices]
+        steps = np.where(targets >= gains, self.steps[voices], -self.steps[voices])
+        envelopes = self._envelopes[:size].reshape(shape)
+        np.multiply(steps[:, np.newaxis], self._ramp[:frames], out=envelopes)
+        envelopes += gains[:, np.newaxis]
+        np.clip(
+            envelopes,
+            np.minimum(gains, targets)[:, np.newaxis],
+            np.maximum(gains, targets)[:, np.newaxis],
+            out=envelopes,
+        )
+        values *= envelopes
+
+        mix = self._mix[:frames]
+        np.sum(values, axis=0, out=mix)
+
+        # Only the fraction of a cycle is kept, to preserve the precision
+        self.positions[voices] = (self.positions[voices] + increments * frames) % 1.0
+        self.gains[voices] = envelopes[:, -1]
+        released = voices[(targets == 0.0) & (envelopes[:, -1] == 0.0)]
+        self.notes[released] = -1
+
+        return mix
@@ -4,54 +4,135 @@ import numpy as np
 from scipy.io import wavfile
 
 from pydalboard.signal.base import SignalSource, SignalInfo
+from pydalboard.signal.cache import SampleCache, sample_cache
 
 
 class Wav(SignalSource):
-    def __init__(self, file: Path, loop: bool) -> None:
-        sample_rate, data = wavfile.read(file.absolute())
+    def __init__(self, file: Path, loop: bool, mmap: bool = False) -> None:
+        """
+        Play a WAV file.
 
+        With `mmap`, the file is memory-mapped instead of being read at once,
+        so that opening it does not depend on its length.
+        """
+        sample_rate, data = wavfile.read(file.absolute(), mmap=mmap)
+        self._load(sample_rate, data, loop)
+
+    @classmethod
+    def from_array(
+        cls,
+        data: np.ndarray,
+        sample_rate: int,
+        loop: bool,
+        sample_format: int | None = None,
+    ) -> "Wav":
+        """
+        Play samples which are already in memory, as read from a WAV file.
+
+        The array is used as is, without being copied. The sample format of
+        the signal is the one of the array, unless `sample_format` is given.
+        """
+        wav = cls.__new__(cls)
+        wav._load(sample_rate, data, loop, sample_format)
+        return wav
+
+    @classmethod
+    def cached(
+        cls,
+        file: Path,
+        loop: bool,
+        sample_rate: int | None = None,
+        cache: SampleCache | None = None,
+    ) -> "Wav":
+        """
+        Play a file (WAV, or any format with a decoder) from the sample cache,
+        resampled to `sample_rate` if given.
+
+        The file is only decoded the first time, the sources playing it share
+        the same samples, each with its own read position.
+        """
+        data, signal_info = (cache or sample_cache).get(file, sample_rate)
+        return cls.from_array(
+            data, signal_info.sample_rate, loop, signal_info.sample_format
+        )
+
+    def _load(
+        self,
+        sample_rate: int,
+        data: np.ndarray,
+        loop: bool,
+        sample_format: int | None = None,
+    ) -> None:
         # Determine bit depth and max value for normalization
+        # 24-bit files are read as 32-bit, with the samples in the upper bytes
+        offset = 0.0
         match data.dtype:
+            case np.uint8:
+                # 8-bit samples are unsigned, centered on 128
+                data_format = 8
+                max_value = 128
+                offset = 1.0
             case np.int16:
-                sample_format = 16
+                data_format = 16
                 max_value = np.iinfo(np.int16).max
             case np.int32:
-                sample_format = 32
+                data_format = 32
                 max_value = np.iinfo(np.int32).max
             case np.float32:
-                sample_format = 32
+                data_format = 32
                 max_value = 1.0
             case np.float64:
-                sample_format = 64
+                data_format = 64
                 max_value = 1.0
             case _:
                 raise ValueError("Unsupported audio format")
 
+        # Mono files are read as a single column
+        if data.ndim == 1:
+            data = data[:, np.newaxis]
+
         self.info = SignalInfo(
             sample_rate=sample_rate,
-            sample_format=sample_format,
+            sample_format=sample_format or data_format,
             channels=data.shape[1],
         )
         self.loop = loop
         self.ended = False
         self.read_index = 0
 
-        # Normalize audio data to float32
+        # Audio data is kept in its original format, and normalized to float32
+        # one block at a time
         # Float32 is better suited to process audio, especially when adding gain to avoid clipping
-        if sample_format in [16, 32]:
-            self.data = data.astype(np.float32) / max_value
-        else:
-            self.data = data
+        self.data = data
+        self.scale = np.float32(1.0 / max_value)
+        self.offset = np.float32(offset)
 
     @property
     def signal_info(self) -> SignalInfo:
         return self.info
 
+    @property
+    def length(self) -> int:
+        """
+        Length of the file, in samples.
+        """
+        return len(self.data)
+
+    def seek(self, index: int) -> None:
+        """
+        Move the read position to the given sample.
+        """
+        if not 0 <= index < len(self.data):
+            raise ValueError(f"Sample {index} is outside of the file")
+
+        self.read_index = index
+        self.ended = False
+
     def get_signal(self) -> tuple[np.ndarray, SignalInfo]:
         if self.ended:
-            return (np.zeros(2, dtype=np.float32), self.signal_info)
+            return (np.zeros(self.info.channels, dtype=np.float32), self.signal_info)
 
-        state = self.data[self.read_index]
+        state = self.data[self.read_index] * self.scale - self.offset
         self.read_index += 1
         if self.read_index >= len(self.data) and not self.loop:
             self.ended = True
@@ -59,6 +140,31 @@ class Wav(SignalSource):
             self.read_index %= len(self.data)
 
         return (
-            state,
+            state.astype(np.float32, copy=False),
             self.signal_info,
         )
+
+    def get_block(self, frames: int) -> tuple[np.ndarray, SignalInfo]:
+        block = np.zeros((frames, self.info.channels), dtype=np.float32)
+
+        written = 0
+        while written < frames and not self.ended:
+            # Convert as many samples as possible before the end of the data
+            count = min(frames - written, len(self.data) - self.read_index)
+            np.multiply(
+                self.data[self.read_index : self.read_index + count],
+                self.scale,
+                out=block[written : written + count],
+            )
+            if self.offset:
+                block[written : written + count] -= self.offset
+            written += count
+            self.read_index += count
+
+            if self.read_index >= len(self.data):
+                if self.loop:
+                    self.read_index = 0
+                else:
+                    self.ended = True
+
+        return (block, self.signal_info)
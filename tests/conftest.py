@@ -0,0 +1,39 @@
+from pathlib import Path
+import wave
+
+import numpy as np
+import pytest
+
+
+def write_wav(file: Path, samples: np.ndarray, sample_rate: int, width: int) -> Path:
+    """
+    Write float samples in [-1.0, 1.0] as a PCM WAV file of `width` bytes.
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    if samples.ndim == 1:
+        samples = samples[:, np.newaxis]
+
+    if width == 1:
+        data = np.round(samples * 127 + 128).astype(np.uint8).tobytes()
+    else:
+        scale = 2 ** (8 * width - 1) - 1
+        wide = np.round(samples * scale).astype("<i4")
+        data = wide.view(np.uint8).reshape(*wide.shape, 4)[..., :width].tobytes()
+
+    with wave.open(str(file), "wb") as output:
+        output.setnchannels(samples.shape[1])
+        output.setsampwidth(width)
+        output.setframerate(sample_rate)
+        output.writeframes(data)
+
+    return file
+
+
+@pytest.fixture
+def sine() -> np.ndarray:
+    """
+    One second of a stereo 440 Hz sine at 44.1 kHz, at half of full scale.
+    """
+    t = np.arange(44100) / 44100
+    mono = 0.5 * np.sin(2 * np.pi * 440 * t)
+    return np.stack([mono, mono], axis=1).astype(np.float32)
@@ -0,0 +1,33 @@
+import numpy as np
+
+from pydalboard.batch import BatchJob, render_batch
+from pydalboard.modules import Gain, GainParameters
+from pydalboard.signal.decoders import WavDecoder
+
+from conftest import write_wav
+
+
+def read(file):
+    decoder = WavDecoder(file)
+    samples = np.zeros((decoder.length, decoder.signal_info.channels), np.float32)
+    decoder.read(samples)
+    return samples, decoder.signal_info
+
+
+def test_renders_24_bit_input(tmp_path, sine):
+    input_file = write_wav(tmp_path / "input.wav", sine, 44100, width=3)
+    jobs = [
+        BatchJob(input_file, tmp_path / "same.wav"),
+        BatchJob(input_file, tmp_path / "quiet.wav", [Gain(GainParameters(gain=-6.0))]),
+    ]
+
+    results = render_batch(jobs, workers=2)
+
+    assert [result.job for result in results] == jobs
+    same, signal_info = read(tmp_path / "same.wav")
+    assert signal_info.sample_format == 24
+    assert same.shape == sine.shape
+    np.testing.assert_allclose(same, sine, atol=1e-6)
+
+    quiet, _ = read(tmp_path / "quiet.wav")
+    np.testing.assert_allclose(quiet, sine * 10 ** (-6 / 20), atol=1e-5)
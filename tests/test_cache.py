@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+import pytest
+
+from pydalboard.signal import CacheStats, SampleCache, Wav
+
+from conftest import write_wav
+
+# Decoded size of the one second stereo sine, as float32
+SIZE = 44100 * 2 * 4
+
+
+@pytest.fixture
+def files(tmp_path, sine):
+    return [
+        write_wav(tmp_path / f"input{i}.wav", sine * (i + 1) / 4, 44100, 2)
+        for i in range(3)
+    ]
+
+
+def test_decodes_files_once(files, sine):
+    cache = SampleCache()
+
+    first, signal_info = cache.get(files[0])
+    second, _ = cache.get(files[0])
+
+    assert first is second
+    assert not first.flags.writeable
+    assert signal_info.sample_rate == 44100
+    np.testing.assert_allclose(first, sine / 4, atol=1e-4)
+
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.entries, stats.size) == (1, 1, 1, SIZE)
+    assert stats.hit_rate == 0.5
+
+
+def test_evicts_the_least_recently_used_files(files):
+    cache = SampleCache(budget=2 * SIZE)
+    cache.get(files[0])
+    cache.get(files[1])
+    # The first file is now the most recently used
+    cache.get(files[0])
+
+    cache.get(files[2])
+
+    stats = cache.stats
+    assert stats.evictions == 1
+    assert stats.entries == 2
+    assert stats.size == 2 * SIZE <= cache.budget
+
+    cache.get(files[0])
+    cache.get(files[2])
+    assert cache.stats.hits == 3
+    cache.get(files[1])
+    assert cache.stats.misses == 4
+
+
+def test_does_not_keep_files_larger_than_the_budget(files):
+    cache = SampleCache(budget=SIZE - 1)
+
+    data, _ = cache.get(files[0])
+
+    assert len(data) == 44100
+    stats = cache.stats
+    assert (stats.entries, stats.size, stats.evictions) == (0, 0, 0)
+
+
+def test_keeps_evicted_samples_valid(files, sine):
+    cache = SampleCache(budget=SIZE)
+    wav = Wav.cached(files[0], loop=False, cache=cache)
+
+    cache.get(files[1])
+
+    assert cache.stats.evictions == 1
+    block, _ = wav.get_block(100)
+    np.testing.assert_allclose(block, sine[:100] / 4, atol=1e-4)
+
+
+def test_decodes_modified_files_again(files, sine):
+    cache = SampleCache()
+    cache.get(files[0])
+
+    write_wav(files[0], sine, 44100, 2)
+    stat = files[0].stat()
+    os.utime(files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    data, _ = cache.get(files[0])
+
+    np.testing.assert_allclose(data, sine, atol=1e-4)
+    assert cache.stats.misses == 2
+
+
+def test_caches_resampled_files_separately(files):
+    cache = SampleCache()
+
+    original, _ = cache.get(files[0])
+    resampled, signal_info = cache.get(files[0], sample_rate=22050)
+
+    assert signal_info.sample_rate == 22050
+    assert len(resampled) == len(original) // 2
+    assert cache.stats.entries == 2
+    assert cache.stats.size == SIZE + SIZE // 2
+
+
+def test_clear_resets_the_statistics(files):
+    cache = SampleCache()
+    cache.get(files[0])
+    cache.get(files[0])
+
+    cache.clear()
+
+    assert cache.stats == CacheStats()
@@ -0,0 +1,106 @@
+import numpy as np
+
+from pydalboard.compilation import compile_modules
+from pydalboard.modules import (
+    Delay,
+    DelayParameters,
+    Filter,
+    FilterParameters,
+    Gain,
+    GainParameters,
+    Saturation,
+    SaturationParameters,
+)
+from pydalboard.modules.filter import FilterType
+from pydalboard.pipeline import Pipeline
+from pydalboard.signal import Wav
+
+BLOCK_SIZE = 256
+
+
+def chain():
+    return [
+        Gain(GainParameters(gain=0.0)),
+        Gain(GainParameters(gain=-3.0)),
+        Saturation(SaturationParameters(drive=6.0)),
+        Gain(GainParameters(gain=-6.0)),
+        Filter(FilterParameters(2000.0, 1.0, FilterType.LOW_PASS, 24)),
+        Filter(FilterParameters(100.0, 1.0, FilterType.HIGH_PASS, 12)),
+        Delay(DelayParameters(delay=10.0, feedback=0.3)),
+    ]
+
+
+def pipelines(sine):
+    compiled = Pipeline(Wav.from_array(sine, 44100, loop=True))
+    compiled.modules.extend(chain())
+    compiled.compile()
+
+    reference = Pipeline(Wav.from_array(sine, 44100, loop=True))
+    reference.modules.extend(chain())
+    return compiled, reference
+
+
+def run_both(compiled, reference, blocks):
+    for _ in range(blocks):
+        np.testing.assert_allclose(
+            compiled.run_block(BLOCK_SIZE), reference.run_block(BLOCK_SIZE), atol=1e-5
+        )
+
+
+def test_plan_folds_gains_and_filters():
+    plan = compile_modules(chain())
+
+    # The drive absorbs the gains around it, the filters run as one cascade
+    assert [type(step).__name__ for step in plan] == [
+        "_DriveStep",
+        "_FilterStep",
+        "Delay",
+    ]
+
+
+def test_plan_keeps_lone_modules():
+    modules = [
+        Saturation(SaturationParameters(drive=6.0)),
+        Filter(FilterParameters(2000.0, 1.0, FilterType.LOW_PASS, 24)),
+        Delay(DelayParameters(delay=10.0, feedback=0.3)),
+    ]
+
+    assert compile_modules(modules) == modules
+
+
+def test_plan_is_kept_until_params_are_replaced(sine):
+    compiled, _ = pipelines(sine)
+    compiled.run_block(BLOCK_SIZE)
+    plan = compiled._plan
+
+    compiled.run_block(BLOCK_SIZE)
+    assert compiled._plan is plan
+
+    compiled.modules[1].update(gain=-4.0)
+    compiled.run_block(BLOCK_SIZE)
+    assert compiled._plan is not plan
+
+
+def test_compiled_pipeline_matches_modules(sine):
+    compiled, reference = pipelines(sine)
+    run_both(compiled, reference, 20)
+
+
+def test_compiled_pipeline_follows_updates(sine):
+    compiled, reference = pipelines(sine)
+    run_both(compiled, reference, 5)
+
+    for pipeline in (compiled, reference):
+        pipeline.modules[4].update(cutoff=500.0)
+    run_both(compiled, reference, 20)
+
+
+def test_compiled_pipeline_follows_params_modified_in_place(sine):
+    compiled, reference = pipelines(sine)
+    run_both(compiled, reference, 5)
+
+    # The dropped 0 dB gain must be planned again
+    for pipeline in (compiled, reference):
+        pipeline.modules[0].params.gain = 6.0
+        pipeline.modules[5].params.cutoff = 300.0
+    run_both(compiled, reference, 20)
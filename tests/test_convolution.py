@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from scipy.signal import fftconvolve
+
+from pydalboard.modules import Convolution, ConvolutionParameters
+from pydalboard.signal import SignalInfo
+
+SIGNAL_INFO = SignalInfo(44100, 16, 2)
+
+
+def convolve(module, samples, block_size):
+    module.prepare(SIGNAL_INFO, 256)
+    blocks = [
+        samples[start : start + block_size].copy()
+        for start in range(0, len(samples), block_size)
+    ]
+    return np.concatenate(
+        [module.process_block(block, SIGNAL_INFO) for block in blocks]
+    )
+
+
+def noise(frames, channels=2):
+    samples = np.random.default_rng(0).uniform(-0.5, 0.5, (frames, channels))
+    return samples.astype(np.float32)
+
+
+@pytest.mark.parametrize("block_size", [256, 100, 1000])
+def test_matches_direct_convolution(block_size):
+    # The impulse response spans several partitions, and is stereo
+    impulse_response = noise(1000) * np.exp(-np.arange(1000) / 200)[:, np.newaxis]
+    samples = noise(4096)
+    module = Convolution(ConvolutionParameters(), impulse_response, 44100, 256)
+
+    output = convolve(module, samples, block_size)
+
+    expected = fftconvolve(samples, impulse_response, axes=0)[: len(samples)]
+    latency = module.latency
+    assert latency == 256
+    np.testing.assert_allclose(output[latency:], expected[:-latency], atol=1e-4)
+
+
+def test_applies_a_mono_impulse_response_to_every_channel():
+    samples = noise(2048)
+    module = Convolution(
+        ConvolutionParameters(gain=-6.0), np.array([0.0, 1.0]), 44100, 256
+    )
+
+    output = convolve(module, samples, 256)
+
+    # A delay of one sample, on top of the latency
+    np.testing.assert_allclose(
+        output[257:], samples[:-257] * 10 ** (-6 / 20), atol=1e-6
+    )
+
+
+def test_mixes_the_delayed_dry_signal():
+    samples = noise(2048)
+    module = Convolution(ConvolutionParameters(mix=0.0), noise(500, 1), 44100, 256)
+
+    output = convolve(module, samples, 256)
+
+    np.testing.assert_allclose(output[256:], samples[:-256], atol=1e-6)
+
+
+def test_rejects_impulse_responses_with_other_channels():
+    module = Convolution(ConvolutionParameters(), noise(100, 3), 44100)
+
+    with pytest.raises(ValueError):
+        module.prepare(SIGNAL_INFO, 256)
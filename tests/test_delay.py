@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from pydalboard.modules import Delay, DelayParameters
+from pydalboard.signal import SignalInfo
+
+SIGNAL_INFO = SignalInfo(44100, 16, 2)
+
+# Uneven blocks, shorter and longer than the delays
+BLOCK_SIZES = [1, 7, 64, 300, 513, 2, 129, 1024, 50]
+
+
+def noise(frames):
+    samples = np.random.default_rng(0).uniform(-0.5, 0.5, (frames, 2))
+    return samples.astype(np.float32)
+
+
+def process(delay, samples):
+    delay.prepare(SIGNAL_INFO, max(BLOCK_SIZES))
+    blocks = []
+    start = 0
+    for size in BLOCK_SIZES:
+        block = samples[start : start + size]
+        blocks.append(delay.process_block(block, SIGNAL_INFO))
+        start += size
+    return np.concatenate(blocks)
+
+
+def recurrence(samples, delays, feedback):
+    """
+    y[n] = x[n] + feedback * y[n - delays[n]], with a linear interpolation
+    of fractional delays.
+    """
+    output = np.zeros((len(samples), samples.shape[1]))
+    for n in range(len(samples)):
+        position = n - delays[n]
+        whole = int(np.floor(position))
+        fraction = position - whole
+        past = 0.0
+        if whole >= 0:
+            past += (1 - fraction) * output[whole]
+        if whole + 1 >= 0:
+            past += fraction * output[whole + 1]
+        output[n] = samples[n] + feedback * past
+    return output
+
+
+@pytest.mark.parametrize("delay_ms", [1.0, 10.0, 10.01])
+def test_matches_the_recurrence_across_blocks(delay_ms):
+    samples = noise(sum(BLOCK_SIZES))
+    original = samples.copy()
+
+    output = process(Delay(DelayParameters(delay=delay_ms, feedback=0.6)), samples)
+
+    delays = np.full(len(samples), SIGNAL_INFO.sample_rate * delay_ms / 1000)
+    expected = recurrence(samples, delays, 0.6)
+    np.testing.assert_allclose(output, expected, atol=1e-5)
+    # The input blocks are left untouched
+    np.testing.assert_array_equal(samples, original)
+
+
+def test_ramps_delay_changes_over_a_block():
+    block_size = 256
+    samples = noise(8 * block_size)
+    delay = Delay(DelayParameters(delay=5.0, feedback=0.5))
+    delay.prepare(SIGNAL_INFO, block_size)
+
+    blocks = []
+    delays = []
+    current = delay.current_delay
+    for index, start in enumerate(range(0, len(samples), block_size)):
+        # Delays shorter and longer than a block
+        delay.update(delay=5.0 if index % 2 else 1.0 + 2.0 * index)
+        target = delay.delay_samples()
+        block = samples[start : start + block_size]
+        blocks.append(delay.process_block(block, SIGNAL_INFO))
+        ramp = np.arange(1, block_size + 1) / block_size
+        delays.append(current + (target - current) * ramp)
+        current = target
+    output = np.concatenate(blocks)
+
+    expected = recurrence(samples, np.concatenate(delays), 0.5)
+    np.testing.assert_allclose(output, expected, atol=1e-5)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from pydalboard.modules import Filter, FilterParameters
+from pydalboard.modules.filter import FilterType
+from pydalboard.signal import SignalInfo
+
+SIGNAL_INFO = SignalInfo(44100, 16, 2)
+
+# Uneven blocks, so that the state is carried across any boundary
+BLOCK_SIZES = [1, 7, 64, 300, 513, 2, 129]
+
+
+def noise(frames):
+    samples = np.random.default_rng(0).uniform(-0.5, 0.5, (frames, 2))
+    return samples.astype(np.float32)
+
+
+def recurrence(params, samples):
+    """
+    Cascade of biquads in direct form I, one sample at a time.
+    """
+    b0, b1, b2, a1, a2 = params.calculate_biquad_coefficients(SIGNAL_INFO.sample_rate)
+    output = samples.astype(np.float64)
+    for _ in range(2 if params.slope == 24 else 1):
+        x = output.copy()
+        y = np.zeros_like(x)
+        for n in range(len(x)):
+            y[n] = b0 * x[n]
+            if n >= 1:
+                y[n] += b1 * x[n - 1] - a1 * y[n - 1]
+            if n >= 2:
+                y[n] += b2 * x[n - 2] - a2 * y[n - 2]
+        output = y
+    return output
+
+
+@pytest.mark.parametrize("slope", [12, 24])
+@pytest.mark.parametrize("filter_type", list(FilterType))
+def test_blocks_match_the_per_sample_recurrence(filter_type, slope):
+    params = FilterParameters(1000.0, 2.0, filter_type, slope)
+    samples = noise(sum(BLOCK_SIZES))
+
+    by_block = Filter(params)
+    by_block.prepare(SIGNAL_INFO, max(BLOCK_SIZES))
+    blocks = []
+    start = 0
+    for size in BLOCK_SIZES:
+        block = samples[start : start + size].copy()
+        blocks.append(by_block.process_block(block, SIGNAL_INFO))
+        start += size
+    output = np.concatenate(blocks)
+
+    by_sample = Filter(params)
+    by_sample.prepare(SIGNAL_INFO, 1)
+    expected = np.array([by_sample.process(frame, SIGNAL_INFO) for frame in samples])
+
+    assert output.dtype == np.float32
+    np.testing.assert_allclose(output, expected, atol=1e-6)
+    np.testing.assert_allclose(output, recurrence(params, samples), atol=1e-6)
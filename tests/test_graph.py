@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from pydalboard.graph import Graph
+from pydalboard.modules import (
+    Delay,
+    DelayParameters,
+    Filter,
+    FilterParameters,
+    Gain,
+    GainParameters,
+)
+from pydalboard.modules.filter import FilterType
+from pydalboard.pipeline import Pipeline
+from pydalboard.signal import Wav
+
+BLOCK_SIZE = 512
+
+
+def render(graph_or_pipeline, blocks=10):
+    return np.concatenate(
+        [graph_or_pipeline.run_block(BLOCK_SIZE).copy() for _ in range(blocks)]
+    )
+
+
+def chain():
+    return [
+        Gain(GainParameters(gain=-6.0)),
+        Filter(FilterParameters(1000.0, 1.0, FilterType.LOW_PASS, 12)),
+        Delay(DelayParameters(delay=5.0, feedback=0.5)),
+    ]
+
+
+def test_chain_matches_pipeline(sine):
+    graph = Graph(Wav.from_array(sine, 44100, loop=True))
+    node = graph.input
+    for module in chain():
+        node = graph.add(module, node)
+    graph.output = node
+
+    pipeline = Pipeline(Wav.from_array(sine, 44100, loop=True))
+    pipeline.modules.extend(chain())
+
+    np.testing.assert_allclose(render(graph), render(pipeline), atol=1e-6)
+
+
+def test_mixes_parallel_branches(sine):
+    graph = Graph(Wav.from_array(sine, 44100, loop=True))
+    quiet = graph.add(Gain(GainParameters(gain=-6.0)), graph.input)
+    loud = graph.add(Gain(GainParameters(gain=6.0)), graph.input)
+    graph.output = graph.mix(graph.input, (quiet, 0.5), (loud, 0.25))
+
+    expected = sine * (1.0 + 0.5 * 10 ** (-6 / 20) + 0.25 * 10 ** (6 / 20))
+    np.testing.assert_allclose(render(graph, 4), expected[:2048], atol=1e-6)
+
+
+def test_workers_give_the_same_output(sine):
+    def build(workers):
+        graph = Graph(Wav.from_array(sine, 44100, loop=True), workers=workers)
+        branches = []
+        for cutoff in (200.0, 1000.0, 5000.0):
+            params = FilterParameters(cutoff, 1.0, FilterType.BAND_PASS, 24)
+            branches.append(graph.add(Filter(params), graph.input))
+        wet = graph.mix(*branches)
+        echo = graph.add(Delay(DelayParameters(delay=10.0, feedback=0.3)), wet)
+        graph.output = graph.mix(graph.input, (echo, 0.5))
+        return graph
+
+    graph = build(workers=3)
+    try:
+        np.testing.assert_allclose(render(graph), render(build(workers=1)), atol=1e-6)
+    finally:
+        graph.close()
+
+
+def test_reuses_buffers(sine):
+    graph = Graph(Wav.from_array(sine, 44100, loop=True))
+    node = graph.input
+    for _ in range(8):
+        node = graph.add(Gain(GainParameters(gain=-1.0)), node)
+    graph.output = node
+
+    render(graph, 1)
+
+    # A chain of modules processes a single buffer in place
+    assert len(graph._buffers) == 1
+
+
+def test_rejects_invalid_graphs(sine):
+    graph = Graph(Wav.from_array(sine, 44100, loop=True))
+    other = Graph(Wav.from_array(sine, 44100, loop=True))
+
+    with pytest.raises(ValueError):
+        graph.add(Gain(GainParameters(gain=0.0)), other.input)
+    with pytest.raises(ValueError):
+        graph.mix()
+    with pytest.raises(ValueError):
+        graph.run_block(BLOCK_SIZE)
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from pydalboard.modules import Delay, DelayParameters, Filter, FilterParameters, kernels
+from pydalboard.modules.filter import FilterType
+from pydalboard.signal import SignalInfo
+
+pytest.importorskip("numba")
+pytestmark = pytest.mark.skipif(
+    not kernels.JIT_ENABLED, reason="The kernels are disabled with PYDALBOARD_JIT=0"
+)
+
+SIGNAL_INFO = SignalInfo(44100, 16, 2)
+BLOCK_SIZE = 512
+
+
+def noise(frames):
+    samples = np.random.default_rng(0).uniform(-0.5, 0.5, (frames, 2))
+    return samples.astype(np.float32)
+
+
+def run_with_and_without_jit(monkeypatch, build, automate):
+    """
+    Output of a module built by `build`, with the compiled kernels and with
+    the numpy code, while `automate` changes its parameters between blocks.
+    """
+    samples = noise(16 * BLOCK_SIZE)
+    outputs = []
+    for jit in (True, False):
+        monkeypatch.setattr(kernels, "JIT_ENABLED", jit)
+        module = build()
+        module.prepare(SIGNAL_INFO, BLOCK_SIZE)
+        blocks = []
+        for index, start in enumerate(range(0, len(samples), BLOCK_SIZE)):
+            automate(module, index)
+            block = samples[start : start + BLOCK_SIZE].copy()
+            blocks.append(module.process_block(block, SIGNAL_INFO))
+        outputs.append(np.concatenate(blocks))
+
+    return outputs
+
+
+@pytest.mark.parametrize("slope", [12, 24])
+@pytest.mark.parametrize("filter_type", list(FilterType))
+def test_modulated_filter_matches_numpy(monkeypatch, filter_type, slope):
+    def automate(filter, index):
+        filter.update(cutoff=500.0 + 300.0 * index, resonance=1.0 + 0.2 * index)
+
+    compiled, reference = run_with_and_without_jit(
+        monkeypatch,
+        lambda: Filter(FilterParameters(500.0, 1.0, filter_type, slope)),
+        automate,
+    )
+
+    np.testing.assert_allclose(compiled, reference, atol=1e-5)
+
+
+def test_short_delay_matches_numpy(monkeypatch):
+    def automate(delay, index):
+        # Delays shorter than a block, moving and fractional
+        delay.update(delay=0.5 + 0.37 * index, feedback=0.2 + 0.04 * index)
+
+    compiled, reference = run_with_and_without_jit(
+        monkeypatch,
+        lambda: Delay(DelayParameters(delay=0.5, feedback=0.2)),
+        automate,
+    )
+
+    np.testing.assert_allclose(compiled, reference, atol=1e-5)
+
+
+def test_coefficients_match_python():
+    kernels.warm_up()
+    for filter_type in FilterType:
+        compiled = kernels.biquad_coefficients(filter_type.value, 1234.5, 3.0, 48000.0)
+        python = kernels.biquad_coefficients.py_func(
+            filter_type.value, 1234.5, 3.0, 48000.0
+        )
+        np.testing.assert_allclose(compiled, python, rtol=1e-12)
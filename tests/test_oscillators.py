@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from pydalboard.signal import Oscillator, SignalInfo, Waveform
+from pydalboard.signal.oscillators import get_wavetables
+
+SIGNAL_INFO = SignalInfo(44100, 16, 2)
+
+# Uneven blocks, so that the phase is carried across any boundary
+BLOCK_SIZES = [1, 7, 64, 300, 513, 2, 129]
+
+
+@pytest.mark.parametrize("waveform", list(Waveform))
+def test_blocks_continue_the_phase(waveform):
+    by_block = Oscillator(waveform, 441.3, 0.25, SIGNAL_INFO)
+    output = np.concatenate([by_block.get_block(size)[0] for size in BLOCK_SIZES])
+
+    at_once = Oscillator(waveform, 441.3, 0.25, SIGNAL_INFO)
+    expected, _ = at_once.get_block(sum(BLOCK_SIZES))
+
+    np.testing.assert_allclose(output, expected, atol=1e-5)
+    assert by_block.cycles_played == at_once.cycles_played
+    assert by_block.position == pytest.approx(at_once.position)
+
+
+def test_keeps_the_phase_precision_over_long_runs():
+    oscillator = Oscillator(Waveform.SINE, 1000.0, 0.0, SIGNAL_INFO)
+    # Ten minutes of audio
+    for _ in range(10):
+        oscillator.get_block(60 * SIGNAL_INFO.sample_rate)
+    assert oscillator.cycles_played == 600 * 1000
+
+    block, _ = oscillator.get_block(100)
+    expected = np.sin(2 * np.pi * 1000.0 * np.arange(100) / SIGNAL_INFO.sample_rate)
+    np.testing.assert_allclose(block[:, 0], expected, atol=1e-4)
+
+
+def test_stops_after_the_cycles():
+    oscillator = Oscillator(Waveform.SINE, 441.0, 0.0, SIGNAL_INFO, cycles=2)
+    block, _ = oscillator.get_block(500)
+
+    # Two cycles of 100 samples
+    assert block[:200].any()
+    assert not block[200:].any()
+    assert not oscillator.get_block(100)[0].any()
+
+
+@pytest.mark.parametrize("frequency", [440.0, 3001.0, 11001.0])
+@pytest.mark.parametrize("waveform", list(Waveform))
+def test_does_not_alias(waveform, frequency):
+    info = SignalInfo(44100, 16, 1)
+    oscillator = Oscillator(waveform, frequency, 0.0, info)
+    # One second of a whole number of hertz: harmonics fall on exact bins
+    block, _ = oscillator.get_block(info.sample_rate)
+
+    power = np.abs(np.fft.rfft(block[:, 0].astype(np.float64))) ** 2
+    harmonics = np.zeros(len(power), dtype=bool)
+    harmonics[:: int(frequency)] = True
+
+    assert power[~harmonics].sum() < 1e-6 * power.sum()
+
+
+def test_keeps_the_harmonics_below_nyquist():
+    info = SignalInfo(44100, 16, 1)
+    oscillator = Oscillator(Waveform.SAWTOOTH, 3001.0, 0.0, info)
+    block, _ = oscillator.get_block(info.sample_rate)
+
+    power = np.abs(np.fft.rfft(block[:, 0].astype(np.float64))) ** 2
+    # At least half of the 7 harmonics below Nyquist are played
+    assert power[4 * 3001] > 1e-4 * power[3001]
+
+
+def test_shares_read_only_tables():
+    first = Oscillator(Waveform.SQUARE, 440.0, 0.0, SIGNAL_INFO)
+    second = Oscillator(Waveform.SQUARE, 880.0, 0.5, SIGNAL_INFO)
+
+    assert first._tables is second._tables
+    assert first._tables is get_wavetables(Waveform.SQUARE, 1024)
+    assert not first._tables.flags.writeable
+    # Each table wraps around for the interpolation
+    np.testing.assert_array_equal(first._tables[:, 0], first._tables[:, -1])
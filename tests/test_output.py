@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+
+from pydalboard.modules.base import Module
+from pydalboard.output import NullBackend, OutputEngine
+from pydalboard.pipeline import Pipeline
+from pydalboard.signal import Wav
+
+BUFFER_SIZE = 256
+
+
+class Slow(Module):
+    """
+    Module taking longer than a buffer to process it.
+    """
+
+    def process(self, input, signal_info):
+        return input
+
+    def process_block(self, input, signal_info):
+        time.sleep(0.02)
+        return input
+
+
+def play(engine, seconds):
+    with engine:
+        time.sleep(seconds)
+
+
+def test_plays_the_pipeline_without_gaps(sine):
+    pipeline = Pipeline(Wav.from_array(sine, 44100, loop=True, sample_format=16))
+    backend = NullBackend(capture=True)
+    engine = OutputEngine(pipeline, backend, buffer_size=BUFFER_SIZE)
+
+    play(engine, 0.2)
+
+    captured = np.concatenate(backend.captured)
+    assert captured.dtype == np.int16
+    assert len(captured) == backend.frames_played > 0
+    assert engine.stats.xruns == 0
+    assert engine.stats.callbacks == len(backend.captured)
+
+    expected = np.rint(np.tile(sine, (2, 1))[: len(captured)] * 32767)
+    np.testing.assert_array_equal(captured, expected)
+
+
+def test_counts_xruns_when_rendering_is_late(sine):
+    pipeline = Pipeline(Wav.from_array(sine, 44100, loop=True, sample_format=16))
+    pipeline.modules.append(Slow())
+    backend = NullBackend(realtime=False, capture=True)
+    engine = OutputEngine(pipeline, backend, buffer_size=BUFFER_SIZE)
+
+    play(engine, 0.1)
+
+    stats = engine.stats
+    assert stats.xruns > 0
+    assert stats.callbacks >= stats.xruns
+    # Late buffers are completed with silence
+    assert any(not block.any() for block in backend.captured)
+
+
+def test_stops_cleanly(sine):
+    pipeline = Pipeline(Wav.from_array(sine, 44100, loop=True))
+    backend = NullBackend()
+    engine = OutputEngine(pipeline, backend, buffer_size=BUFFER_SIZE)
+
+    play(engine, 0.05)
+    frames_played = backend.frames_played
+    time.sleep(0.05)
+
+    assert engine.error is None
+    assert engine._render_thread is None
+    assert backend._thread is None
+    assert backend.frames_played == frames_played
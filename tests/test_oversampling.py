@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from pydalboard.modules import Gain, GainParameters, Oversampling
+from pydalboard.modules.base import Module
+from pydalboard.signal import SignalInfo
+
+SIGNAL_INFO = SignalInfo(44100, 16, 2)
+BLOCK_SIZE = 256
+
+
+class Late(Module):
+    """
+    Module delaying the signal by a whole number of samples.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.history = None
+
+    def process(self, input, signal_info):
+        return self.process_block(input[np.newaxis], signal_info)[0]
+
+    def process_block(self, input, signal_info):
+        if self.history is None:
+            self.history = np.zeros((self.latency, input.shape[1]), dtype=np.float32)
+        signal = np.concatenate((self.history, input))
+        self.history = signal[len(input) :]
+        return signal[: len(input)]
+
+
+def sine(frequency, frames):
+    time = np.arange(frames) / SIGNAL_INFO.sample_rate
+    samples = 0.5 * np.sin(2 * np.pi * frequency * time)
+    return np.repeat(samples[:, np.newaxis], 2, axis=1).astype(np.float32)
+
+
+def process(module, samples):
+    module.prepare(SIGNAL_INFO, BLOCK_SIZE)
+    return np.concatenate(
+        [
+            module.process_block(samples[start : start + BLOCK_SIZE], SIGNAL_INFO)
+            for start in range(0, len(samples), BLOCK_SIZE)
+        ]
+    )
+
+
+@pytest.mark.parametrize("inner_latency", [0, 3])
+@pytest.mark.parametrize("factor", [2, 4, 8])
+def test_reports_the_measured_latency(factor, inner_latency):
+    module = Oversampling(Late(inner_latency), factor)
+    frames = 16 * BLOCK_SIZE
+    samples = sine(1000.0, frames)
+
+    output = process(module, samples)
+
+    # Well below the cutoff, the filters only delay the sine, by a possibly
+    # fractional number of samples
+    latency = module.latency
+    time = np.arange(frames) - latency
+    expected = 0.5 * np.sin(2 * np.pi * 1000.0 * time / SIGNAL_INFO.sample_rate)
+    settled = int(np.ceil(latency)) + 64
+    np.testing.assert_allclose(output[settled:, 0], expected[settled:], atol=1e-3)
+    np.testing.assert_allclose(output[:, 1], output[:, 0])
+
+
+def test_latency_of_a_whole_number_of_samples_delays_an_impulse():
+    module = Oversampling(Gain(GainParameters(0.0)), 2)
+    impulse = np.zeros((4 * BLOCK_SIZE, 2), dtype=np.float32)
+    impulse[100] = 1.0
+
+    output = process(module, impulse)
+
+    # The half-band filters are symmetric: the response peaks at the latency
+    assert module.latency == int(module.latency)
+    assert np.argmax(output[:, 0]) == 100 + module.latency
+    assert output[:, 0].sum() == pytest.approx(1.0, abs=1e-3)
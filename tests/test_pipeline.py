@@ -0,0 +1,16 @@
+import numpy as np
+
+from pydalboard.modules import Gain, GainParameters
+from pydalboard.pipeline import Pipeline
+from pydalboard.signal import Wav
+
+
+def test_runs_frames_in_the_format_of_the_source(sine):
+    pipeline = Pipeline(Wav.from_array(sine, 44100, loop=False, sample_format=16))
+    pipeline.modules.append(Gain(GainParameters(gain=-6.0)))
+
+    frames = np.array([pipeline.run().copy() for _ in range(100)])
+
+    assert frames.dtype == np.int16
+    expected = np.rint(sine[:100] * 10 ** (-6 / 20) * 32767)
+    np.testing.assert_allclose(frames, expected, atol=1)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from pydalboard.modules import PitchShifting, PitchShiftingParameters
+from pydalboard.signal import SignalInfo
+
+SAMPLE_RATE = 44100
+BLOCK_SIZE = 512
+
+
+def shift(samples, pitch_factor):
+    signal_info = SignalInfo(SAMPLE_RATE, 16, samples.shape[1])
+    module = PitchShifting(PitchShiftingParameters(pitch_factor, warp=True))
+    module.prepare(signal_info, BLOCK_SIZE)
+    blocks = [
+        module.process_block(samples[start : start + BLOCK_SIZE].copy(), signal_info)
+        for start in range(0, len(samples), BLOCK_SIZE)
+    ]
+    # The first frames are skipped, while the vocoder fills up
+    return np.concatenate(blocks)[2 * module.latency :]
+
+
+@pytest.mark.parametrize(
+    "pitch_factor, frequency", [(0.5, 1000.0), (1.5, 3000.0), (2.0, 1000.0)]
+)
+def test_shifts_a_sine_at_its_level(pitch_factor, frequency):
+    t = np.arange(2 * SAMPLE_RATE) / SAMPLE_RATE
+    mono = 0.5 * np.sin(2 * np.pi * frequency * t)
+    samples = np.stack([mono, mono], axis=1).astype(np.float32)
+
+    output = shift(samples, pitch_factor)[:, 0]
+
+    spectrum = np.abs(np.fft.rfft(output * np.hanning(len(output))))
+    peak = np.argmax(spectrum) * SAMPLE_RATE / len(output)
+    assert peak == pytest.approx(frequency * pitch_factor, rel=0.005)
+
+    level = np.sqrt(np.mean(output**2)) / (0.5 / np.sqrt(2))
+    assert 20 * np.log10(level) == pytest.approx(0.0, abs=0.5)
+
+    # The level stays steady, without any beating between the frames
+    windows = output[: len(output) // 1024 * 1024].reshape(-1, 1024)
+    levels = np.sqrt(np.mean(windows**2, axis=1))
+    assert 20 * np.log10(levels.max() / levels.min()) < 1.0
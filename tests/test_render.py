@@ -0,0 +1,29 @@
+import numpy as np
+
+from pydalboard.modules import Convolution, ConvolutionParameters
+from pydalboard.pipeline import Pipeline
+from pydalboard.render import render
+from pydalboard.signal import Wav
+from pydalboard.signal.decoders import WavDecoder
+
+
+def read(file):
+    decoder = WavDecoder(file)
+    samples = np.zeros((decoder.length, decoder.signal_info.channels), np.float32)
+    decoder.read(samples)
+    return samples
+
+
+def test_compensates_the_latency_of_the_modules(tmp_path, sine):
+    pipeline = Pipeline(Wav.from_array(sine, 44100, loop=False, sample_format=24))
+    # A unit impulse, which only delays the signal by one partition
+    pipeline.modules.append(
+        Convolution(ConvolutionParameters(), np.array([1.0]), 44100, 512)
+    )
+    assert pipeline.latency == 512
+
+    stats = render(pipeline, tmp_path / "output.wav", block_size=4096)
+
+    output = read(tmp_path / "output.wav")
+    assert stats.frames == len(output) == len(sine)
+    np.testing.assert_allclose(output, sine, atol=1e-6)
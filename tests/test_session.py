@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from pydalboard.modules import Gain, GainParameters
+from pydalboard.pipeline import Pipeline
+from pydalboard.session import Session, Track
+from pydalboard.signal import Oscillator, SignalInfo, Wav, Waveform
+
+SIGNAL_INFO = SignalInfo(44100, 16, 2)
+BLOCK_SIZE = 512
+
+
+def track_pipeline(samples, sample_rate=44100, loop=True):
+    return Pipeline(Wav.from_array(samples, sample_rate, loop=loop))
+
+
+def test_mixes_tracks_with_gain_and_pan(sine):
+    session = Session(SIGNAL_INFO, workers=1)
+    session.add(track_pipeline(sine), gain=-6.0)
+    session.add(track_pipeline(sine[:, :1]), pan=-1.0)
+
+    block, signal_info = session.get_block(BLOCK_SIZE)
+
+    assert signal_info == SIGNAL_INFO
+    quiet = sine[:BLOCK_SIZE, 0] * 10 ** (-6 / 20)
+    np.testing.assert_allclose(block[:, 0], quiet + sine[:BLOCK_SIZE, 0], atol=1e-6)
+    np.testing.assert_allclose(block[:, 1], quiet, atol=1e-6)
+
+
+def test_pans_stereo_tracks_with_a_balance():
+    track = Track(None, pan=0.5)
+
+    np.testing.assert_allclose(track.channel_gains(2, 2), [0.5, 1.0])
+    # Mono tracks keep a constant power
+    assert np.sum(track.channel_gains(1, 2) ** 2) == pytest.approx(1.0)
+
+
+def test_workers_give_the_same_mix(sine):
+    def build(workers):
+        session = Session(SIGNAL_INFO, workers=workers)
+        for gain in (-12.0, -6.0, 0.0):
+            pipeline = track_pipeline(sine)
+            pipeline.modules.append(Gain(GainParameters(gain=gain)))
+            session.add(pipeline, pan=gain / 12.0)
+        return session
+
+    session = build(workers=3)
+    reference = build(workers=1)
+    try:
+        for _ in range(5):
+            np.testing.assert_array_equal(
+                session.get_block(BLOCK_SIZE)[0], reference.get_block(BLOCK_SIZE)[0]
+            )
+    finally:
+        session.close()
+
+
+def test_feeds_a_master_pipeline(sine):
+    session = Session(SIGNAL_INFO, workers=1)
+    session.add(track_pipeline(sine))
+    master = Pipeline(session)
+    master.modules.append(Gain(GainParameters(gain=-6.0)))
+
+    block = master.run_block(BLOCK_SIZE)
+
+    np.testing.assert_allclose(block, sine[:BLOCK_SIZE] * 10 ** (-6 / 20), atol=1e-6)
+
+
+def test_counts_missed_deadlines(sine):
+    session = Session(SIGNAL_INFO, workers=1, budget=0.0)
+    track = session.add(track_pipeline(sine))
+
+    session.get_block(BLOCK_SIZE)
+    session.get_block(BLOCK_SIZE)
+
+    assert session.missed == [track]
+    assert track.missed_deadlines == 2
+    assert track.max_render_time > 0.0
+
+
+def test_length_of_the_longest_track(sine):
+    session = Session(SIGNAL_INFO, workers=1)
+    session.add(track_pipeline(sine[:1000], loop=False))
+    session.add(track_pipeline(sine, loop=False))
+    assert session.length == len(sine)
+
+    # Endless sources make an endless session
+    oscillator = Oscillator(Waveform.SINE, 440.0, 0.0, SIGNAL_INFO)
+    session.add(Pipeline(oscillator))
+    assert session.length is None
+
+
+def test_rejects_tracks_at_another_sample_rate(sine):
+    session = Session(SIGNAL_INFO, workers=1)
+    session.add(track_pipeline(sine, sample_rate=48000))
+
+    with pytest.raises(ValueError):
+        session.get_block(BLOCK_SIZE)
@@ -0,0 +1,83 @@
+import math
+
+import numpy as np
+import pytest
+
+from pydalboard.modules import Gain, GainParameters
+from pydalboard.modules.smoothing import Smoother
+from pydalboard.signal import SignalInfo
+
+SIGNAL_INFO = SignalInfo(44100, 16, 2)
+
+# Uneven blocks, so that the ramp is carried across any boundary
+BLOCK_SIZES = [1, 7, 64, 300, 513, 2, 129]
+
+
+def ramp(smoother, target, block_sizes):
+    values = []
+    for size in block_sizes:
+        value = smoother.next(target, size)
+        values.append(np.broadcast_to(value, (size, 1)).copy())
+    return np.concatenate(values)[:, 0]
+
+
+def test_settled_parameters_are_floats():
+    smoother = Smoother(0.5)
+    smoother.prepare(SIGNAL_INFO.sample_rate, 512)
+
+    value = smoother.next(0.5, 512)
+
+    assert isinstance(value, float)
+    assert value == 0.5
+
+
+def test_ramps_follow_a_one_pole_across_blocks():
+    smoother = Smoother(0.0, time=5.0)
+    smoother.prepare(SIGNAL_INFO.sample_rate, max(BLOCK_SIZES))
+
+    values = ramp(smoother, 1.0, BLOCK_SIZES)
+
+    coefficient = math.exp(-1000.0 / (5.0 * SIGNAL_INFO.sample_rate))
+    expected = 1.0 - coefficient ** np.arange(1, sum(BLOCK_SIZES) + 1)
+    np.testing.assert_allclose(values, expected, atol=1e-6)
+    assert smoother.current == pytest.approx(expected[-1], abs=1e-6)
+
+
+def test_ramps_settle_on_the_target():
+    smoother = Smoother(-1.0, time=1.0)
+    smoother.prepare(SIGNAL_INFO.sample_rate, 512)
+
+    values = ramp(smoother, 2.0, [512] * 4)
+
+    # Monotonic, without overshoot, and exactly on the target once settled
+    assert np.all(np.diff(values) >= 0)
+    assert values.max() <= 2.0
+    assert smoother.current == 2.0
+    assert isinstance(smoother.next(2.0, 512), float)
+
+
+def test_jumps_to_the_target_when_not_prepared_for_the_block():
+    smoother = Smoother(0.0)
+    smoother.prepare(SIGNAL_INFO.sample_rate, 64)
+
+    assert smoother.next(1.0, 128) == 1.0
+    assert smoother.current == 1.0
+
+    smoother.reset(3.0)
+    assert smoother.next(3.0, 64) == 3.0
+
+
+def test_gain_changes_do_not_jump():
+    gain = Gain(GainParameters(0.0))
+    gain.prepare(SIGNAL_INFO, 256)
+    dc = np.full((256, 2), 0.5, dtype=np.float32)
+
+    blocks = [gain.process_block(dc.copy(), SIGNAL_INFO)]
+    gain.update(gain=-20.0)
+    for _ in range(64):
+        blocks.append(gain.process_block(dc.copy(), SIGNAL_INFO))
+    output = np.concatenate(blocks)[:, 0]
+
+    # The change is spread over many samples rather than one step of 0.45
+    assert np.abs(np.diff(output)).max() < 0.01
+    assert output[-1] == pytest.approx(0.05, abs=1e-6)
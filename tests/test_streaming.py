@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from pydalboard.signal import StreamingSource, WavDecoder, open_file
+
+from conftest import write_wav
+
+
+@pytest.mark.parametrize("width", [1, 2, 3, 4])
+def test_decodes_pcm_widths(tmp_path, sine, width):
+    decoder = WavDecoder(write_wav(tmp_path / "input.wav", sine, 44100, width))
+
+    assert decoder.length == len(sine)
+    assert decoder.signal_info.sample_format == 8 * width
+    assert decoder.signal_info.channels == 2
+
+    samples = np.zeros_like(sine)
+    assert decoder.read(samples) == len(sine)
+    np.testing.assert_allclose(samples, sine, atol=2.0 / 2 ** (8 * width - 1))
+    assert decoder.read(samples) == 0
+
+
+def test_decodes_from_any_position(tmp_path, sine):
+    decoder = WavDecoder(write_wav(tmp_path / "input.wav", sine, 44100, 2))
+    decoder.seek(1000)
+
+    samples = np.zeros((100, 2), np.float32)
+    assert decoder.read(samples) == 100
+    np.testing.assert_allclose(samples, sine[1000:1100], atol=1e-4)
+
+
+def test_streams_the_whole_file(tmp_path, sine):
+    file = write_wav(tmp_path / "input.wav", sine, 44100, 3)
+    source = open_file(file, chunk_size=4096, realtime=False)
+
+    blocks = [source.get_block(512)[0].copy() for _ in range(len(sine) // 512 + 2)]
+    source.close()
+
+    streamed = np.concatenate(blocks)
+    np.testing.assert_allclose(streamed[: len(sine)], sine, atol=1e-6)
+    assert not streamed[len(sine) :].any()
+    assert source.underruns == 0
+
+
+def test_loops_a_file_of_whole_chunks(tmp_path):
+    # The end of the file falls right at the end of a chunk
+    samples = np.linspace(-0.5, 0.5, 4 * 1024)[:, np.newaxis]
+    file = write_wav(tmp_path / "input.wav", samples, 44100, 2)
+    source = StreamingSource(
+        WavDecoder(file), loop=True, chunk_size=1024, realtime=False
+    )
+
+    blocks = [source.get_block(1000)[0].copy() for _ in range(20)]
+    source.close()
+
+    streamed = np.concatenate(blocks)[:, 0]
+    expected = np.tile(samples[:, 0], 5)[: len(streamed)]
+    np.testing.assert_allclose(streamed, expected, atol=1e-4)
@@ -0,0 +1,63 @@
+import numpy as np
+
+from pydalboard.signal import SignalInfo, VoiceBank, Waveform
+
+SIGNAL_INFO = SignalInfo(44100, 16, 2)
+
+
+def test_plays_a_note_after_its_attack():
+    bank = VoiceBank(Waveform.SINE, SIGNAL_INFO, attack=1.0)
+    bank.note_on(69, 440.0, amplitude=0.5)
+
+    block = np.concatenate([bank.get_block(512)[0].copy() for _ in range(4)])
+
+    # Past the attack, the note is a sine at its amplitude, on every channel
+    t = np.arange(len(block)) / SIGNAL_INFO.sample_rate
+    expected = 0.5 * np.sin(2 * np.pi * 440.0 * t)
+    np.testing.assert_allclose(block[100:, 0], expected[100:], atol=1e-3)
+    np.testing.assert_array_equal(block[:, 0], block[:, 1])
+    # The attack ramps up from silence
+    assert abs(block[0, 0]) < 0.01
+
+
+def test_frees_voices_after_their_release():
+    bank = VoiceBank(Waveform.SAWTOOTH, SIGNAL_INFO, release=10.0)
+    bank.note_on(60, 261.63)
+    bank.note_on(64, 329.63)
+    bank.get_block(512)
+    assert bank.active_voices == 2
+
+    bank.note_off(60)
+    bank.get_block(256)
+    assert bank.active_voices == 2
+    bank.get_block(256)
+    assert bank.active_voices == 1
+
+    bank.all_notes_off()
+    bank.get_block(512)
+    assert bank.active_voices == 0
+    assert not bank.get_block(512)[0].any()
+
+
+def test_plays_a_note_again_on_the_same_voice():
+    bank = VoiceBank(Waveform.SQUARE, SIGNAL_INFO)
+    voice = bank.note_on(60, 261.63)
+    bank.get_block(512)
+
+    assert bank.note_on(60, 261.63) == voice
+    assert bank.active_voices == 1
+
+
+def test_steals_released_then_oldest_voices():
+    bank = VoiceBank(Waveform.SINE, SIGNAL_INFO, voices=3)
+    first = bank.note_on(60, 261.63)
+    second = bank.note_on(62, 293.66)
+    third = bank.note_on(64, 329.63)
+    bank.get_block(512)
+
+    # The released voice is stolen first, then the oldest
+    bank.note_off(62)
+    assert bank.note_on(65, 349.23) == second
+    assert bank.note_on(67, 392.0) == first
+    assert bank.note_on(69, 440.0) == third
+    assert bank.active_voices == 3